@@ -0,0 +1,809 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from ollama import AsyncClient, chat
+from ollama._types import ResponseError
+from pydantic import ValidationError
+
+from apps.bot_cli.intent_router import Intent, route
+from domain.schemas.ollama import OllamaResponse, ToolCall
+from infra.context_window import ContextWindow, transcript
+from infra.mcp_client import (
+    MCPSessionPool,
+    columnar_to_records,
+    dump_tool_result,
+    is_columnar,
+    to_tool_payload,
+)
+from infra.ollama_scheduler import OllamaScheduler, Priority
+from infra.ollama_stream import StreamMetrics, stream_chat
+from infra.settings import settings
+from persistence.llm_cache import LLMResponseCache, cache_key, default_cache_path
+from persistence.memory_store import ChatMemoryStore
+
+logger = logging.getLogger(__name__)
+
+TokenSink = Callable[[str], None]
+# A tool call started while the answer was still streaming, and its task.
+EarlyTool = Tuple[Tuple[str, Dict[str, Any]], "asyncio.Task[Any]"]
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_sop",
+            "description": "Busca trechos de SOPs (code, section, snippet).",
+            "parameters": {
+                "type": "object",
+                "required": ["text"],
+                "properties": {
+                    "text": {"type": "string", "description": "Termo de busca"},
+                    "top_k": {"type": "integer", "minimum": 1, "maximum": 20},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_sop",
+            "description": "Le um SOP pelo codigo; com section, so aquela secao.",
+            "parameters": {
+                "type": "object",
+                "required": ["code"],
+                "properties": {
+                    "code": {"type": "string", "description": "Ex: SOP-COMP-001"},
+                    "section": {
+                        "type": "string",
+                        "description": "Secao retornada por search_sop (ex: Procedure)",
+                    },
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "equipment_summary",
+            "description": (
+                "Resumo de status de um equipamento numa janela: eventos por "
+                "severidade, min/max/media, alarmes e ordens em aberto."
+            ),
+            "parameters": {
+                "type": "object",
+                "required": ["tag"],
+                "properties": {
+                    "tag": {"type": "string", "description": "Ex: COMP-01"},
+                    "window": {
+                        "type": "string",
+                        "description": "'<n>h' (ate 168h) ou '<n>d'; padrao 24h",
+                    },
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "run_sql",
+            "description": "Executa SQL read-only (somente SELECT) no banco local.",
+            "parameters": {
+                "type": "object",
+                "required": ["query"],
+                "properties": {
+                    "query": {"type": "string", "description": "SQL SELECT sem ';'"},
+                    "params": {"type": "object"},
+                    "limit": {"type": "integer", "minimum": 1, "maximum": 200},
+                    "paginate": {
+                        "type": "boolean",
+                        "description": "Retorna {rows, next_cursor} para paginar",
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor da pagina anterior",
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": ["rows", "columnar"],
+                        "description": "columnar: {columns, rows} mais compacto",
+                    },
+                },
+            },
+        },
+    },
+]
+
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": (
+        "Você é um assistente de fábrica com acesso a ferramentas.\n"
+        "- Para status/resumo de um equipamento (ex: COMP-01 nas últimas 24h), use equipment_summary.\n"
+        "- Se o usuário pedir para listar/consultar eventos, status, logs, histórico de manutenção, SEMPRE use run_sql.\n"
+        "- Se o usuário pedir SOP, procedimento, instrução, checklist, SEMPRE use search_sop.\n"
+        "- Para o texto completo de uma seção, use get_sop com code e section do resultado.\n"
+        "- Nunca diga que não tem acesso ao banco: você TEM acesso via ferramentas.\n"
+        "- Tabelas SQL disponíveis: equipment, compressor_events, maintenance_log, alarm_history, sop.\n"
+        "- Não existe tabela chamada events. Para eventos, use compressor_events com join em equipment.\n"
+        "- Após usar a ferramenta, responda com um resumo objetivo e cite os campos relevantes."
+    ),
+}
+
+FORCE_TOOL_MESSAGE = {
+    "role": "system",
+    "content": (
+        "Use uma ferramenta agora. "
+        "Nao responda que a consulta nao esta disponivel. "
+        "Se for SOP/procedimento use search_sop. "
+        "Se for evento/log/status/historico use run_sql."
+    ),
+}
+
+
+def parse_tool_args(arguments: Any) -> Dict[str, Any]:
+    if arguments is None:
+        return {}
+    if isinstance(arguments, dict):
+        return arguments
+    if isinstance(arguments, str):
+        try:
+            v = json.loads(arguments)
+            return v if isinstance(v, dict) else {}
+        except Exception:
+            return {}
+    return {}
+
+
+def should_force_tool_retry(intent: Optional[Intent], assistant_text: str) -> bool:
+    assistant = assistant_text.lower()
+
+    refusal_markers = (
+        "nao esta disponivel",
+        "não está disponível",
+        "nao tenho acesso",
+        "não tenho acesso",
+        "nao consigo consultar",
+        "não consigo consultar",
+        "lista de ferramentas",
+        "ferramenta",
+    )
+
+    looks_like_refusal = any(m in assistant for m in refusal_markers)
+    # A weak router match alone does not pay for a second LLM call.
+    likely_tool = (
+        intent is not None
+        and intent.confidence >= settings.INTENT_RETRY_MIN_CONFIDENCE
+    )
+    return likely_tool or looks_like_refusal
+
+
+def is_unhelpful_assistant_text(text: str) -> bool:
+    normalized = text.lower().strip()
+    if not normalized:
+        return True
+
+    refusal_markers = (
+        "nao esta disponivel",
+        "não está disponível",
+        "nao tenho acesso",
+        "não tenho acesso",
+        "nao consigo consultar",
+        "não consigo consultar",
+        "consulta esta bloqueada",
+        "consulta está bloqueada",
+        "query bloqueada",
+    )
+    return any(marker in normalized for marker in refusal_markers)
+
+
+def is_query_blocked_result(tool_result: Any) -> bool:
+    if isinstance(tool_result, dict):
+        error = f"{tool_result.get('error', '')} {tool_result.get('text', '')}".lower()
+        return "query bloqueada" in error or "bloqueada" in error
+
+    if isinstance(tool_result, list):
+        for item in tool_result:
+            if isinstance(item, dict):
+                error = f"{item.get('error', '')} {item.get('text', '')}".lower()
+                if "query bloqueada" in error or "bloqueada" in error:
+                    return True
+    return False
+
+
+def is_missing_table_result(tool_result: Any) -> bool:
+    if isinstance(tool_result, dict):
+        message = f"{tool_result.get('text', '')} {tool_result.get('error', '')}".lower()
+        return "no such table" in message
+
+    if isinstance(tool_result, list):
+        for item in tool_result:
+            if isinstance(item, dict):
+                message = f"{item.get('text', '')} {item.get('error', '')}".lower()
+                if "no such table" in message:
+                    return True
+    return False
+
+
+def render_tool_result(tool_result: Any) -> str:
+    if is_columnar(tool_result):
+        tool_result = columnar_to_records(tool_result)
+    return json.dumps(tool_result, ensure_ascii=False, indent=2)
+
+
+def to_plain_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return value
+
+    model_dump = getattr(value, "model_dump", None)
+    if callable(model_dump):
+        try:
+            dumped = model_dump(exclude_none=True)
+        except TypeError:
+            dumped = model_dump()
+        if isinstance(dumped, dict):
+            return dumped
+
+    as_dict = getattr(value, "__dict__", None)
+    return as_dict if isinstance(as_dict, dict) else {}
+
+
+def ollama_chat(
+    messages: List[Dict[str, Any]], **request_options: Any
+) -> OllamaResponse:
+    resp = chat(
+        model=settings.OLLAMA_MODEL,
+        messages=messages,
+        tools=TOOLS,
+        stream=False,
+        **request_options,
+    )
+    return OllamaResponse.model_validate(to_plain_dict(resp))
+
+
+SUMMARY_PROMPT = (
+    "Resuma a conversa para servir de memoria a um assistente de fabrica. "
+    "Mantenha equipamentos, tags, datas, valores e conclusoes relevantes. "
+    "Responda apenas com o resumo, em ate 10 linhas."
+)
+
+
+async def summarize_history(
+    previous: str,
+    folded: List[Dict[str, Any]],
+    scheduler: Optional[OllamaScheduler] = None,
+) -> str:
+    prompt = [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                f"Resumo atual:\n{previous or '(vazio)'}\n\n"
+                f"Novas mensagens:\n{transcript(folded)}"
+            ),
+        },
+    ]
+    if scheduler is None:
+        resp = await asyncio.to_thread(
+            chat, model=settings.OLLAMA_MODEL, messages=prompt, stream=False
+        )
+    else:
+        async with scheduler.slot(settings.OLLAMA_MODEL, Priority.SUMMARY):
+            resp = await asyncio.to_thread(
+                chat,
+                model=settings.OLLAMA_MODEL,
+                messages=prompt,
+                stream=False,
+                **scheduler.request_options(),
+            )
+    return OllamaResponse.model_validate(to_plain_dict(resp)).message.content
+
+
+async def ollama_chat_stream(
+    client: AsyncClient,
+    messages: List[Dict[str, Any]],
+    metrics: StreamMetrics,
+    *,
+    on_token: Optional[TokenSink] = None,
+    on_tool_call: Optional[Callable[[ToolCall], None]] = None,
+    **request_options: Any,
+) -> OllamaResponse:
+    streamed = await stream_chat(
+        client,
+        settings.OLLAMA_MODEL,
+        messages,
+        TOOLS,
+        on_token=on_token,
+        on_tool_call=on_tool_call,
+        **request_options,
+    )
+    metrics.record(streamed.timing)
+    if on_token is not None and streamed.response.message.content:
+        on_token("\n")
+    return streamed.response
+
+
+async def execute_tool_call(
+    pool: MCPSessionPool,
+    intent: Optional[Intent],
+    tool_name: str,
+    tool_args: Dict[str, Any],
+) -> Any:
+    tool_result = await pool.call_tool(tool_name, tool_args)
+    if tool_name == "run_sql":
+        must_retry_sql = is_query_blocked_result(
+            tool_result
+        ) or is_missing_table_result(tool_result)
+        # Troca o SQL do modelo pelo template do roteador.
+        if (
+            must_retry_sql
+            and intent is not None
+            and intent.tool == "run_sql"
+            and intent.args != tool_args
+        ):
+            tool_result = await pool.call_tool("run_sql", intent.args)
+    return tool_result
+
+
+async def cancel_tasks(tasks: Iterable["asyncio.Task[Any]"]) -> None:
+    """Cancel the tasks still running and collect every outcome."""
+    tasks = list(tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def create_llm_cache() -> Optional[LLMResponseCache]:
+    if not settings.LLM_CACHE:
+        return None
+    return LLMResponseCache(
+        settings.LLM_CACHE_DB or default_cache_path(settings.MEMORY_DB),
+        ttl=settings.LLM_CACHE_TTL,
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    )
+
+
+def create_ollama_scheduler() -> OllamaScheduler:
+    keep_alive: Any = settings.OLLAMA_KEEP_ALIVE.strip() or None
+    try:
+        # "-1" / "3600" are seconds; "30m" stays a duration string.
+        keep_alive = float(keep_alive) if keep_alive is not None else None
+    except ValueError:
+        pass
+    return OllamaScheduler(
+        settings.OLLAMA_MAX_IN_FLIGHT,
+        keep_alive=keep_alive,
+        num_ctx=settings.OLLAMA_NUM_CTX,
+    )
+
+
+@dataclass
+class TurnResult:
+    text: str = ""
+    # True when `text` was already delivered token by token through on_token.
+    streamed: bool = False
+    error: Optional[str] = None
+    intent: Optional[str] = None
+    routed: bool = False
+    tools: List[str] = field(default_factory=list)
+    llm_calls: int = 0
+    cache_hits: int = 0
+    # Time spent waiting for an Ollama slot (see OllamaScheduler).
+    queue_wait_s: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ChatSession:
+    """Messages and context window of one conversation."""
+
+    def __init__(
+        self, conv_id: str, context: ContextWindow, messages: List[Dict[str, Any]]
+    ):
+        self.conv_id = conv_id
+        self.context = context
+        self.messages = messages
+        self.lock = asyncio.Lock()
+        # Turns holding or waiting for the lock; such sessions are not evicted.
+        self.active = 0
+
+
+class ChatEngine:
+    """
+    Turn pipeline shared by the CLI and the chat server: intent router, first
+    LLM call, forced retry, deterministic fallback, tool execution and final
+    answer. One engine serves any number of conversations, which share the
+    MCP session pool, memory store and LLM cache; turns of the
+    same conversation run one at a time. Up to `max_sessions` conversations
+    are kept in memory, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        pool: MCPSessionPool,
+        store: ChatMemoryStore,
+        *,
+        cache: Optional[LLMResponseCache] = None,
+        stream_client: Optional[AsyncClient] = None,
+        scheduler: Optional[OllamaScheduler] = None,
+        max_sessions: int = 256,
+    ):
+        self.pool = pool
+        self.store = store
+        self.cache = cache
+        self.stream_client = stream_client
+        self.stream_metrics = StreamMetrics()
+        self.scheduler = scheduler or create_ollama_scheduler()
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._background: Set["asyncio.Future[None]"] = set()
+        self.turns = 0
+        self.routed_turns = 0
+        self.llm_calls = 0
+        self.errors = 0
+
+    @property
+    def streaming(self) -> bool:
+        return self.stream_client is not None
+
+    async def create_conversation(self, title: str = "Chat") -> str:
+        conv_id = str(uuid.uuid4())
+        await asyncio.to_thread(self.store.create_conversation, conv_id, title)
+        return conv_id
+
+    def _load_session(self, conv_id: str) -> ChatSession:
+        context = ContextWindow(
+            self.store,
+            conv_id,
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            keep_turns=settings.CONTEXT_KEEP_TURNS,
+            summarizer=functools.partial(summarize_history, scheduler=self.scheduler),
+        )
+        return ChatSession(conv_id, context, [SYSTEM_MESSAGE] + context.load_history())
+
+    async def session(self, conv_id: str) -> ChatSession:
+        session = self._sessions.get(conv_id)
+        if session is None:
+            # Summary and history reads (and a store flush) run off the loop.
+            loaded = await asyncio.to_thread(self._load_session, conv_id)
+            # Another turn of the same conversation may have loaded it meanwhile.
+            session = self._sessions.get(conv_id)
+            if session is None:
+                session = self._sessions[conv_id] = loaded
+                self._evict()
+                return session
+        self._sessions.move_to_end(conv_id)
+        return session
+
+    async def _append(self, conv_id: str, role: str, content: str) -> None:
+        if self.store.write_behind:
+            # Only queued; the store's writer thread commits it.
+            self.store.append_message(conv_id, role, content)
+        else:
+            await asyncio.to_thread(self.store.append_message, conv_id, role, content)
+
+    def _evict(self) -> None:
+        for conv_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                return
+            session = self._sessions[conv_id]
+            if session.active:
+                continue
+            del self._sessions[conv_id]
+            # A summary may still be running; close() waits for it.
+            pending = asyncio.ensure_future(session.context.wait())
+            self._background.add(pending)
+            pending.add_done_callback(self._background.discard)
+
+    async def turn(
+        self, conv_id: str, user_text: str, on_token: Optional[TokenSink] = None
+    ) -> TurnResult:
+        """
+        Run one user turn. With streaming on, model text is handed to
+        `on_token` as it arrives (each completion ends with "\\n").
+        """
+        session = await self.session(conv_id)
+        session.active += 1
+        result = TurnResult()
+        try:
+            async with session.lock:
+                self.turns += 1
+                await self._turn(session, user_text, on_token, result)
+        except Exception as e:
+            # MCP/Ollama connection errors end this turn, not the caller.
+            logger.exception("turn failed (conversation %s)", conv_id)
+            result.text = f"Erro ao processar a mensagem: {e}"
+            result.streamed = False
+            result.error = f"{type(e).__name__}: {e}"
+        finally:
+            session.active -= 1
+        if result.routed:
+            self.routed_turns += 1
+        if result.error:
+            self.errors += 1
+        return result
+
+    async def _llm(
+        self,
+        result: TurnResult,
+        call_messages: List[Dict[str, Any]],
+        *,
+        priority: Priority,
+        on_token: Optional[TokenSink] = None,
+        on_tool_call: Optional[Callable[[ToolCall], None]] = None,
+    ) -> OllamaResponse:
+        key = None
+        if self.cache is not None:
+            key = cache_key(settings.OLLAMA_MODEL, call_messages, TOOLS)
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                result.cache_hits += 1
+                response = OllamaResponse.model_validate_json(cached)
+                # tool_calls em cache sao executadas depois, fora do stream.
+                if on_token is not None and response.message.content:
+                    on_token(response.message.content + "\n")
+                return response
+
+        result.llm_calls += 1
+        self.llm_calls += 1
+        request_options = self.scheduler.request_options()
+        async with self.scheduler.slot(settings.OLLAMA_MODEL, priority) as ticket:
+            result.queue_wait_s = round(result.queue_wait_s + ticket.wait_s, 4)
+            if self.stream_client is None:
+                response = await asyncio.to_thread(
+                    ollama_chat, call_messages, **request_options
+                )
+            else:
+                response = await ollama_chat_stream(
+                    self.stream_client,
+                    call_messages,
+                    self.stream_metrics,
+                    on_token=on_token,
+                    on_tool_call=on_tool_call,
+                    **request_options,
+                )
+
+        if key is not None and (
+            response.message.tool_calls
+            or not is_unhelpful_assistant_text(response.message.content)
+        ):
+            await asyncio.to_thread(
+                self.cache.put, key, settings.OLLAMA_MODEL, response.model_dump_json()
+            )
+        return response
+
+    async def _turn(
+        self,
+        session: ChatSession,
+        user_text: str,
+        on_token: Optional[TokenSink],
+        result: TurnResult,
+    ) -> TurnResult:
+        conv_id = session.conv_id
+        context = session.context
+        messages = session.messages
+        # Em modo streaming o texto do modelo ja foi entregue token a token.
+        echo = on_token if self.streaming else None
+
+        def finish(
+            text: str, streamed: bool = False, error: Optional[str] = None
+        ) -> TurnResult:
+            result.text = text
+            result.streamed = streamed and echo is not None
+            result.error = error
+            return result
+
+        async def llm(
+            call_messages: List[Dict[str, Any]],
+            priority: Priority,
+            *,
+            echo_tokens: bool = False,
+            on_tool_call: Optional[Callable[[ToolCall], None]] = None,
+        ) -> OllamaResponse:
+            return await self._llm(
+                result,
+                call_messages,
+                priority=priority,
+                on_token=echo if echo_tokens else None,
+                on_tool_call=on_tool_call,
+            )
+
+        async def answer_from_tool(tool_name: str, tool_result: Any) -> TurnResult:
+            messages.append(to_tool_payload(tool_name, tool_result))
+            await self._append(
+                conv_id,
+                "tool",
+                f"{tool_name}: {dump_tool_result(tool_result)}",
+            )
+
+            try:
+                final = await llm(
+                    context.build(messages), Priority.FINAL, echo_tokens=True
+                )
+                final_msg = final.message
+                if not is_unhelpful_assistant_text(final_msg.content):
+                    messages.append(
+                        {"role": final_msg.role, "content": final_msg.content}
+                    )
+                    await self._append(conv_id, "assistant", final_msg.content)
+                    return finish(final_msg.content, streamed=True)
+            except ResponseError:
+                pass
+            except ValidationError:
+                pass
+
+            return finish(render_tool_result(tool_result))
+
+        # 1) user -> contexto + persistência (turnos antigos viram resumo)
+        context.compact(messages)
+        messages.append({"role": "user", "content": user_text})
+        await self._append(conv_id, "user", user_text)
+        intent = route(user_text)
+        result.intent = intent.name if intent is not None else None
+
+        # 2) intenção clara: chama a tool direto, só uma chamada ao LLM
+        if (
+            intent is not None
+            and intent.confidence >= settings.INTENT_ROUTER_MIN_CONFIDENCE
+        ):
+            result.routed = True
+            result.tools.append(intent.tool)
+            tool_result = await execute_tool_call(
+                self.pool, intent, intent.tool, intent.args
+            )
+            return await answer_from_tool(intent.tool, tool_result)
+
+        # 3) 1ª chamada (em streaming, tools começam a executar
+        # assim que cada tool_call chega)
+        def start_tool(tasks: List[EarlyTool]) -> Callable[[ToolCall], None]:
+            def _start(tc: ToolCall) -> None:
+                call = (tc.function.name, parse_tool_args(tc.function.arguments))
+                task = asyncio.create_task(
+                    execute_tool_call(self.pool, intent, *call)
+                )
+                tasks.append((call, task))
+
+            return _start
+
+        first_tasks: List[EarlyTool] = []
+        forced_tasks: List[EarlyTool] = []
+        try:
+            try:
+                first = await llm(
+                    context.build(messages),
+                    Priority.FIRST,
+                    echo_tokens=True,
+                    on_tool_call=start_tool(first_tasks),
+                )
+            except ResponseError as e:
+                return finish(f"Ollama error: {e}", error=str(e))
+            except ValidationError as e:
+                return finish(f"Ollama response parse error: {e}", error=str(e))
+
+            assistant_msg = first.message
+            early_tasks = first_tasks
+
+            if not assistant_msg.tool_calls and should_force_tool_retry(
+                intent, assistant_msg.content
+            ):
+                forced_messages = context.build(messages) + [FORCE_TOOL_MESSAGE]
+                try:
+                    forced = await llm(
+                        forced_messages,
+                        Priority.RETRY,
+                        on_tool_call=start_tool(forced_tasks),
+                    )
+                except ResponseError:
+                    forced = None
+                except ValidationError:
+                    forced = None
+
+                if forced and forced.message.tool_calls:
+                    assistant_msg = forced.message
+                    early_tasks = forced_tasks
+
+            messages.append(
+                {"role": assistant_msg.role, "content": assistant_msg.content}
+            )
+            await self._append(conv_id, "assistant", assistant_msg.content)
+
+            # 4) se não tem tool_calls, usa a intenção do roteador
+            if not assistant_msg.tool_calls:
+                if intent is not None:
+                    result.tools.append(intent.tool)
+                    tool_result = await execute_tool_call(
+                        self.pool, intent, intent.tool, intent.args
+                    )
+                    return await answer_from_tool(intent.tool, tool_result)
+
+                return finish(assistant_msg.content, streamed=True)
+
+            # 5) executa tools (em paralelo, resultados na ordem original);
+            # as que já começaram no stream são reaproveitadas pela posição
+            calls = [
+                (tc.function.name, parse_tool_args(tc.function.arguments))
+                for tc in assistant_msg.tool_calls
+            ]
+            pending: List[Awaitable[Any]] = []
+            for index, call in enumerate(calls):
+                if index < len(early_tasks) and early_tasks[index][0] == call:
+                    pending.append(early_tasks[index][1])
+                else:
+                    pending.append(execute_tool_call(self.pool, intent, *call))
+            results = await asyncio.gather(*pending)
+        finally:
+            # Tools started for an answer that was dropped or failed.
+            await cancel_tasks(task for _, task in first_tasks + forced_tasks)
+
+        tool_results: List[Any] = []
+        for (tool_name, _), tool_result in zip(calls, results):
+            result.tools.append(tool_name)
+            tool_results.append(tool_result)
+            messages.append(to_tool_payload(tool_name, tool_result))
+            await self._append(
+                conv_id,
+                "tool",
+                f"{tool_name}: {dump_tool_result(tool_result)}",
+            )
+
+        # 6) 2ª chamada final
+        try:
+            final = await llm(
+                context.build(messages), Priority.FINAL, echo_tokens=True
+            )
+        except ResponseError as e:
+            return finish(f"Ollama error: {e}", error=str(e))
+        except ValidationError as e:
+            return finish(f"Ollama response parse error: {e}", error=str(e))
+
+        final_msg = final.message
+        messages.append({"role": final_msg.role, "content": final_msg.content})
+        await self._append(conv_id, "assistant", final_msg.content)
+
+        if not is_unhelpful_assistant_text(final_msg.content):
+            return finish(final_msg.content, streamed=True)
+        if tool_results:
+            return finish(render_tool_result(tool_results[-1]))
+        return finish(final_msg.content, streamed=True)
+
+    async def close(self) -> None:
+        """Wait for background summaries of every conversation."""
+        await asyncio.gather(
+            *(session.context.wait() for session in self._sessions.values()),
+            *self._background,
+            return_exceptions=True,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "sessions": len(self._sessions),
+            "active_turns": sum(s.active for s in self._sessions.values()),
+            "turns": self.turns,
+            "routed_turns": self.routed_turns,
+            "llm_calls": self.llm_calls,
+            "errors": self.errors,
+            "mcp_pool": self.pool.stats(),
+            "ollama_scheduler": self.scheduler.stats(),
+        }
+        if self.cache is not None:
+            stats["llm_cache"] = self.cache.stats()
+        if self.streaming:
+            stats["stream"] = self.stream_metrics.summary()
+        return stats
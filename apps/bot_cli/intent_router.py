@@ -0,0 +1,377 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+# Scores are additive: the best trigger of an intent, plus bonuses for an
+# action verb and for the entity it needs, minus penalties for questions a
+# fixed template cannot answer. Confidence is the clipped score.
+VERB_BONUS = 0.2
+ENTITY_BONUS = 0.2
+ANALYTICAL_PENALTY = 0.4
+AMBIGUITY_MARGIN = 0.15
+AMBIGUITY_PENALTY = 0.2
+LONG_MESSAGE_WORDS = 25
+LONG_MESSAGE_PENALTY = 0.2
+DEFAULT_LIMIT = 20
+DEFAULT_WINDOW = "24h"
+
+_SOP_CODE_RE = re.compile(r"\bsop-[a-z0-9]+-\d+\b")
+_TAG_RE = re.compile(r"\b([a-z]+-\d+)\b")
+_WINDOW_RE = re.compile(r"\b(\d+)\s*(h|hr|hrs|horas?|d|dias?)\b")
+_WINDOW_WORDS: Tuple[Tuple[Pattern[str], str], ...] = (
+    (re.compile(r"\bhoje\b|\bultimo dia\b"), "24h"),
+    (re.compile(r"\bsemana\b"), "7d"),
+    (re.compile(r"\bmes\b"), "30d"),
+)
+_VERB_RE = re.compile(
+    r"\b(list\w*|most\w*|exib\w*|ver|veja|quais|qual|consult\w*|busca\w*|traga)\b"
+)
+_ANALYTICAL_RE = re.compile(
+    r"\b(por que|porque|explique|expliq\w*|compar\w*|tendencia|previs\w*|"
+    r"recomend\w*|analis\w*|quantos|quantas|media|total|soma|maior|menor|"
+    r"maximo|minimo|devo|deveria|significa)\b"
+)
+_SEVERITY_WORDS: Tuple[Tuple[Pattern[str], str], ...] = (
+    (re.compile(r"\bcritic\w*"), "critical"),
+    (re.compile(r"\b(warning|alerta\w*|aviso\w*)\b"), "warning"),
+)
+_OPEN_RE = re.compile(r"\b(abert\w*|ativ\w*|pendente\w*|em andamento)\b")
+_SECTIONS: Tuple[Tuple[Pattern[str], str], ...] = (
+    (re.compile(r"\b(seguranca|safety|epi)\b"), "Safety"),
+    (re.compile(r"\b(passo a passo|etapas|procedure)\b"), "Procedure"),
+    (re.compile(r"\b(registros?|records?)\b"), "Records"),
+)
+
+_EVENT_COLUMNS = """
+    SELECT
+        ce.id,
+        e.tag,
+        ce.event_ts,
+        ce.event_type,
+        ce.severity,
+        ce.value,
+        ce.unit,
+        ce.description
+    FROM compressor_events ce
+    JOIN equipment e ON e.id = ce.equipment_id
+"""
+_ALARM_COLUMNS = """
+    SELECT
+        ah.id,
+        e.tag,
+        ah.alarm_code,
+        ah.severity,
+        ah.started_at,
+        ah.ended_at,
+        ah.acknowledged_by,
+        ah.note
+    FROM alarm_history ah
+    JOIN equipment e ON e.id = ah.equipment_id
+"""
+_MAINTENANCE_COLUMNS = """
+    SELECT
+        ml.id,
+        e.tag,
+        ml.work_order,
+        ml.event_ts,
+        ml.status,
+        ml.technician,
+        ml.note
+    FROM maintenance_log ml
+    JOIN equipment e ON e.id = ml.equipment_id
+"""
+_EQUIPMENT_LIST = """
+    SELECT tag, equipment_type, area, line, status
+    FROM equipment
+    ORDER BY tag
+"""
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    tool: str
+    args: Dict[str, Any]
+    confidence: float
+
+
+@dataclass(frozen=True)
+class Entities:
+    text: str
+    normalized: str
+    tag: Optional[str]
+    sop_code: Optional[str]
+    # Only set when the message names a window ("12h", "3 dias", "semana").
+    window: Optional[str]
+    # Start of that window, ISO seconds like the stored timestamps.
+    since: Optional[str]
+    severity: Optional[str]
+    open_only: bool
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    name: str
+    # (pattern, weight); the best matching weight is the base score.
+    triggers: Tuple[Tuple[Pattern[str], float], ...]
+    build: Callable[[Entities], Tuple[str, Dict[str, Any]]]
+    entity: Optional[Callable[[Entities], bool]] = None
+    requires_entity: bool = False
+
+    def score(self, entities: Entities) -> float:
+        matched = [
+            weight
+            for pattern, weight in self.triggers
+            if pattern.search(entities.normalized)
+        ]
+        if not matched:
+            return 0.0
+        has_entity = self.entity is not None and self.entity(entities)
+        if self.requires_entity and not has_entity:
+            return 0.0
+        score = max(matched)
+        if _VERB_RE.search(entities.normalized):
+            score += VERB_BONUS
+        if has_entity:
+            score += ENTITY_BONUS
+        return score
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def window_start(window: str, now: datetime) -> str:
+    size, unit = int(window[:-1]), window[-1]
+    delta = timedelta(hours=size) if unit == "h" else timedelta(days=size)
+    return (now - delta).isoformat(timespec="seconds")
+
+
+def extract_entities(text: str, now: Optional[datetime] = None) -> Entities:
+    normalized = normalize(text)
+    sop_match = _SOP_CODE_RE.search(normalized)
+    # SOP codes contain something that looks like a tag (SOP-COMP-001).
+    without_sop = _SOP_CODE_RE.sub(" ", normalized)
+    tag_match = _TAG_RE.search(without_sop)
+
+    window: Optional[str] = None
+    window_match = _WINDOW_RE.search(_TAG_RE.sub(" ", without_sop))
+    if window_match:
+        window = f"{window_match.group(1)}{window_match.group(2)[0]}"
+    else:
+        for pattern, value in _WINDOW_WORDS:
+            if pattern.search(normalized):
+                window = value
+                break
+
+    severity = next(
+        (value for pattern, value in _SEVERITY_WORDS if pattern.search(normalized)),
+        None,
+    )
+    return Entities(
+        text=text,
+        normalized=normalized,
+        tag=tag_match.group(1).upper() if tag_match else None,
+        sop_code=sop_match.group(0).upper() if sop_match else None,
+        window=window,
+        since=window_start(window, now or datetime.now()) if window else None,
+        severity=severity,
+        open_only=bool(_OPEN_RE.search(normalized)),
+    )
+
+
+def _select(
+    columns: str,
+    alias: str,
+    order_by: str,
+    entities: Entities,
+    extra: Optional[str] = None,
+) -> Dict[str, Any]:
+    where: List[str] = []
+    params: Dict[str, Any] = {}
+    if entities.tag:
+        where.append("UPPER(e.tag) = :tag")
+        params["tag"] = entities.tag
+    if entities.since:
+        where.append(f"{order_by} >= :since")
+        params["since"] = entities.since
+    if entities.severity:
+        where.append(f"{alias}.severity = :severity")
+        params["severity"] = entities.severity
+    if extra:
+        where.append(extra)
+
+    query = columns
+    if where:
+        query += "    WHERE " + "\n      AND ".join(where) + "\n"
+    query += f"    ORDER BY {order_by} DESC\n"
+
+    args: Dict[str, Any] = {
+        "query": query,
+        "limit": DEFAULT_LIMIT,
+        "format": "columnar",
+    }
+    if params:
+        args["params"] = params
+    return args
+
+
+def _events(entities: Entities) -> Tuple[str, Dict[str, Any]]:
+    return "run_sql", _select(_EVENT_COLUMNS, "ce", "ce.event_ts", entities)
+
+
+def _alarms(entities: Entities) -> Tuple[str, Dict[str, Any]]:
+    extra = "ah.ended_at IS NULL" if entities.open_only else None
+    return "run_sql", _select(
+        _ALARM_COLUMNS, "ah", "ah.started_at", entities, extra
+    )
+
+
+def _maintenance(entities: Entities) -> Tuple[str, Dict[str, Any]]:
+    # maintenance_log has no severity column.
+    entities = replace(entities, severity=None)
+    extra = "ml.status != 'closed'" if entities.open_only else None
+    return "run_sql", _select(
+        _MAINTENANCE_COLUMNS, "ml", "ml.event_ts", entities, extra
+    )
+
+
+def _equipment_summary(entities: Entities) -> Tuple[str, Dict[str, Any]]:
+    return "equipment_summary", {
+        "tag": entities.tag,
+        "window": entities.window or DEFAULT_WINDOW,
+    }
+
+
+def _equipment_list(entities: Entities) -> Tuple[str, Dict[str, Any]]:
+    return "run_sql", {"query": _EQUIPMENT_LIST, "limit": 200, "format": "columnar"}
+
+
+def _get_sop(entities: Entities) -> Tuple[str, Dict[str, Any]]:
+    args: Dict[str, Any] = {"code": entities.sop_code}
+    for pattern, section in _SECTIONS:
+        if pattern.search(entities.normalized):
+            args["section"] = section
+            break
+    return "get_sop", args
+
+
+def _search_sop(entities: Entities) -> Tuple[str, Dict[str, Any]]:
+    return "search_sop", {"text": entities.text, "top_k": 5}
+
+
+def _has_tag(entities: Entities) -> bool:
+    return entities.tag is not None
+
+
+def _has_sop_code(entities: Entities) -> bool:
+    return entities.sop_code is not None
+
+
+def _p(pattern: str) -> Pattern[str]:
+    return re.compile(pattern)
+
+
+RULES: Tuple[IntentRule, ...] = (
+    IntentRule(
+        "get_sop",
+        ((_SOP_CODE_RE, 0.8),),
+        _get_sop,
+        entity=_has_sop_code,
+        requires_entity=True,
+    ),
+    IntentRule(
+        "search_sop",
+        (
+            # Not the "sop" of a code like SOP-COMP-001 (get_sop above).
+            (_p(r"\b(sops?|procedimentos?|checklists?)\b(?!-)"), 0.8),
+            (_p(r"\binstruc\w*|\bpasso a passo\b"), 0.6),
+            (_p(r"\bcomo (fazer|realizar|executar|proceder)\b"), 0.5),
+        ),
+        _search_sop,
+    ),
+    IntentRule(
+        "equipment_summary",
+        (
+            (_p(r"\b(status|resumo|situacao|estado)\b"), 0.6),
+            (_p(r"\bcomo (esta|estao|anda)\b"), 0.6),
+        ),
+        _equipment_summary,
+        entity=_has_tag,
+        requires_entity=True,
+    ),
+    IntentRule(
+        "equipment_list",
+        (
+            (_p(r"\b(status|situacao|estado)\b.*\bequipamentos\b"), 0.6),
+            (_p(r"\bequipamentos\b"), 0.4),
+        ),
+        _equipment_list,
+    ),
+    IntentRule(
+        "alarms",
+        ((_p(r"\balarm\w*"), 0.6),),
+        _alarms,
+        entity=_has_tag,
+    ),
+    IntentRule(
+        "maintenance",
+        (
+            (_p(r"\bmanuten\w*"), 0.6),
+            (_p(r"\b(ordens? de servico|work orders?)\b"), 0.6),
+            (_p(r"\btecnic\w*"), 0.3),
+        ),
+        _maintenance,
+        entity=_has_tag,
+    ),
+    IntentRule(
+        "events",
+        (
+            (_p(r"\bevent\w*"), 0.6),
+            (_p(r"\b(logs?|leituras?)\b"), 0.5),
+            (_p(r"\bhistorico\b"), 0.4),
+            (_p(r"\b(compressor\w*|banco|sql|consulta\w*|listar)\b"), 0.3),
+        ),
+        _events,
+        entity=_has_tag,
+    ),
+)
+
+
+def route(user_text: str, now: Optional[datetime] = None) -> Optional[Intent]:
+    """
+    Map a user message to one tool call. Returns None when nothing matches;
+    callers decide by confidence whether to call the tool before asking the
+    LLM. A window in the message bounds the run_sql templates to rows since
+    `now` minus that window.
+    """
+    entities = extract_entities(user_text, now)
+    scored = sorted(
+        ((rule.score(entities), index, rule) for index, rule in enumerate(RULES)),
+        key=lambda item: (-item[0], item[1]),
+    )
+    best_score, _, best = scored[0]
+    if best_score <= 0.0:
+        return None
+
+    confidence = best_score
+    runner_up = scored[1][0] if len(scored) > 1 else 0.0
+    if runner_up > 0.0 and best_score - runner_up < AMBIGUITY_MARGIN:
+        confidence -= AMBIGUITY_PENALTY
+    if _ANALYTICAL_RE.search(entities.normalized):
+        confidence -= ANALYTICAL_PENALTY
+    if len(entities.normalized.split()) > LONG_MESSAGE_WORDS:
+        confidence -= LONG_MESSAGE_PENALTY
+
+    tool, args = best.build(entities)
+    return Intent(
+        name=best.name,
+        tool=tool,
+        args=args,
+        confidence=round(min(1.0, max(0.0, confidence)), 2),
+    )
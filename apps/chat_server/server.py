@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from ollama import AsyncClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from apps.bot_cli.engine import ChatEngine, create_llm_cache
+from infra.mcp_client import MCPSessionPool
+from infra.settings import settings
+from persistence.memory_store import ChatMemoryStore
+
+_STARTED_AT = time.monotonic()
+MAX_CONVERSATIONS_LIMIT = 200
+MAX_MESSAGES_LIMIT = 500
+
+
+def _engine(request: Any) -> ChatEngine:
+    return request.app.state.engine
+
+
+def _error(message: str, code: str, status_code: int) -> JSONResponse:
+    return JSONResponse({"error": message, "code": code}, status_code=status_code)
+
+
+def _limit(request: Request, default: int, maximum: int) -> Optional[int]:
+    """`?limit=` clamped to [1, maximum]; None when it is not an integer."""
+    raw = request.query_params.get("limit")
+    if raw is None:
+        return default
+    try:
+        return min(max(int(raw), 1), maximum)
+    except ValueError:
+        return None
+
+
+async def _user_text(request: Request) -> Optional[str]:
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    text = body.get("text") if isinstance(body, dict) else None
+    return text.strip() if isinstance(text, str) and text.strip() else None
+
+
+async def healthz(request: Request) -> JSONResponse:
+    # The LLM cache stats query its SQLite file.
+    stats = await asyncio.to_thread(_engine(request).stats)
+    return JSONResponse(
+        {
+            "status": "ok",
+            "pid": os.getpid(),
+            "uptime_s": round(time.monotonic() - _STARTED_AT, 1),
+            **stats,
+        }
+    )
+
+
+async def list_conversations(request: Request) -> JSONResponse:
+    limit = _limit(request, 20, MAX_CONVERSATIONS_LIMIT)
+    if limit is None:
+        return _error("Parametro limit invalido", "invalid_request", 400)
+    store = _engine(request).store
+    return JSONResponse(await asyncio.to_thread(store.list_conversations, limit))
+
+
+async def create_conversation(request: Request) -> JSONResponse:
+    try:
+        body = await request.json()
+    except ValueError:
+        body = {}
+    title = body.get("title") if isinstance(body, dict) else None
+    conv_id = await _engine(request).create_conversation(title=str(title or "Chat"))
+    return JSONResponse({"id": conv_id}, status_code=201)
+
+
+async def list_messages(request: Request) -> JSONResponse:
+    conv_id = request.path_params["conv_id"]
+    limit = _limit(request, 50, MAX_MESSAGES_LIMIT)
+    if limit is None:
+        return _error("Parametro limit invalido", "invalid_request", 400)
+    store = _engine(request).store
+    rows = await asyncio.to_thread(store.load_messages, conv_id, limit)
+    return JSONResponse(
+        [{"role": row.role, "content": row.content, "ts": row.ts} for row in rows]
+    )
+
+
+async def post_message(request: Request) -> JSONResponse:
+    text = await _user_text(request)
+    if text is None:
+        return _error("Campo text obrigatorio", "invalid_request", 400)
+    result = await _engine(request).turn(request.path_params["conv_id"], text)
+    # Ollama/MCP failures come back as a TurnResult with `error` set.
+    return JSONResponse(result.as_dict(), status_code=502 if result.error else 200)
+
+
+async def chat_socket(websocket: WebSocket) -> None:
+    """
+    One conversation per socket. Client sends {"text": ...}; with streaming on
+    the server sends {"type": "token", "text": ...} as the model writes, then
+    {"type": "answer", ...TurnResult}. A failed turn is sent as
+    {"type": "error", ...} and the socket stays open for the next message.
+    """
+    engine = _engine(websocket)
+    conv_id = websocket.path_params["conv_id"]
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except (KeyError, ValueError):
+                # Binary (no "text" key) or non-JSON frame.
+                data = None
+            text = data.get("text") if isinstance(data, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "error": "Campo text obrigatorio",
+                        "code": "invalid_request",
+                    }
+                )
+                continue
+
+            tokens: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+            async def forward() -> None:
+                while (token := await tokens.get()) is not None:
+                    await websocket.send_json({"type": "token", "text": token})
+
+            forwarder = asyncio.create_task(forward())
+            try:
+                result = await engine.turn(
+                    conv_id, text.strip(), on_token=tokens.put_nowait
+                )
+                reply = result.as_dict()
+            except Exception as e:
+                reply = {"error": f"{type(e).__name__}: {e}"}
+            finally:
+                tokens.put_nowait(None)
+                await forwarder
+            if reply["error"]:
+                await websocket.send_json(
+                    {"type": "error", "code": "turn_failed", **reply}
+                )
+            else:
+                await websocket.send_json({"type": "answer", **reply})
+    except WebSocketDisconnect:
+        pass
+
+
+def create_app() -> Starlette:
+    """
+    Chat front end for many operators: one MCP session pool, memory store,
+    LLM cache and ChatEngine shared by every conversation.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        store = ChatMemoryStore(
+            settings.MEMORY_DB,
+            write_behind=settings.MEMORY_WRITE_BEHIND,
+            profile=settings.MEMORY_ENGINE_PROFILE,
+        )
+        cache = create_llm_cache()
+        stream_client = AsyncClient() if settings.OLLAMA_STREAM else None
+        try:
+            async with MCPSessionPool(
+                settings.MCP_URL,
+                size=settings.MCP_POOL_SIZE,
+                max_concurrency=settings.MCP_TOOL_CONCURRENCY,
+                keepalive_interval=settings.MCP_KEEPALIVE_INTERVAL,
+            ) as pool:
+                app.state.engine = ChatEngine(
+                    pool,
+                    store,
+                    cache=cache,
+                    stream_client=stream_client,
+                    max_sessions=settings.CHAT_MAX_SESSIONS,
+                )
+                try:
+                    yield
+                finally:
+                    await app.state.engine.close()
+        finally:
+            store.close()
+            if cache is not None:
+                cache.close()
+
+    return Starlette(
+        routes=[
+            Route("/healthz", healthz, methods=["GET"]),
+            Route("/conversations", list_conversations, methods=["GET"]),
+            Route("/conversations", create_conversation, methods=["POST"]),
+            Route("/conversations/{conv_id}/messages", list_messages, methods=["GET"]),
+            Route("/conversations/{conv_id}/messages", post_message, methods=["POST"]),
+            WebSocketRoute("/conversations/{conv_id}/ws", chat_socket),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    uvicorn.run(create_app(), host=settings.CHAT_HOST, port=settings.CHAT_PORT)
+
+
+if __name__ == "__main__":
+    main()
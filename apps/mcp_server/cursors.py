@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from apps.mcp_server.query_budget import QueryBudget
+
+
+@dataclass
+class HeldCursor:
+    connection: Any
+    cursor: Any
+    columns: List[str]
+    expires_at: float
+    buffer: List[Tuple[Any, ...]] = field(default_factory=list)
+    exhausted: bool = False
+    rows_served: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def close(self) -> None:
+        try:
+            self.cursor.close()
+        finally:
+            # Returns the DBAPI connection to the engine pool.
+            self.connection.close()
+
+
+class CursorNotFound(LookupError):
+    pass
+
+
+class CursorRegistry:
+    """
+    Server-side cursors for paginated run_sql. Each open cursor holds one
+    pooled connection and at most one lookahead row, so memory per cursor is
+    bounded by the page size regardless of the result set size.
+    """
+
+    def __init__(
+        self,
+        max_open: int = 8,
+        ttl_seconds: float = 120.0,
+        budget: Optional[QueryBudget] = None,
+    ):
+        self.max_open = max_open
+        self.ttl_seconds = ttl_seconds
+        self.budget = budget or QueryBudget(max_seconds=0)
+        self._cursors: Dict[str, HeldCursor] = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def open(self, connection: Any, cursor: Any) -> str:
+        columns = [d[0] for d in cursor.description or ()]
+        held = HeldCursor(
+            connection=connection,
+            cursor=cursor,
+            columns=columns,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        token = secrets.token_urlsafe(18)
+        to_close: List[HeldCursor] = self._reap()
+        with self._lock:
+            while len(self._cursors) >= self.max_open:
+                oldest = min(self._cursors, key=lambda k: self._cursors[k].expires_at)
+                to_close.append(self._cursors.pop(oldest))
+                self.evicted += 1
+            self._cursors[token] = held
+            self.opened += 1
+        for stale in to_close:
+            stale.close()
+        return token
+
+    def fetch_page(
+        self, token: str, page_size: int
+    ) -> Tuple[List[str], List[Tuple[Any, ...]], Optional[str]]:
+        """Return (columns, rows, next_token); next_token is None when done."""
+        for stale in self._reap():
+            stale.close()
+        with self._lock:
+            held = self._cursors.get(token)
+        if held is None:
+            raise CursorNotFound(token)
+
+        with held.lock, self.budget.guard(held.connection.dbapi_connection):
+            rows = held.buffer[:page_size]
+            held.buffer = held.buffer[page_size:]
+            if len(rows) < page_size and not held.exhausted:
+                rows.extend(held.cursor.fetchmany(page_size - len(rows)))
+            if not held.buffer and not held.exhausted:
+                lookahead = held.cursor.fetchone()
+                if lookahead is None:
+                    held.exhausted = True
+                else:
+                    held.buffer.append(lookahead)
+            held.rows_served += len(rows)
+            held.expires_at = time.monotonic() + self.ttl_seconds
+            done = held.exhausted and not held.buffer
+
+        if done:
+            self.close(token)
+            return held.columns, rows, None
+        return held.columns, rows, token
+
+    def close(self, token: str) -> None:
+        with self._lock:
+            held = self._cursors.pop(token, None)
+        if held is not None:
+            held.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            held_cursors = list(self._cursors.values())
+            self._cursors.clear()
+        for held in held_cursors:
+            held.close()
+
+    def _reap(self) -> List[HeldCursor]:
+        now = time.monotonic()
+        with self._lock:
+            stale = [k for k, v in self._cursors.items() if v.expires_at <= now]
+            self.expired += len(stale)
+            return [self._cursors.pop(k) for k in stale]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open": len(self._cursors),
+                "max_open": self.max_open,
+                "ttl_seconds": self.ttl_seconds,
+                "opened": self.opened,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
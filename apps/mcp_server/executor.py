@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _ToolCounters:
+    limit: int
+    running: int = 0
+    waiting: int = 0
+    max_waiting: int = 0
+    completed: int = 0
+    failed: int = 0
+    wait_seconds: float = 0.0
+
+
+class ToolExecutor:
+    """
+    Runs blocking tool bodies on a bounded thread pool so the FastMCP event
+    loop keeps serving other requests. Each tool also has its own concurrency
+    limit; calls over the limit wait on the event loop (counted as queue
+    depth) instead of occupying a worker thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        limits: Optional[Dict[str, int]] = None,
+        default_limit: Optional[int] = None,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.default_limit = max(1, default_limit or self.max_workers)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="mcp-db"
+        )
+        self._counters: Dict[str, _ToolCounters] = {
+            name: _ToolCounters(limit=max(1, limit))
+            for name, limit in (limits or {}).items()
+        }
+        self._lock = threading.Lock()
+        self._active = 0
+        # asyncio primitives belong to one event loop; tests and benchmarks
+        # may drive the server from several.
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+    def _tool(self, name: str) -> _ToolCounters:
+        with self._lock:
+            counters = self._counters.get(name)
+            if counters is None:
+                counters = self._counters[name] = _ToolCounters(self.default_limit)
+            return counters
+
+    def _semaphore(self, name: str, limit: int) -> asyncio.Semaphore:
+        per_loop = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        semaphore = per_loop.get(name)
+        if semaphore is None:
+            semaphore = per_loop[name] = asyncio.Semaphore(limit)
+        return semaphore
+
+    def _call(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            self._active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    async def run(self, tool: str, fn: Callable[..., T], *args: Any) -> T:
+        counters = self._tool(tool)
+        semaphore = self._semaphore(tool, counters.limit)
+        enqueued = time.perf_counter()
+        acquired = False
+        with self._lock:
+            counters.waiting += 1
+            if semaphore.locked():
+                counters.max_waiting = max(counters.max_waiting, counters.waiting)
+
+        try:
+            async with semaphore:
+                acquired = True
+                with self._lock:
+                    counters.waiting -= 1
+                    counters.running += 1
+                    counters.wait_seconds += time.perf_counter() - enqueued
+                try:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(
+                        self._pool, self._call, fn, *args
+                    )
+                finally:
+                    with self._lock:
+                        counters.running -= 1
+        except BaseException:
+            with self._lock:
+                if not acquired:
+                    counters.waiting -= 1
+                counters.failed += 1
+            raise
+
+        with self._lock:
+            counters.completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = {}
+            submitted = sum(c.running for c in self._counters.values())
+            for name, c in self._counters.items():
+                finished = c.completed + c.failed
+                tools[name] = {
+                    "limit": c.limit,
+                    "running": c.running,
+                    "queued": c.waiting,
+                    "max_queued": c.max_waiting,
+                    "completed": c.completed,
+                    "failed": c.failed,
+                    "avg_wait_ms": (
+                        round(c.wait_seconds / finished * 1000, 3) if finished else 0.0
+                    ),
+                }
+            return {
+                "threads": self.max_workers,
+                "active_threads": self._active,
+                # Calls handed to the pool that no thread has picked up yet.
+                "pool_queue": max(0, submitted - self._active),
+                "tools": tools,
+            }
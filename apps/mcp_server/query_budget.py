@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# SQLite calls the progress handler every PROGRESS_INTERVAL VM instructions.
+PROGRESS_INTERVAL = 10_000
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, reason: str, elapsed: float, steps: int):
+        super().__init__(f"query budget exceeded ({reason})")
+        self.reason = reason
+        self.elapsed = elapsed
+        self.steps = steps
+
+
+class _Tracker:
+    def __init__(self, max_seconds: float, max_steps: int):
+        self.max_seconds = max_seconds
+        self.max_steps = max_steps
+        self.started = time.monotonic()
+        self.steps = 0
+        self.tripped: Optional[str] = None
+
+    def __call__(self) -> int:
+        # A non-zero return makes SQLite interrupt the running statement.
+        self.steps += PROGRESS_INTERVAL
+        if self.max_steps and self.steps > self.max_steps:
+            self.tripped = "steps"
+            return 1
+        if self.max_seconds and time.monotonic() - self.started > self.max_seconds:
+            self.tripped = "time"
+            return 1
+        return 0
+
+
+class QueryBudget:
+    """
+    Per-statement wall-clock and VM-step limits for run_sql, enforced through
+    the sqlite3 progress handler. A limit of 0 disables that check.
+    """
+
+    def __init__(self, max_seconds: float = 5.0, max_steps: int = 0):
+        self.max_seconds = max_seconds
+        self.max_steps = max_steps
+        self._lock = threading.Lock()
+        self.guarded = 0
+        self.killed_time = 0
+        self.killed_steps = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_seconds > 0 or self.max_steps > 0
+
+    @contextmanager
+    def guard(self, dbapi_connection: Any) -> Iterator[None]:
+        """Run the block with the budget installed on a sqlite3 connection."""
+        if not self.enabled:
+            yield
+            return
+
+        tracker = _Tracker(self.max_seconds, self.max_steps)
+        dbapi_connection.set_progress_handler(tracker, PROGRESS_INTERVAL)
+        with self._lock:
+            self.guarded += 1
+        try:
+            yield
+        except Exception as exc:
+            if tracker.tripped is None:
+                raise
+            with self._lock:
+                if tracker.tripped == "time":
+                    self.killed_time += 1
+                else:
+                    self.killed_steps += 1
+            raise QueryBudgetExceeded(
+                tracker.tripped, time.monotonic() - tracker.started, tracker.steps
+            ) from exc
+        finally:
+            dbapi_connection.set_progress_handler(None, PROGRESS_INTERVAL)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_seconds": self.max_seconds,
+                "max_steps": self.max_steps,
+                "guarded": self.guarded,
+                "killed": self.killed_time + self.killed_steps,
+                "killed_time": self.killed_time,
+                "killed_steps": self.killed_steps,
+            }
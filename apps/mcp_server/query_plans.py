@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+
+def explain_plan(
+    dbapi_connection: Any, sql: str, params: Optional[Dict[str, Any]] = None
+) -> List[str]:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params or {})
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def schema_version(dbapi_connection: Any) -> int:
+    """Bumped by SQLite on every schema change, e.g. CREATE INDEX."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA schema_version")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """
+    Tables (or aliases) that SQLite reads row by row from start to end,
+    including walks over a whole index. Virtual tables (FTS5) are skipped.
+    """
+    scanned = []
+    for detail in plan:
+        if not detail.startswith("SCAN ") or "VIRTUAL TABLE" in detail:
+            continue
+        name = detail[len("SCAN ") :].split(" ", 1)[0]
+        if name and not name.startswith("(") and name != "CONSTANT":
+            scanned.append(name)
+    return scanned
+
+
+class PlanRecorder:
+    """
+    Instrumentation mode for run_sql: appends one JSON line per executed
+    query with its EXPLAIN QUERY PLAN and the tables it scans in full.
+    Plans are memoized per normalized query and schema version (a new index
+    is planned again), least recently used first out past `max_plans`.
+    Disabled when log_path is empty.
+    """
+
+    def __init__(self, log_path: Optional[str] = None, max_plans: int = 512):
+        self.log_path = log_path or None
+        self.max_plans = max(1, max_plans)
+        self._plans: "OrderedDict[Tuple[int, str], List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._log: Optional[TextIO] = None
+        self._log_lock = threading.Lock()
+        self.plan_evictions = 0
+        self.recorded = 0
+        self.full_scan_queries = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.log_path is not None
+
+    def record(
+        self,
+        dbapi_connection: Any,
+        sql: str,
+        params: Optional[Dict[str, Any]],
+        elapsed: float,
+    ) -> None:
+        if not self.enabled:
+            return
+
+        try:
+            key = (schema_version(dbapi_connection), sql)
+        except sqlite3.Error:
+            with self._lock:
+                self.errors += 1
+            return
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+        if plan is None:
+            try:
+                plan = explain_plan(dbapi_connection, sql, params)
+            except sqlite3.Error:
+                with self._lock:
+                    self.errors += 1
+                return
+            with self._lock:
+                self._plans[key] = plan
+                while len(self._plans) > self.max_plans:
+                    self._plans.popitem(last=False)
+                    self.plan_evictions += 1
+
+        scans = full_scans(plan)
+        line = json.dumps(
+            {
+                "ts": datetime.now(timezone.utc).isoformat(),
+                "sql": sql,
+                "params": params or {},
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "plan": plan,
+                "full_scans": scans,
+            },
+            ensure_ascii=False,
+            default=str,
+        )
+        with self._log_lock:
+            if self._log is None:
+                # Opened once; line buffered so the advisor sees whole lines.
+                self._log = open(self.log_path, "a", encoding="utf-8", buffering=1)
+            self._log.write(line + "\n")
+        with self._lock:
+            self.recorded += 1
+            if scans:
+                self.full_scan_queries += 1
+
+    def close(self) -> None:
+        with self._log_lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "log_path": self.log_path,
+                "recorded": self.recorded,
+                "full_scan_queries": self.full_scan_queries,
+                "distinct_queries": len(self._plans),
+                "max_plans": self.max_plans,
+                "plan_evictions": self.plan_evictions,
+                "errors": self.errors,
+            }
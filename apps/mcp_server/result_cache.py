@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+Fingerprint = Tuple[int, ...]
+
+
+def make_cache_key(
+    normalized_sql: str, params: Optional[Dict[str, Any]], limit: int
+) -> Hashable:
+    params_key = json.dumps(params or {}, sort_keys=True, default=str)
+    return (normalized_sql, params_key, limit)
+
+
+def db_fingerprint(db_path: str) -> Fingerprint:
+    """mtime/size of the database and its WAL; changes whenever a writer commits."""
+    values: List[int] = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            st = os.stat(path)
+        except OSError:
+            values.extend((0, 0))
+            continue
+        values.extend((st.st_mtime_ns, st.st_size))
+    return tuple(values)
+
+
+class QueryResultCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._fingerprint: Optional[Fingerprint] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _check_fingerprint(self, fingerprint: Fingerprint) -> None:
+        if self._fingerprint != fingerprint:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._fingerprint = fingerprint
+
+    def get(self, key: Hashable, fingerprint: Fingerprint) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, fingerprint: Fingerprint, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -1,45 +1,143 @@
 import os
-from typing import Any, Dict, List, Optional
+import re
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
-from sqlalchemy import func, or_, select, text as sql_text
+from sqlalchemy import func, null, or_, select, text as sql_text
 from sqlalchemy.engine import Engine
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.sql.elements import TextClause
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 
-from persistence.db import create_sqlite_engine, session_factory
-from persistence.models import Sop
+from apps.mcp_server.cursors import CursorNotFound, CursorRegistry
+from apps.mcp_server.executor import ToolExecutor
+from apps.mcp_server.query_budget import QueryBudget, QueryBudgetExceeded
+from apps.mcp_server.query_plans import PlanRecorder
+from apps.mcp_server.result_cache import (
+    QueryResultCache,
+    db_fingerprint,
+    make_cache_key,
+)
+from apps.mcp_server.sql_guard import check_select
+from infra.embeddings import make_embedder
+from persistence.db import create_sqlite_engine, pool_stats, session_factory
+from persistence.fts import SOP_FTS_TABLE, fts_match_expression
+from persistence.models import (
+    AlarmRollup,
+    Equipment,
+    EquipmentRollup,
+    EquipmentState,
+    RollupWatermark,
+    Sop,
+    SopChunk,
+)
+from persistence.sop_chunks import split_sop
+from persistence.sop_vectors import VectorIndex
 
 load_dotenv()
 
 DB_PATH = os.getenv("DB_PATH", "factory.db")
+RUN_SQL_CACHE_SIZE = int(os.getenv("RUN_SQL_CACHE_SIZE", "256"))
+RUN_SQL_CACHE_TTL = float(os.getenv("RUN_SQL_CACHE_TTL", "60"))
+RUN_SQL_MAX_CURSORS = int(os.getenv("RUN_SQL_MAX_CURSORS", "8"))
+RUN_SQL_CURSOR_TTL = float(os.getenv("RUN_SQL_CURSOR_TTL", "120"))
+RUN_SQL_TIMEOUT = float(os.getenv("RUN_SQL_TIMEOUT", "5"))
+RUN_SQL_MAX_STEPS = int(os.getenv("RUN_SQL_MAX_STEPS", "0"))
+RUN_SQL_PLAN_LOG = os.getenv("RUN_SQL_PLAN_LOG", "")
+RUN_SQL_PLAN_CACHE_SIZE = int(os.getenv("RUN_SQL_PLAN_CACHE_SIZE", "512"))
+SOP_EMBEDDER = os.getenv("SOP_EMBEDDER", "hashing")
+SOP_SEARCH_MODE = os.getenv("SOP_SEARCH_MODE", "hybrid")
+GET_SOP_MAX_CHARS = int(os.getenv("GET_SOP_MAX_CHARS", "4000"))
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("MCP_PORT", "8000"))
+MCP_WORKERS = int(os.getenv("MCP_WORKERS", "1"))
+MCP_SHUTDOWN_TIMEOUT = float(os.getenv("MCP_SHUTDOWN_TIMEOUT", "10"))
+DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "serving")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+RUN_SQL_CONCURRENCY = int(os.getenv("RUN_SQL_CONCURRENCY", str(DB_POOL_SIZE)))
+SEARCH_SOP_CONCURRENCY = int(
+    os.getenv("SEARCH_SOP_CONCURRENCY", str(max(1, DB_POOL_SIZE // 2)))
+)
 
-mcp = FastMCP("Factory SQL MCP")
-ENGINE: Engine = create_sqlite_engine(DB_PATH, read_only=True)
+# With several worker processes a client's requests may land on any of them,
+# so MCP sessions cannot live in process memory.
+mcp = FastMCP(
+    "Factory SQL MCP",
+    host=MCP_HOST,
+    port=MCP_PORT,
+    stateless_http=MCP_WORKERS > 1,
+)
+_STARTED_AT = time.monotonic()
+# Held cursors pin a connection each, so they get overflow slots instead of
+# starving the fixed pool used by ordinary queries.
+ENGINE: Engine = create_sqlite_engine(
+    DB_PATH,
+    read_only=True,
+    profile=DB_ENGINE_PROFILE,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=RUN_SQL_MAX_CURSORS,
+)
 SessionLocal = session_factory(ENGINE)
+RESULT_CACHE = QueryResultCache(
+    max_entries=RUN_SQL_CACHE_SIZE, ttl_seconds=RUN_SQL_CACHE_TTL
+)
+QUERY_BUDGET = QueryBudget(max_seconds=RUN_SQL_TIMEOUT, max_steps=RUN_SQL_MAX_STEPS)
+PLANS = PlanRecorder(RUN_SQL_PLAN_LOG, max_plans=RUN_SQL_PLAN_CACHE_SIZE)
+CURSORS = CursorRegistry(
+    max_open=RUN_SQL_MAX_CURSORS,
+    ttl_seconds=RUN_SQL_CURSOR_TTL,
+    budget=QUERY_BUDGET,
+)
 
+# One worker thread per pooled connection, so a tool call that got a thread
+# never waits for a connection.
+TOOL_EXECUTOR = ToolExecutor(
+    max_workers=DB_POOL_SIZE,
+    limits={"run_sql": RUN_SQL_CONCURRENCY, "search_sop": SEARCH_SOP_CONCURRENCY},
+)
 
-def _is_safe_select(sql: str) -> bool:
-    s = sql.strip().lower()
-
-    if ";" in s:
-        return False
+_SOP_FTS_QUERY = sql_text(
+    f"""
+    SELECT
+        c.id AS chunk_id,
+        s.id,
+        s.code,
+        s.title,
+        s.area,
+        c.section,
+        snippet({SOP_FTS_TABLE}, 2, '[', ']', '...', 24) AS snippet,
+        bm25({SOP_FTS_TABLE}, 10.0, 5.0, 1.0) AS score
+    FROM {SOP_FTS_TABLE}
+    JOIN sop_chunks c ON c.id = {SOP_FTS_TABLE}.rowid
+    JOIN sop s ON s.id = c.sop_id
+    WHERE {SOP_FTS_TABLE} MATCH :match
+    ORDER BY score
+    LIMIT :top_k
+    """
+)
+# False once SQLite turns out to lack FTS5.
+_sop_fts_available: Optional[bool] = None
 
-    if not s.startswith("select"):
-        return False
+EMBEDDER = make_embedder(SOP_EMBEDDER)
+SEARCH_MODES = ("lexical", "vector", "hybrid")
+# Reciprocal rank fusion constant for the hybrid mode.
+RRF_K = 60
+_vector_lock = threading.Lock()
+_vector_state: Optional[tuple] = None
 
-    banned = [
-        "pragma",
-        "attach",
-        "detach",
-        "insert",
-        "update",
-        "delete",
-        "drop",
-        "alter",
-        "create",
-    ]
-    return not any(b in s for b in banned)
+# equipment_summary windows: "<n>h" reads hourly rollups, "<n>d" daily ones.
+_WINDOW_RE = re.compile(r"^\s*(\d+)\s*([hd])\s*$", re.IGNORECASE)
+SUMMARY_MAX_HOURS = 168
+SUMMARY_MAX_DAYS = 366
 
 
 def _error_payload(exc: Exception) -> List[Dict[str, str]]:
@@ -47,59 +145,703 @@ def _error_payload(exc: Exception) -> List[Dict[str, str]]:
     return [{"error": message, "text": message}]
 
 
-@mcp.tool()
-def run_sql(
-    query: str, params: Optional[Dict[str, Any]] = None, limit: int = 50
-) -> List[Dict[str, Any]]:
-    """
-    Executa SQL read-only e retorna linhas em JSON.
-    """
+def _budget_payload(exc: QueryBudgetExceeded) -> List[Dict[str, Any]]:
+    limit = (
+        f"tempo limite de {QUERY_BUDGET.max_seconds:g}s"
+        if exc.reason == "time"
+        else f"limite de {QUERY_BUDGET.max_steps} passos da VM"
+    )
+    return [
+        {
+            "error": (
+                f"Query interrompida: excedeu o {limit}. "
+                "Restrinja a consulta (WHERE, LIMIT, JOIN com condicao)."
+            ),
+            "code": "query_budget_exceeded",
+            "reason": exc.reason,
+            "elapsed_ms": round(exc.elapsed * 1000, 1),
+            "vm_steps": exc.steps,
+        }
+    ]
+
+
+@lru_cache(maxsize=256)
+def _compile_sql(normalized_query: str) -> TextClause:
+    return sql_text(normalized_query)
+
+
+RESULT_FORMATS = ("rows", "columnar")
+
+
+def _render_rows(
+    columns: List[str], rows: Sequence[Sequence[Any]], fmt: str
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    if fmt == "columnar":
+        return {"columns": list(columns), "rows": [list(row) for row in rows]}
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _page_payload(
+    columns: List[str],
+    rows: List[tuple],
+    next_cursor: Optional[str],
+    fmt: str,
+) -> Dict[str, Any]:
+    rendered = _render_rows(columns, rows, fmt)
+    if isinstance(rendered, dict):
+        return {**rendered, "next_cursor": next_cursor}
+    return {"rows": rendered, "next_cursor": next_cursor}
+
+
+def _open_cursor_page(
+    normalized_query: str, params: Optional[Dict[str, Any]], limit: int, fmt: str
+) -> Dict[str, Any]:
+    connection = ENGINE.raw_connection()
+    try:
+        cursor = connection.cursor()
+        started = time.perf_counter()
+        with QUERY_BUDGET.guard(connection.dbapi_connection):
+            cursor.execute(normalized_query, params or {})
+        PLANS.record(
+            connection.dbapi_connection,
+            normalized_query,
+            params,
+            time.perf_counter() - started,
+        )
+    except BaseException:
+        connection.close()
+        raise
+    token = CURSORS.open(connection, cursor)
+    try:
+        return _page_payload(*CURSORS.fetch_page(token, limit), fmt)
+    except BaseException:
+        # Otherwise the connection and its read lock wait for the cursor TTL.
+        CURSORS.close(token)
+        raise
+
+
+def _run_sql(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    limit: int = 50,
+    paginate: bool = False,
+    cursor: Optional[str] = None,
+    format: str = "rows",
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     if limit < 1 or limit > 200:
         limit = 50
+    if format not in RESULT_FORMATS:
+        format = "rows"
 
-    if not _is_safe_select(query):
+    if cursor:
+        try:
+            return _page_payload(*CURSORS.fetch_page(cursor, limit), format)
+        except CursorNotFound:
+            return [
+                {
+                    "error": "Cursor expirado ou invalido. Execute a query novamente.",
+                    "code": "cursor_not_found",
+                }
+            ]
+        except QueryBudgetExceeded as exc:
+            CURSORS.close(cursor)
+            return _budget_payload(exc)
+        except sqlite3.Error as exc:
+            CURSORS.close(cursor)
+            return _error_payload(exc)
+
+    verdict = check_select(query)
+    if not verdict.allowed:
         return [
             {
-                "error": "Query bloqueada. Permitido apenas SELECT sem ';' e sem comandos."
+                "error": (
+                    "Query bloqueada. Permitido apenas um SELECT/WITH somente leitura "
+                    f"({verdict.reason})."
+                )
             }
         ]
 
+    if paginate:
+        try:
+            return _open_cursor_page(verdict.normalized, params, limit, format)
+        except QueryBudgetExceeded as exc:
+            return _budget_payload(exc)
+        except sqlite3.Error as exc:
+            return _error_payload(exc)
+
+    cache_key = make_cache_key(verdict.normalized, params, limit)
+    fingerprint = db_fingerprint(DB_PATH)
+    cached = RESULT_CACHE.get(cache_key, fingerprint)
+    if cached is not None:
+        return _render_rows(*cached, format)
+
     try:
         with ENGINE.connect() as conn:
-            result = conn.execute(sql_text(query), params or {})
-            rows = result.mappings().fetchmany(limit)
-            return [dict(row) for row in rows]
+            dbapi_connection = conn.connection.dbapi_connection
+            started = time.perf_counter()
+            with QUERY_BUDGET.guard(dbapi_connection):
+                result = conn.execute(_compile_sql(verdict.normalized), params or {})
+                columns = list(result.keys())
+                rows = [tuple(row) for row in result.fetchmany(limit)]
+            PLANS.record(
+                dbapi_connection,
+                verdict.normalized,
+                params,
+                time.perf_counter() - started,
+            )
+    except QueryBudgetExceeded as exc:
+        return _budget_payload(exc)
     except SQLAlchemyError as exc:
         return _error_payload(exc)
 
+    RESULT_CACHE.put(cache_key, fingerprint, (columns, tuple(rows)))
+    return _render_rows(columns, rows, format)
+
 
 @mcp.tool()
-def search_sop(text: str, top_k: int = 5) -> List[Dict[str, Any]]:
+async def run_sql(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    limit: int = 50,
+    paginate: bool = False,
+    cursor: Optional[str] = None,
+    format: str = "rows",
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """
-    Busca simples em SOPs (LIKE) para simular recuperacao de documentacao.
+    Executa SQL read-only e retorna linhas em JSON.
+    format="columnar" retorna {columns, rows: [[...]]} sem repetir nomes de colunas.
+    Com paginate=true retorna {rows, next_cursor}; para a proxima pagina,
+    chame novamente com cursor=<next_cursor> (a query e ignorada).
     """
+    return await TOOL_EXECUTOR.run(
+        "run_sql", _run_sql, query, params, limit, paginate, cursor, format
+    )
+
+
+def _search_sop_fts(text: str, top_k: int) -> Optional[List[Dict[str, Any]]]:
+    global _sop_fts_available
+
+    match = fts_match_expression(text)
+    if not match or _sop_fts_available is False:
+        return None
+
+    try:
+        with ENGINE.connect() as conn:
+            rows = conn.execute(
+                _SOP_FTS_QUERY, {"match": match, "top_k": top_k}
+            ).mappings()
+            return [dict(row) for row in rows]
+    except OperationalError as e:
+        # SQLite sem FTS5 nao muda: desliga de vez. Indice ainda nao criado
+        # ou banco ocupado valem so para esta chamada; usa LIKE.
+        if "no such module" in str(e):
+            _sop_fts_available = False
+        return None
+
+
+def _chunk_columns() -> tuple:
+    return (
+        SopChunk.id.label("chunk_id"),
+        Sop.id,
+        Sop.code,
+        Sop.title,
+        Sop.area,
+        SopChunk.section,
+        func.substr(SopChunk.content, 1, 160).label("snippet"),
+    )
+
+
+def _search_sop_like(text: str, top_k: int) -> List[Dict[str, Any]]:
+    query = f"%{text}%"
+    stmt = (
+        select(*_chunk_columns())
+        .join(Sop, Sop.id == SopChunk.sop_id)
+        .where(or_(Sop.title.like(query), SopChunk.content.like(query)))
+        .order_by(Sop.id.desc(), SopChunk.chunk_index)
+        .limit(top_k)
+    )
+    try:
+        with SessionLocal() as session:
+            return [dict(row) for row in session.execute(stmt).mappings()]
+    except OperationalError:
+        pass
+
+    # Banco sem sop_chunks (indice nao gerado): busca no SOP inteiro.
+    stmt = (
+        select(
+            null().label("chunk_id"),
+            Sop.id,
+            Sop.code,
+            Sop.title,
+            Sop.area,
+            null().label("section"),
+            func.substr(Sop.content, 1, 160).label("snippet"),
+        )
+        .where(or_(Sop.title.like(query), Sop.content.like(query)))
+        .order_by(Sop.id.desc())
+        .limit(top_k)
+    )
+    with SessionLocal() as session:
+        return [dict(row) for row in session.execute(stmt).mappings()]
+
+
+def _load_vector_index() -> Optional[VectorIndex]:
+    """Vectors of the configured embedder, reloaded when factory.db changes."""
+    global _vector_state
+
+    fingerprint = db_fingerprint(DB_PATH)
+    with _vector_lock:
+        if _vector_state is None or _vector_state[0] != fingerprint:
+            try:
+                with ENGINE.connect() as conn:
+                    index: Optional[VectorIndex] = VectorIndex.load(
+                        conn, EMBEDDER.name
+                    )
+            except OperationalError:
+                # Banco sem a tabela sop_embeddings.
+                index = None
+            _vector_state = (fingerprint, index if index else None)
+        return _vector_state[1]
+
+
+def _chunk_rows_by_id(ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    stmt = (
+        select(*_chunk_columns())
+        .join(Sop, Sop.id == SopChunk.sop_id)
+        .where(SopChunk.id.in_(ids))
+    )
+    with SessionLocal() as session:
+        return {
+            row["chunk_id"]: dict(row) for row in session.execute(stmt).mappings()
+        }
+
+
+def _search_sop_lexical(text: str, top_k: int) -> List[Dict[str, Any]]:
+    hits = _search_sop_fts(text, top_k)
+    if hits is not None:
+        return hits
+    return _search_sop_like(text, top_k)
+
+
+def _search_sop(text: str, top_k: int, mode: str) -> List[Dict[str, Any]]:
     if top_k < 1 or top_k > 20:
         top_k = 5
+    if mode not in SEARCH_MODES:
+        mode = SOP_SEARCH_MODE
+
+    try:
+        index = _load_vector_index() if mode != "lexical" else None
+        if index is None:
+            return _search_sop_lexical(text, top_k)
+
+        # Hybrid ranks a wider candidate set from each side before fusing.
+        candidates = top_k if mode == "vector" else top_k * 3
+        vector_hits = index.search(EMBEDDER.embed([text])[0], candidates)
+        if mode == "vector":
+            rows = _chunk_rows_by_id([chunk_id for chunk_id, _ in vector_hits])
+            return [
+                {**rows[chunk_id], "score": round(score, 4)}
+                for chunk_id, score in vector_hits
+                if chunk_id in rows
+            ]
+
+        lexical = {
+            hit["chunk_id"]: hit for hit in _search_sop_lexical(text, candidates)
+        }
+        fused: Dict[int, float] = {}
+        for ranking in (list(lexical), [chunk_id for chunk_id, _ in vector_hits]):
+            for rank, chunk_id in enumerate(ranking, start=1):
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+        best = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        rows = _chunk_rows_by_id([cid for cid in best if cid not in lexical])
+        return [
+            {**(lexical.get(cid) or rows[cid]), "score": round(fused[cid], 6)}
+            for cid in best
+            if cid in lexical or cid in rows
+        ]
+    except SQLAlchemyError as exc:
+        return _error_payload(exc)
+
 
+@mcp.tool()
+async def search_sop(
+    text: str, top_k: int = 5, mode: str = SOP_SEARCH_MODE
+) -> List[Dict[str, Any]]:
+    """
+    Busca trechos (secoes) de SOPs por relevancia, com destaque.
+    Cada resultado traz code, title, section e snippet; use get_sop(code, section)
+    para ler a secao completa.
+    mode="lexical": FTS5/BM25 (LIKE se o indice FTS5 nao existir);
+    mode="vector": similaridade de embeddings (cosseno);
+    mode="hybrid": combina os dois rankings (RRF). Sem indice vetorial, usa lexical.
+    """
+    return await TOOL_EXECUTOR.run("search_sop", _search_sop, text, top_k, mode)
+
+
+def _sop_sections(sop_id: int, content: str) -> Dict[str, str]:
+    try:
+        with SessionLocal() as session:
+            chunks = session.execute(
+                select(SopChunk.section, SopChunk.content)
+                .where(SopChunk.sop_id == sop_id)
+                .order_by(SopChunk.chunk_index)
+            ).all()
+    except OperationalError:
+        chunks = []
+    if not chunks:
+        # SOP ainda nao indexado (ou banco sem sop_chunks): divide na hora.
+        chunks = split_sop(content)
+
+    sections: Dict[str, List[str]] = {}
+    for section, text in chunks:
+        sections.setdefault(section, []).append(text)
+    return {name: "\n\n".join(parts) for name, parts in sections.items()}
+
+
+def _match_section(sections: Dict[str, str], wanted: str) -> Optional[str]:
+    wanted = wanted.strip().casefold()
+    for name in sections:
+        if name.casefold() == wanted:
+            return name
+    for name in sections:
+        if wanted in name.casefold():
+            return name
+    return None
+
+
+def _get_sop(code: str, section: Optional[str]) -> Dict[str, Any]:
     try:
-        query = f"%{text}%"
-        stmt = (
-            select(
-                Sop.id,
-                Sop.title,
-                Sop.area,
-                func.substr(Sop.content, 1, 160).label("snippet"),
+        with SessionLocal() as session:
+            sop = (
+                session.execute(
+                    select(
+                        Sop.id, Sop.code, Sop.title, Sop.area, Sop.version, Sop.content
+                    ).where(func.upper(Sop.code) == code.strip().upper())
+                )
+                .mappings()
+                .first()
+            )
+        if sop is None:
+            return {"error": f"SOP nao encontrado: {code}", "code": "sop_not_found"}
+        sections = _sop_sections(sop["id"], sop["content"])
+    except SQLAlchemyError as exc:
+        return _error_payload(exc)[0]
+
+    payload: Dict[str, Any] = {
+        "code": sop["code"],
+        "title": sop["title"],
+        "area": sop["area"],
+        "version": sop["version"],
+        "sections": [
+            {"name": name, "chars": len(body)} for name, body in sections.items()
+        ],
+        "section": None,
+        "content": None,
+    }
+
+    if section:
+        name = _match_section(sections, section)
+        if name is None:
+            return {
+                "error": f"Secao nao encontrada: {section}",
+                "code": "section_not_found",
+                "sop_code": sop["code"],
+                "sections": payload["sections"],
+            }
+        content = sections[name]
+        payload["section"] = name
+    else:
+        content = sop["content"]
+        if len(content) > GET_SOP_MAX_CHARS:
+            payload["hint"] = (
+                f"SOP com {len(content)} caracteres; "
+                "chame get_sop novamente com section=<nome> de uma das secoes."
             )
-            .where(or_(Sop.title.like(query), Sop.content.like(query)))
-            .order_by(Sop.id.desc())
-            .limit(top_k)
+            return payload
+
+    payload["content"] = content[:GET_SOP_MAX_CHARS]
+    if len(content) > GET_SOP_MAX_CHARS:
+        payload["truncated"] = True
+    return payload
+
+
+@mcp.tool()
+async def get_sop(code: str, section: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Le um SOP pelo codigo (ex: "SOP-COMP-001").
+    Sem section: conteudo completo se couber no limite, senao apenas a lista de
+    secoes. Com section (nome ou parte do nome, sem diferenciar maiusculas):
+    somente o texto daquela secao.
+    """
+    return await TOOL_EXECUTOR.run("get_sop", _get_sop, code, section)
+
+
+def _summary_range(window: str, until: str) -> Optional[tuple]:
+    match = _WINDOW_RE.match(window)
+    if not match:
+        return None
+    size, unit = int(match.group(1)), match.group(2).lower()
+    if unit == "h" and 1 <= size <= SUMMARY_MAX_HOURS:
+        end = datetime.fromisoformat(until[:13])
+        start = end - timedelta(hours=size - 1)
+        return (
+            "hour",
+            start.isoformat(timespec="seconds"),
+            end.isoformat(timespec="seconds"),
+        )
+    if unit == "d" and 1 <= size <= SUMMARY_MAX_DAYS:
+        end_day = date.fromisoformat(until[:10])
+        return (
+            "day",
+            (end_day - timedelta(days=size - 1)).isoformat(),
+            end_day.isoformat(),
         )
+    return None
+
+
+def _severity_counts(row: Any, total: str) -> Dict[str, int]:
+    return {
+        "total": row[total] or 0,
+        "info": row["info"] or 0,
+        "warning": row["warning"] or 0,
+        "critical": row["critical"] or 0,
+    }
+
+
+def _equipment_summary(
+    tag: str, window: str, until: Optional[str]
+) -> Dict[str, Any]:
+    try:
         with SessionLocal() as session:
-            rows = session.execute(stmt).mappings()
-            return [dict(row) for row in rows]
+            equipment = (
+                session.execute(
+                    select(
+                        Equipment.id,
+                        Equipment.tag,
+                        Equipment.equipment_type,
+                        Equipment.area,
+                        Equipment.line,
+                        Equipment.status,
+                    ).where(func.upper(Equipment.tag) == tag.strip().upper())
+                )
+                .mappings()
+                .first()
+            )
+            if equipment is None:
+                return {
+                    "error": f"Equipamento nao encontrado: {tag}",
+                    "code": "equipment_not_found",
+                }
+
+            if not until:
+                until = session.execute(
+                    select(RollupWatermark.last_ts).where(
+                        RollupWatermark.source == "compressor_events"
+                    )
+                ).scalar()
+            if not until:
+                return {
+                    "error": "Rollups vazios: rode scripts/ingest_rollups.py.",
+                    "code": "rollups_unavailable",
+                }
+            try:
+                bounds = _summary_range(window, until)
+            except ValueError:
+                return {
+                    "error": f"until invalido: {until!r} (ex: 2026-01-12T18:00:00).",
+                    "code": "invalid_until",
+                }
+            if bounds is None:
+                return {
+                    "error": (
+                        f"Janela invalida: {window!r} (use '<n>h' ate "
+                        f"{SUMMARY_MAX_HOURS}h ou '<n>d' ate {SUMMARY_MAX_DAYS}d)."
+                    ),
+                    "code": "invalid_window",
+                }
+            grain, start, end = bounds
+
+            metrics = session.execute(
+                select(
+                    EquipmentRollup.event_type,
+                    func.max(EquipmentRollup.unit).label("unit"),
+                    func.sum(EquipmentRollup.events).label("events"),
+                    func.sum(EquipmentRollup.info).label("info"),
+                    func.sum(EquipmentRollup.warning).label("warning"),
+                    func.sum(EquipmentRollup.critical).label("critical"),
+                    func.sum(EquipmentRollup.value_count).label("value_count"),
+                    func.sum(EquipmentRollup.value_sum).label("value_sum"),
+                    func.min(EquipmentRollup.value_min).label("value_min"),
+                    func.max(EquipmentRollup.value_max).label("value_max"),
+                )
+                .where(
+                    EquipmentRollup.equipment_id == equipment["id"],
+                    EquipmentRollup.grain == grain,
+                    EquipmentRollup.bucket.between(start, end),
+                )
+                .group_by(EquipmentRollup.event_type)
+                .order_by(EquipmentRollup.event_type)
+            ).mappings().all()
+            alarms = session.execute(
+                select(
+                    func.sum(AlarmRollup.alarms).label("alarms"),
+                    func.sum(AlarmRollup.info).label("info"),
+                    func.sum(AlarmRollup.warning).label("warning"),
+                    func.sum(AlarmRollup.critical).label("critical"),
+                ).where(
+                    AlarmRollup.equipment_id == equipment["id"],
+                    AlarmRollup.grain == grain,
+                    AlarmRollup.bucket.between(start, end),
+                )
+            ).mappings().one()
+            state = session.execute(
+                select(EquipmentState).where(
+                    EquipmentState.equipment_id == equipment["id"]
+                )
+            ).scalar()
+    except OperationalError:
+        return {
+            "error": "Tabelas de rollup ausentes: rode scripts/ingest_rollups.py.",
+            "code": "rollups_unavailable",
+        }
     except SQLAlchemyError as exc:
-        return _error_payload(exc)
+        return _error_payload(exc)[0]
+
+    events = {"total": 0, "info": 0, "warning": 0, "critical": 0}
+    for row in metrics:
+        for key, value in _severity_counts(row, "events").items():
+            events[key] += value
+
+    return {
+        "tag": equipment["tag"],
+        "equipment_type": equipment["equipment_type"],
+        "area": equipment["area"],
+        "line": equipment["line"],
+        "status": equipment["status"],
+        "window": window.strip().lower(),
+        "grain": grain,
+        "from": start,
+        "to": end,
+        "data_until": until,
+        "events": events,
+        "metrics": [
+            {
+                "event_type": row["event_type"],
+                "unit": row["unit"],
+                "events": row["events"],
+                "critical": row["critical"],
+                "min": row["value_min"],
+                "max": row["value_max"],
+                "avg": (
+                    round(row["value_sum"] / row["value_count"], 3)
+                    if row["value_count"]
+                    else None
+                ),
+            }
+            for row in metrics
+        ],
+        "alarms_started": _severity_counts(alarms, "alarms"),
+        "open_alarms": {
+            "total": state.open_alarms if state else 0,
+            "warning": state.open_warning_alarms if state else 0,
+            "critical": state.open_critical_alarms if state else 0,
+        },
+        "open_work_orders": state.open_work_orders if state else 0,
+        "last_event_ts": state.last_event_ts if state else None,
+    }
+
+
+@mcp.tool()
+async def equipment_summary(
+    tag: str, window: str = "24h", until: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Resumo de saude de um equipamento (ex: tag="COMP-01") numa janela:
+    eventos por severidade, min/max/media de value por tipo de evento, alarmes
+    iniciados, alarmes e ordens de manutencao em aberto.
+    window: "<n>h" (rollup por hora, ate 168h) ou "<n>d" (por dia, ate 366d).
+    until: fim da janela (ISO); padrao e o evento mais recente ingerido.
+    Prefira esta ferramenta a run_sql para perguntas de status/resumo.
+    """
+    return await TOOL_EXECUTOR.run(
+        "equipment_summary", _equipment_summary, tag, window, until
+    )
+
+
+@mcp.tool()
+def server_stats() -> Dict[str, Any]:
+    """
+    Metricas internas do servidor (cache, cursores, limites, planos, filas e pool).
+    """
+    return {
+        "tool_executor": TOOL_EXECUTOR.stats(),
+        "run_sql_cache": RESULT_CACHE.stats(),
+        "run_sql_cursors": CURSORS.stats(),
+        "run_sql_budget": QUERY_BUDGET.stats(),
+        "run_sql_plans": PLANS.stats(),
+        "db_pool": {"profile": DB_ENGINE_PROFILE, **pool_stats(ENGINE)},
+    }
+
+
+@mcp.custom_route("/healthz", methods=["GET"])
+async def healthz(_: Request) -> JSONResponse:
+    status, code = "ok", 200
+    try:
+        with ENGINE.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+    except SQLAlchemyError:
+        status, code = "db_unavailable", 503
+    return JSONResponse(
+        {
+            "status": status,
+            "pid": os.getpid(),
+            "uptime_s": round(time.monotonic() - _STARTED_AT, 1),
+            "stateless_http": mcp.settings.stateless_http,
+            "db_pool": pool_stats(ENGINE),
+            "open_cursors": CURSORS.stats()["open"],
+        },
+        status_code=code,
+    )
+
+
+def create_app() -> Starlette:
+    """ASGI app for uvicorn; releases cursors and connections on shutdown."""
+    app = mcp.streamable_http_app()
+    mcp_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        async with mcp_lifespan(app):
+            yield
+        TOOL_EXECUTOR.shutdown()
+        CURSORS.close_all()
+        PLANS.close()
+        ENGINE.dispose()
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    options = {
+        "host": MCP_HOST,
+        "port": MCP_PORT,
+        "timeout_graceful_shutdown": MCP_SHUTDOWN_TIMEOUT,
+        "log_level": mcp.settings.log_level.lower(),
+    }
+    if MCP_WORKERS > 1:
+        # Each worker imports this module and opens its own read-only pool.
+        uvicorn.run(
+            "apps.mcp_server.server:create_app",
+            factory=True,
+            workers=MCP_WORKERS,
+            **options,
+        )
+    else:
+        uvicorn.run(create_app(), **options)
 
 
 if __name__ == "__main__":
-    mcp.run(transport="streamable-http")
+    main()
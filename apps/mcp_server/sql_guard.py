@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Tokens: comments, string literals, quoted identifiers, bind params, numbers,
+# words, multi-char operators and single punctuation characters. Words and
+# params are Unicode (SQLite accepts unquoted identifiers like "média").
+_TOKEN_RE = re.compile(
+    r"""
+      (?P<ws>\s+)
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*.*?\*/)
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<ident>"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])
+    | (?P<param>[:@$][^\W\d]\w*|\?\d*)
+    | (?P<number>0[xX][0-9A-Fa-f]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<word>[^\W\d][\w$]*)
+    | (?P<op>\|\||<=|>=|<>|!=|==|<<|>>|[-+*/%&|~<>=(),.;])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_START_KEYWORDS = {"select", "with"}
+# Keywords that only make sense in write/admin statements. WITH can prefix
+# INSERT/UPDATE/DELETE/REPLACE, so those must be rejected anywhere.
+_BANNED_KEYWORDS = {
+    "insert",
+    "update",
+    "delete",
+    "drop",
+    "alter",
+    "create",
+    "pragma",
+    "attach",
+    "detach",
+    "vacuum",
+    "reindex",
+}
+_BANNED_FUNCTIONS = {"load_extension"}
+
+# (kind, text, preceded_by_whitespace_or_comment)
+Token = Tuple[str, str, bool]
+
+
+@dataclass(frozen=True)
+class SqlVerdict:
+    allowed: bool
+    normalized: str = ""
+    reason: Optional[str] = None
+
+
+class SqlTokenizeError(ValueError):
+    pass
+
+
+def tokenize_sql(sql: str) -> List[Token]:
+    tokens: List[Token] = []
+    pos = 0
+    gap = False
+    while pos < len(sql):
+        match = _TOKEN_RE.match(sql, pos)
+        if match is None:
+            raise SqlTokenizeError(f"caractere inesperado na posicao {pos}")
+        kind = match.lastgroup or ""
+        if kind in ("ws", "line_comment", "block_comment"):
+            gap = True
+        else:
+            tokens.append((kind, match.group(), gap))
+            gap = False
+        pos = match.end()
+    return tokens
+
+
+def _join_tokens(tokens: List[Token]) -> str:
+    # Whitespace and comments collapse to one space; adjacency is preserved so
+    # SQLite derives the same result column names as for the original text.
+    parts: List[str] = []
+    for _, value, gap in tokens:
+        if gap and parts:
+            parts.append(" ")
+        parts.append(value)
+    return "".join(parts)
+
+
+@lru_cache(maxsize=1024)
+def check_select(sql: str) -> SqlVerdict:
+    """Parse once and allow only a single read-only SELECT/WITH statement."""
+    try:
+        tokens = tokenize_sql(sql)
+    except SqlTokenizeError as exc:
+        return SqlVerdict(False, reason=str(exc))
+
+    # A single trailing ';' is harmless and very common in generated SQL.
+    if tokens and tokens[-1][:2] == ("op", ";"):
+        tokens = tokens[:-1]
+
+    first_word = next(
+        (value for kind, value, _ in tokens if (kind, value) != ("op", "(")), ""
+    )
+    if first_word.lower() not in _START_KEYWORDS:
+        return SqlVerdict(False, reason="apenas SELECT/WITH e permitido")
+
+    for i, (kind, value, _) in enumerate(tokens):
+        if kind == "op" and value == ";":
+            return SqlVerdict(False, reason="apenas um comando por chamada")
+        if kind != "word":
+            continue
+        word = value.lower()
+        if word in _BANNED_KEYWORDS:
+            return SqlVerdict(False, reason=f"comando nao permitido: {word.upper()}")
+        next_kind, next_value, _ = (
+            tokens[i + 1] if i + 1 < len(tokens) else ("", "", False)
+        )
+        if word == "replace" and next_value.lower() == "into":
+            return SqlVerdict(False, reason="comando nao permitido: REPLACE")
+        if word in _BANNED_FUNCTIONS and (next_kind, next_value) == ("op", "("):
+            return SqlVerdict(False, reason=f"funcao nao permitida: {word}")
+
+    return SqlVerdict(True, normalized=_join_tokens(tokens))
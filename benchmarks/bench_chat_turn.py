@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from unittest import mock
+
+from benchmarks.common import Result, emit, make_result
+from benchmarks.stub_ollama import StubOllamaServer
+
+SUITE = "chat_turn"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _McpHttpServer:
+    """The real FastMCP app served by uvicorn on a background thread."""
+
+    def __init__(self, port: int):
+        import uvicorn
+
+        from apps.mcp_server.server import mcp
+
+        config = uvicorn.Config(
+            mcp.streamable_http_app(), host="127.0.0.1", port=port, log_level="warning"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "_McpHttpServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def _run_turns(turns: int, stream: bool, router: bool, cache: bool) -> List[float]:
+    from apps.bot_cli import main as bot
+    from infra.settings import settings
+
+    settings.OLLAMA_STREAM = stream
+    settings.LLM_CACHE = cache
+    # Without the router every turn asks the LLM first (2 calls with the stub).
+    settings.INTENT_ROUTER_MIN_CONFIDENCE = 0.8 if router else 1.1
+    prompts = iter(["listar eventos do COMP-01"] * turns)
+    marks: List[float] = []
+
+    def fake_input(_prompt: str = "") -> str:
+        # Time between consecutive prompts is one full turn.
+        marks.append(time.perf_counter())
+        return next(prompts, "sair")
+
+    with mock.patch("builtins.input", fake_input), contextlib.redirect_stdout(
+        io.StringIO()
+    ):
+        asyncio.run(bot.main())
+    return [b - a for a, b in zip(marks, marks[1:])]
+
+
+def _run_concurrent(
+    conversations: int,
+    turns: int,
+    *,
+    router: bool = True,
+    max_in_flight: Optional[int] = None,
+) -> Tuple[List[float], Dict[str, Any]]:
+    """
+    Per-turn latency with `conversations` operators on one ChatEngine, plus
+    the Ollama scheduler stats. `max_in_flight` overrides the scheduler cap.
+    """
+    from apps.bot_cli.engine import ChatEngine, create_ollama_scheduler
+    from infra.mcp_client import MCPSessionPool
+    from infra.settings import settings
+    from persistence.memory_store import ChatMemoryStore
+
+    settings.OLLAMA_STREAM = False
+    settings.LLM_CACHE = False
+    settings.INTENT_ROUTER_MIN_CONFIDENCE = 0.8 if router else 1.1
+    if max_in_flight is not None:
+        settings.OLLAMA_MAX_IN_FLIGHT = max_in_flight
+
+    async def operator(engine: ChatEngine, samples: List[float]) -> None:
+        conv_id = await engine.create_conversation()
+        for _ in range(turns):
+            started = time.perf_counter()
+            await engine.turn(conv_id, "listar eventos do COMP-01")
+            samples.append(time.perf_counter() - started)
+
+    async def run() -> Tuple[List[float], Dict[str, Any]]:
+        store = ChatMemoryStore(settings.MEMORY_DB, write_behind=True)
+        samples: List[float] = []
+        try:
+            async with MCPSessionPool(
+                settings.MCP_URL,
+                size=settings.MCP_POOL_SIZE,
+                max_concurrency=settings.MCP_TOOL_CONCURRENCY,
+            ) as pool:
+                scheduler = create_ollama_scheduler()
+                engine = ChatEngine(pool, store, scheduler=scheduler)
+                await asyncio.gather(
+                    *(operator(engine, samples) for _ in range(conversations))
+                )
+                await engine.close()
+        finally:
+            store.close()
+        return samples, scheduler.stats()
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Full CLI turns against a stub Ollama and the real MCP server "
+        "(DB_PATH must point to a seeded database)."
+    )
+    parser.add_argument("--size", type=int, required=True)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument(
+        "--conversations",
+        default="1,8,32",
+        help="concurrent conversations for the ChatEngine case",
+    )
+    parser.add_argument(
+        "--ollama-latency",
+        type=float,
+        default=0.05,
+        help="stub Ollama seconds per request for the scheduler case",
+    )
+    parser.add_argument(
+        "--ollama-parallel",
+        type=int,
+        default=2,
+        help="stub Ollama parallel slots (OLLAMA_NUM_PARALLEL) for the scheduler case",
+    )
+    args = parser.parse_args()
+
+    results: List[Result] = []
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as tmp, StubOllamaServer() as ollama:
+        # The CLI reads its settings at import time.
+        os.environ.update(
+            {
+                "OLLAMA_HOST": ollama.url,
+                "MCP_URL": f"http://127.0.0.1:{port}/mcp",
+                "MEMORY_DB": str(Path(tmp) / "memory.db"),
+            }
+        )
+        with _McpHttpServer(port):
+            for stream, router, cache in itertools.product((False, True), repeat=3):
+                # The prompt repeats, so with the cache every turn after the
+                # first is answered without calling Ollama.
+                samples = _run_turns(args.turns, stream, router, cache)
+                results.append(
+                    make_result(
+                        SUITE,
+                        "main_turn",
+                        {
+                            "events": args.size,
+                            "stream": stream,
+                            "router": router,
+                            "cache": cache,
+                        },
+                        samples[1:] or samples,
+                    )
+                )
+            for conversations in (int(n) for n in args.conversations.split(",")):
+                started = time.perf_counter()
+                samples, _ = _run_concurrent(conversations, args.turns)
+                elapsed = time.perf_counter() - started
+                results.append(
+                    make_result(
+                        SUITE,
+                        "engine_turn",
+                        {
+                            "events": args.size,
+                            "conversations": conversations,
+                            "turns_per_s": round(len(samples) / elapsed, 1),
+                        },
+                        samples,
+                    )
+                )
+
+            # A slow server with few parallel slots and no router (two LLM
+            # calls per turn): without a cap every request piles onto Ollama
+            # in arrival order; with it, final answers jump the queue.
+            conversations = max(int(n) for n in args.conversations.split(","))
+            for max_in_flight in (0, args.ollama_parallel):
+                ollama.configure(
+                    latency=args.ollama_latency, parallel=args.ollama_parallel
+                )
+                samples, scheduler = _run_concurrent(
+                    conversations,
+                    args.turns,
+                    router=False,
+                    max_in_flight=max_in_flight,
+                )
+                waits = scheduler["priorities"]
+                results.append(
+                    make_result(
+                        SUITE,
+                        "scheduled_turn",
+                        {
+                            "events": args.size,
+                            "conversations": conversations,
+                            "max_in_flight": max_in_flight,
+                            "ollama_parallel": args.ollama_parallel,
+                            "ollama_latency_s": args.ollama_latency,
+                            "ollama_max_active": ollama.stats()["max_active"],
+                            "final_wait_p95_s": waits["final"].get("wait_p95_s"),
+                            "first_wait_p95_s": waits["first"].get("wait_p95_s"),
+                        },
+                        samples,
+                    )
+                )
+            ollama.configure()
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from benchmarks.common import Result, emit, make_result, measure
+from persistence.memory_store import ChatMemoryStore
+
+SUITE = "memory_store"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="ChatMemoryStore append/load throughput."
+    )
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    results: List[Result] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for write_behind in (False, True):
+            db_path = str(Path(tmp) / f"memory_{write_behind}.db")
+            store = ChatMemoryStore(db_path, write_behind=write_behind)
+            store.create_conversation("bench", title="bench")
+            params = {"messages": args.messages, "write_behind": write_behind}
+
+            started = time.perf_counter()
+            for i in range(args.messages):
+                store.append_message("bench", "user", f"mensagem {i} " * 8)
+            store.flush()
+            elapsed = time.perf_counter() - started
+            results.append(
+                make_result(
+                    SUITE, "append_message", params, [elapsed / args.messages]
+                )
+            )
+
+            for limit in (20, 200):
+                results.append(
+                    make_result(
+                        SUITE,
+                        "load_messages",
+                        {**params, "limit": limit},
+                        measure(
+                            lambda: store.load_messages("bench", limit),
+                            args.iterations,
+                        ),
+                    )
+                )
+            store.close()
+            store.engine.dispose()
+
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
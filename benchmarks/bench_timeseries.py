@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.common import Result, emit, make_result, measure
+from persistence.db import create_sqlite_engine
+from persistence.timeseries import to_compact
+from scripts.seed_factory_db import generate
+
+SUITE = "timeseries"
+EQUIPMENT = 20
+END = "2026-01-13"
+
+# name -> (row-store SQL, compact SQL). The row-store form is what run_sql
+# callers write today and still works on the compact view; the compact form
+# filters/groups on the integer epoch columns instead.
+QUERIES: Dict[str, Tuple[str, str]] = {
+    "range_24h_one_equipment": (
+        "SELECT COUNT(*), AVG(value) FROM compressor_events "
+        "WHERE equipment_id = :eq AND event_ts >= :day_iso AND event_ts < :end_iso",
+        "SELECT COUNT(*), AVG(value) FROM compressor_events "
+        "WHERE equipment_id = :eq AND ts >= :day AND ts < :end",
+    ),
+    "hourly_avg_7d_one_equipment": (
+        "SELECT substr(event_ts, 1, 13) AS hour, AVG(value) FROM compressor_events "
+        "WHERE equipment_id = :eq AND event_type = 'pressure' "
+        "AND event_ts >= :week_iso AND event_ts < :end_iso GROUP BY hour",
+        "SELECT ts / 3600 AS hour, AVG(value) FROM compressor_events "
+        "WHERE equipment_id = :eq AND event_type = 'pressure' "
+        "AND ts >= :week AND ts < :end GROUP BY hour",
+    ),
+    "severity_30d_all_equipment": (
+        "SELECT severity, COUNT(*) FROM compressor_events "
+        "WHERE event_ts >= :month_iso AND event_ts < :end_iso GROUP BY severity",
+        "SELECT severity, COUNT(*) FROM compressor_events "
+        "WHERE ts >= :month AND ts < :end GROUP BY severity",
+    ),
+    "recent_by_tag": (
+        "SELECT c.event_ts, c.event_type, c.severity, c.value "
+        "FROM compressor_events c JOIN equipment e ON e.id = c.equipment_id "
+        "WHERE e.tag = :tag ORDER BY c.event_ts DESC LIMIT 20",
+        "SELECT c.event_ts, c.event_type, c.severity, c.value "
+        "FROM compressor_events c JOIN equipment e ON e.id = c.equipment_id "
+        "WHERE e.tag = :tag ORDER BY c.ts DESC LIMIT 20",
+    ),
+}
+
+
+def _params() -> Dict[str, Any]:
+    end = datetime.fromisoformat(END).replace(tzinfo=timezone.utc)
+    params: Dict[str, Any] = {"eq": 1, "tag": "COMP-01"}
+    for name, delta in (("day", 1), ("week", 7), ("month", 30), ("end", 0)):
+        moment = end - timedelta(days=delta)
+        params[name] = int(moment.timestamp())
+        params[f"{name}_iso"] = moment.strftime("%Y-%m-%dT%H:%M:%S")
+    return params
+
+
+def _build(tmp: str, size: int) -> Dict[str, str]:
+    rowstore = str(Path(tmp) / "rowstore.db")
+    generate(
+        rowstore,
+        equipment=EQUIPMENT,
+        events_per_day=size / (EQUIPMENT * 365),
+        years=1.0,
+        sops=20,
+        end=END,
+    )
+    paths = {"rowstore": rowstore}
+    for layout, granularity in (("compact_month", "month"), ("compact_single", "none")):
+        path = paths[layout] = str(Path(tmp) / f"{layout}.db")
+        shutil.copy(rowstore, path)
+        engine = create_sqlite_engine(path)
+        to_compact(engine, granularity)
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+            conn.exec_driver_sql("VACUUM")
+        engine.dispose()
+    return paths
+
+
+def _query(conn: sqlite3.Connection, sql: str, params: Dict[str, Any]) -> Callable:
+    return lambda: conn.execute(sql, params).fetchall()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Row-store vs compact time-series layout for compressor_events "
+        "(normally invoked by benchmarks.run)."
+    )
+    parser.add_argument("--size", type=int, required=True)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    results: List[Result] = []
+    params = _params()
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        paths = _build(tmp, args.size)
+        build_seconds = time.perf_counter() - started
+
+        for layout_name, path in paths.items():
+            base = {
+                "events": args.size,
+                "layout": layout_name,
+                "db_bytes": os.path.getsize(path),
+            }
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                for name, (rowstore_sql, compact_sql) in QUERIES.items():
+                    variants = [("iso", rowstore_sql)]
+                    if layout_name != "rowstore":
+                        variants.append(("epoch", compact_sql))
+                    for column, sql in variants:
+                        results.append(
+                            make_result(
+                                SUITE,
+                                name,
+                                {**base, "filter": column},
+                                measure(_query(conn, sql, params), args.iterations),
+                            )
+                        )
+            finally:
+                conn.close()
+
+        results.append(
+            make_result(
+                SUITE, "build_and_migrate", {"events": args.size}, [build_seconds]
+            )
+        )
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from apps.bot_cli.intent_router import route
+from apps.mcp_server import server
+from benchmarks.common import Result, emit, make_result, measure, measure_async
+from infra.mcp_client import call_mcp_tool
+
+SUITE = "mcp_tools"
+
+
+def _cases() -> Dict[str, Dict[str, Any]]:
+    return {
+        "run_sql.events_by_tag": route("listar eventos do COMP-01").args,
+        "run_sql.recent_events": route("listar eventos").args,
+        "run_sql.count_by_severity": {
+            "query": (
+                "SELECT severity, COUNT(*) AS n FROM compressor_events "
+                "GROUP BY severity"
+            ),
+        },
+        # What the LLM writes for "status of COMP-01 in the last 30 days";
+        # compare with equipment_summary below.
+        "run_sql.status_30d": {
+            "query": (
+                "SELECT c.event_type, COUNT(*) AS n, "
+                "SUM(c.severity = 'critical') AS critical, MIN(c.value) AS min_v, "
+                "MAX(c.value) AS max_v, AVG(c.value) AS avg_v "
+                "FROM compressor_events c JOIN equipment e ON e.id = c.equipment_id "
+                "WHERE e.tag = 'COMP-01' AND c.event_ts >= ("
+                "SELECT strftime('%Y-%m-%dT%H:%M:%S', MAX(event_ts), '-30 days') "
+                "FROM compressor_events) GROUP BY c.event_type"
+            ),
+        },
+    }
+
+
+def _throughput(fn: Any, calls: int, workers: int) -> List[float]:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: fn(), range(calls)))
+    # Expressed as a per-call time so it fits the common result format.
+    return [(time.perf_counter() - started) / calls]
+
+
+async def _mcp_roundtrip(iterations: int, size: int) -> List[Result]:
+    results = []
+    async with create_connected_server_and_client_session(
+        server.mcp._mcp_server
+    ) as session:
+        for name, args in (
+            ("run_sql", _cases()["run_sql.events_by_tag"]),
+            ("search_sop", {"text": "compressor shutdown", "top_k": 5}),
+        ):
+            samples = await measure_async(
+                lambda: call_mcp_tool(session, name, args), iterations
+            )
+            results.append(
+                make_result(SUITE, f"mcp.{name}", {"events": size}, samples)
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="run_sql/search_sop benchmarks against DB_PATH "
+        "(normally invoked by benchmarks.run)."
+    )
+    parser.add_argument("--size", type=int, required=True)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    params = {"events": args.size}
+    results: List[Result] = []
+
+    for name, case in _cases().items():
+        def cold() -> Any:
+            server.RESULT_CACHE.clear()
+            return server._run_sql(**case)
+
+        results.append(
+            make_result(
+                SUITE, name, {**params, "cache": "cold"}, measure(cold, args.iterations)
+            )
+        )
+        results.append(
+            make_result(
+                SUITE,
+                name,
+                {**params, "cache": "warm"},
+                measure(lambda: server._run_sql(**case), args.iterations),
+            )
+        )
+
+    for text in ("compressor shutdown", "lockout"):
+        for mode in server.SEARCH_MODES:
+            results.append(
+                make_result(
+                    SUITE,
+                    "search_sop",
+                    {**params, "text": text, "mode": mode},
+                    measure(
+                        lambda: server._search_sop(text, 5, mode), args.iterations
+                    ),
+                )
+            )
+
+    for window in ("24h", "30d"):
+        results.append(
+            make_result(
+                SUITE,
+                "equipment_summary",
+                {**params, "window": window},
+                measure(
+                    lambda: server._equipment_summary("COMP-01", window, None),
+                    args.iterations,
+                ),
+            )
+        )
+
+    by_tag = _cases()["run_sql.events_by_tag"]
+    for workers in (1, 4):
+        def uncached() -> Any:
+            server.RESULT_CACHE.clear()
+            return server._run_sql(**by_tag)
+
+        results.append(
+            make_result(
+                SUITE,
+                "run_sql.throughput",
+                {**params, "workers": workers},
+                _throughput(uncached, args.iterations * 2, workers),
+            )
+        )
+
+    results.extend(asyncio.run(_mcp_roundtrip(args.iterations, args.size)))
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
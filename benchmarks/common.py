@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+Result = Dict[str, Any]
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """Latency stats in milliseconds plus throughput for one benchmark case."""
+    ordered = sorted(samples)
+    n = len(ordered)
+    mean = statistics.fmean(ordered)
+    return {
+        "n": n,
+        "mean_ms": round(mean * 1000, 4),
+        "p50_ms": round(ordered[n // 2] * 1000, 4),
+        "p95_ms": round(ordered[min(n - 1, int(n * 0.95))] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "ops_per_s": round(1 / mean, 2) if mean > 0 else None,
+    }
+
+
+def make_result(
+    suite: str, name: str, params: Dict[str, Any], samples: List[float]
+) -> Result:
+    return {"suite": suite, "name": name, "params": params, **summarize(samples)}
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 3) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def measure_async(
+    fn: Callable[[], Awaitable[Any]], iterations: int, warmup: int = 3
+) -> List[float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def emit(results: List[Result]) -> None:
+    # Subprocess benchmarks print one JSON document on the last stdout line.
+    sys.stdout.write(json.dumps(results) + "\n")
+
+
+def run_module(
+    module: str, args: List[str], env: Optional[Dict[str, str]] = None
+) -> List[Result]:
+    """
+    Run a benchmark module in a fresh interpreter. The MCP server and the CLI
+    read their configuration at import time, so each database size needs its
+    own process.
+    """
+    proc_env = {**os.environ, **(env or {})}
+    proc_env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(ROOT_DIR), proc_env.get("PYTHONPATH", "")) if p
+    )
+    proc = subprocess.run(
+        [sys.executable, "-m", module, *args],
+        cwd=ROOT_DIR,
+        env=proc_env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module} failed:\n{proc.stderr[-4000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+Key = Tuple[str, str, str]
+
+
+def _index(path: str) -> Dict[Key, Dict[str, Any]]:
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {
+        (r["suite"], r["name"], json.dumps(r["params"], sort_keys=True)): r
+        for r in report["results"]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare p50 latency between two benchmarks.run reports."
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p50_ms")
+    args = parser.parse_args()
+
+    baseline = _index(args.baseline)
+    candidate = _index(args.candidate)
+    print(f"{'case':<70} {'baseline':>10} {'candidate':>10} {'ratio':>7}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before = baseline[key][args.metric]
+        after = candidate[key][args.metric]
+        ratio = after / before if before else float("nan")
+        case = f"{key[0]}.{key[1]} {key[2]}"
+        print(f"{case[:70]:<70} {before:>10.3f} {after:>10.3f} {ratio:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from infra.embeddings import make_embedder
+from persistence.db import create_sqlite_engine
+from persistence.rollups import ingest_rollups
+from scripts.build_sop_index import build_sop_index
+from scripts.seed_factory_db import SOP_EMBEDDER, seed
+
+_SOP_TOPICS = (
+    ("startup", "Verify oil level, open discharge valve, start in local mode"),
+    ("shutdown", "Unload, isolate power, close valves, apply lockout-tagout"),
+    ("inspection", "Inspect belts, clean intake filter, check coupling alignment"),
+    ("calibration", "Verify calibration status and record the certificate number"),
+    ("cleaning", "Run empty cycle, clean contact parts and release line clearance"),
+)
+_SOP_EQUIPMENT = ("compressor", "chiller", "packaging line", "boiler", "pump")
+
+
+def build_scaled_factory_db(db_path: str, events: int) -> str:
+    """
+    Seed the demo dataset and scale it up: `events` compressor_events, with
+    alarm_history/maintenance_log and sop sized proportionally. Base rows are
+    replicated with shifted ids and timestamps, so the value distribution of
+    the demo data is preserved.
+    """
+    path = Path(db_path)
+    path.unlink(missing_ok=True)
+    seed(str(path))
+
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            _replicate(conn, "compressor_events", ("event_ts",), events)
+            _replicate(conn, "maintenance_log", ("event_ts",), max(6, events // 4))
+            _replicate(
+                conn, "alarm_history", ("started_at", "ended_at"), max(4, events // 6)
+            )
+            _add_sops(conn, max(6, events // 50))
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    engine = create_sqlite_engine(str(path))
+    build_sop_index(engine, make_embedder(SOP_EMBEDDER))
+    ingest_rollups(engine)
+    engine.dispose()
+    return str(path)
+
+
+def _replicate(
+    conn: sqlite3.Connection, table: str, ts_columns: tuple, target: int
+) -> None:
+    base = conn.execute(f"SELECT COUNT(*), MAX(id) FROM {table}").fetchone()
+    base_count, max_id = base[0], base[1] or 0
+    if base_count == 0 or target <= base_count:
+        return
+
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    copied = [c for c in columns if c != "id" and c not in ts_columns]
+    shifted = [
+        f"strftime('%Y-%m-%dT%H:%M:%S', t.{c}, '-' || k.n || ' days')"
+        for c in ts_columns
+    ]
+    copies = -(-target // base_count) - 1
+    # Each copy k shifts ids by k * max_id and timestamps back by k days.
+    conn.execute(
+        f"""
+        WITH RECURSIVE k(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM k WHERE n < ?)
+        INSERT INTO {table} (id, {", ".join(ts_columns)}, {", ".join(copied)})
+        SELECT
+            t.id + k.n * ?,
+            {", ".join(shifted)},
+            {", ".join(f"t.{c}" for c in copied)}
+        FROM {table} t, k
+        WHERE t.id <= ?
+        LIMIT ?
+        """,
+        (copies, max_id, max_id, target - base_count),
+    )
+
+
+def _add_sops(conn: sqlite3.Connection, target: int) -> None:
+    (count,) = conn.execute("SELECT COUNT(*) FROM sop").fetchone()
+    rows = []
+    for i in range(count + 1, target + 1):
+        topic, content = _SOP_TOPICS[i % len(_SOP_TOPICS)]
+        equipment = _SOP_EQUIPMENT[(i // len(_SOP_TOPICS)) % len(_SOP_EQUIPMENT)]
+        rows.append(
+            (
+                i,
+                f"SOP-GEN-{i:05d}",
+                f"{equipment.title()} {topic} procedure #{i}",
+                "Generated",
+                "v1.0",
+                f"{content} for {equipment} unit {i}. Record results in the log.",
+            )
+        )
+    conn.executemany(
+        "INSERT INTO sop (id, code, title, area, version, content) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
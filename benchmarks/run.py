@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import ROOT_DIR, Result, run_module
+from benchmarks.data import build_scaled_factory_db
+
+SUITES = ("tools", "memory", "chat", "timeseries")
+
+
+def _git_revision() -> str:
+    proc = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return proc.stdout.strip() or "unknown"
+
+
+def _metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "sizes": args.sizes,
+        "iterations": args.iterations,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the benchmark suites and write one JSON report."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda v: [int(x) for x in v.split(",") if x],
+        default=[1_000, 10_000, 100_000],
+        help="compressor_events row counts, comma separated",
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument(
+        "--suites",
+        type=lambda v: [x for x in v.split(",") if x],
+        default=list(SUITES),
+        help=f"subset of {','.join(SUITES)}",
+    )
+    parser.add_argument("--output", help="JSON file (default: stdout)")
+    args = parser.parse_args()
+
+    results: List[Result] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            if "timeseries" in args.suites:
+                print(f"[bench] timeseries events={size}", file=sys.stderr)
+                results.extend(
+                    run_module(
+                        "benchmarks.bench_timeseries",
+                        ["--size", str(size), "--iterations", str(args.iterations)],
+                    )
+                )
+            if not {"tools", "chat"} & set(args.suites):
+                continue
+            db_path = build_scaled_factory_db(
+                str(Path(tmp) / f"factory_{size}.db"), size
+            )
+            env = {"DB_PATH": db_path}
+            print(f"[bench] events={size}", file=sys.stderr)
+            if "tools" in args.suites:
+                results.extend(
+                    run_module(
+                        "benchmarks.bench_tools",
+                        ["--size", str(size), "--iterations", str(args.iterations)],
+                        env,
+                    )
+                )
+            if "chat" in args.suites:
+                results.extend(
+                    run_module(
+                        "benchmarks.bench_chat_turn",
+                        ["--size", str(size), "--turns", str(args.turns)],
+                        env,
+                    )
+                )
+
+        if "memory" in args.suites:
+            print("[bench] memory store", file=sys.stderr)
+            results.extend(
+                run_module(
+                    "benchmarks.bench_memory",
+                    [
+                        "--messages",
+                        str(args.messages),
+                        "--iterations",
+                        str(args.iterations),
+                    ],
+                )
+            )
+
+    report = {"meta": _metadata(args), "results": results}
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
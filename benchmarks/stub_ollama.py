@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Union
+
+EVENTS_QUERY = (
+    "SELECT ce.id, e.tag, ce.event_ts, ce.event_type, ce.severity, ce.value "
+    "FROM compressor_events ce JOIN equipment e ON e.id = ce.equipment_id "
+    "WHERE UPPER(e.tag) = :tag ORDER BY ce.event_ts DESC"
+)
+# Ollama's default when a request carries no keep_alive.
+DEFAULT_KEEP_ALIVE_S = 300.0
+_DURATION_RE = re.compile(r"^(-?\d+(?:\.\d+)?)(ms|s|m|h)?$")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def keep_alive_seconds(value: Union[str, float, None]) -> float:
+    """Seconds a model stays loaded after a request; negative means forever."""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE_S
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        return DEFAULT_KEEP_ALIVE_S
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2) or "s"]
+
+
+def _reply(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Deterministic assistant: call run_sql first, then summarize the result."""
+    if messages and messages[-1].get("role") == "tool":
+        return {
+            "role": "assistant",
+            "content": "Resumo: eventos recentes do COMP-01 listados acima.",
+        }
+    return {
+        "role": "assistant",
+        "content": "",
+        "tool_calls": [
+            {
+                "function": {
+                    "name": "run_sql",
+                    "arguments": {
+                        "query": EVENTS_QUERY,
+                        "params": {"tag": "COMP-01"},
+                        "limit": 20,
+                    },
+                }
+            }
+        ],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_StubHTTPServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/api/chat":
+            self.send_error(404)
+            return
+
+        self.server.stub.generate(body)
+        message = _reply(body.get("messages", []))
+        done = {"model": body.get("model", "stub"), "done": True}
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        if body.get("stream", True):
+            chunk = {**done, "done": False, "message": message}
+            final = {**done, "message": {"role": "assistant", "content": ""}}
+            self.wfile.write((json.dumps(chunk) + "\n").encode())
+            self.wfile.write((json.dumps(final) + "\n").encode())
+        else:
+            self.wfile.write(json.dumps({**done, "message": message}).encode())
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "StubOllamaServer"
+
+
+class StubOllamaServer:
+    """
+    Minimal /api/chat server on a free local port, for benchmarks. Each
+    request takes `latency` seconds; with `parallel` set only that many run at
+    once and the rest wait, like OLLAMA_NUM_PARALLEL. A request that finds the
+    model unloaded (keep_alive expired, or a different num_ctx) pays
+    `load_time` first. Requests, loads and peak concurrency are recorded.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency: float = 0.0,
+        parallel: Optional[int] = None,
+        load_time: float = 0.0,
+    ):
+        self._lock = threading.Lock()
+        self.configure(latency=latency, parallel=parallel, load_time=load_time)
+        self._httpd = _StubHTTPServer((host, port), _Handler)
+        self._httpd.stub = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def configure(
+        self,
+        *,
+        latency: float = 0.0,
+        parallel: Optional[int] = None,
+        load_time: float = 0.0,
+    ) -> None:
+        """Change the timing model and reset the counters (no requests in flight)."""
+        self.latency = latency
+        self.load_time = load_time
+        self._gate = threading.BoundedSemaphore(parallel) if parallel else None
+        self._loaded: Dict[str, Dict[str, Any]] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self.loads = 0
+        self.active = 0
+        self.max_active = 0
+
+    def _needs_load(self, model: str, num_ctx: Any, now: float) -> bool:
+        loaded = self._loaded.get(model)
+        if loaded is None or loaded["num_ctx"] != num_ctx:
+            return True
+        return loaded["expires_at"] is not None and now > loaded["expires_at"]
+
+    def generate(self, body: Dict[str, Any]) -> None:
+        """Account for one request and sleep for its load + generation time."""
+        model = body.get("model", "stub")
+        num_ctx = (body.get("options") or {}).get("num_ctx")
+        keep_alive = keep_alive_seconds(body.get("keep_alive"))
+        if self._gate is not None:
+            self._gate.acquire()
+        try:
+            with self._lock:
+                self.requests.append(
+                    {
+                        "model": model,
+                        "keep_alive": body.get("keep_alive"),
+                        "options": body.get("options"),
+                    }
+                )
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                load = self._needs_load(model, num_ctx, time.monotonic())
+                if load:
+                    self.loads += 1
+            time.sleep((self.load_time if load else 0.0) + self.latency)
+            with self._lock:
+                self.active -= 1
+                now = time.monotonic()
+                self._loaded[model] = {
+                    "num_ctx": num_ctx,
+                    "expires_at": now + keep_alive if keep_alive >= 0 else None,
+                }
+        finally:
+            if self._gate is not None:
+                self._gate.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": len(self.requests),
+                "loads": self.loads,
+                "max_active": self.max_active,
+            }
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubOllamaServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from persistence.memory_store import ChatMemoryStore, StoredMessage
+
+Message = Dict[str, Any]
+Summarizer = Callable[[str, List[Message]], Awaitable[str]]
+
+# Per-message framing overhead (role, separators) in the chat template.
+_MESSAGE_OVERHEAD_TOKENS = 4
+_FOLDED_TOOL_CHARS = 400
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting purposes.
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message: Message) -> int:
+    return _MESSAGE_OVERHEAD_TOKENS + estimate_tokens(str(message.get("content", "")))
+
+
+def split_turns(messages: List[Message]) -> List[List[Message]]:
+    """Group messages into turns; each turn starts at a user message."""
+    turns: List[List[Message]] = []
+    for message in messages:
+        if message.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def transcript(messages: List[Message]) -> str:
+    lines = []
+    for message in messages:
+        content = str(message.get("content", ""))
+        if message.get("role") == "tool" and len(content) > _FOLDED_TOOL_CHARS:
+            content = content[:_FOLDED_TOOL_CHARS] + "..."
+        lines.append(f"{message.get('role')}: {content}")
+    return "\n".join(lines)
+
+
+def fallback_summary(previous: str, folded: List[Message]) -> str:
+    questions = [
+        str(m.get("content", ""))[:120] for m in folded if m.get("role") == "user"
+    ]
+    parts = [previous] if previous else []
+    parts.extend(f"- usuario perguntou: {q}" for q in questions)
+    return "\n".join(parts)
+
+
+class ContextWindow:
+    """
+    Keeps the prompt within a token budget: the last `keep_turns` turns stay
+    verbatim and older turns are folded into the conversation summary stored
+    in ChatMemoryStore. Summaries are generated in the background.
+    """
+
+    def __init__(
+        self,
+        store: ChatMemoryStore,
+        conv_id: str,
+        *,
+        max_tokens: int = 6000,
+        keep_turns: int = 6,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.store = store
+        self.conv_id = conv_id
+        self.max_tokens = max_tokens
+        self.keep_turns = max(1, keep_turns)
+        self.summarizer = summarizer
+        self.summary = store.get_summary(conv_id)
+        self._pending: Optional["asyncio.Task[None]"] = None
+
+    def switch(self, conv_id: str) -> None:
+        self.conv_id = conv_id
+        self.summary = self.store.get_summary(conv_id)
+
+    def summary_message(self) -> Optional[Message]:
+        if not self.summary:
+            return None
+        return {
+            "role": "system",
+            "content": f"Resumo da conversa ate aqui:\n{self.summary}",
+        }
+
+    def build(self, messages: List[Message]) -> List[Message]:
+        """Prompt to send: system messages, summary, then the recent history."""
+        system = [m for m in messages if m.get("role") == "system"]
+        history = [m for m in messages if m.get("role") != "system"]
+        summary = self.summary_message()
+        return system + ([summary] if summary else []) + history
+
+    def compact(self, messages: List[Message]) -> None:
+        """
+        Fold turns that fall outside the window out of `messages` (in place)
+        and schedule a background summary update for them.
+        """
+        system = [m for m in messages if m.get("role") == "system"]
+        turns = split_turns([m for m in messages if m.get("role") != "system"])
+
+        fixed_tokens = sum(message_tokens(m) for m in system)
+        fixed_tokens += estimate_tokens(self.summary) + _MESSAGE_OVERHEAD_TOKENS
+
+        keep = turns[-self.keep_turns :]
+        while len(keep) > 1 and fixed_tokens + sum(
+            message_tokens(m) for turn in keep for m in turn
+        ) > self.max_tokens:
+            keep = keep[1:]
+
+        folded = [m for turn in turns[: len(turns) - len(keep)] for m in turn]
+        if not folded:
+            return
+
+        messages[:] = system + [m for turn in keep for m in turn]
+        self._schedule_summary(folded)
+
+    def _schedule_summary(self, folded: List[Message]) -> None:
+        # Updates are chained so each one builds on the previous summary.
+        previous = self._pending
+        self._pending = asyncio.create_task(
+            self._summarize(previous, self.conv_id, folded)
+        )
+
+    async def _summarize(
+        self,
+        previous: Optional["asyncio.Task[None]"],
+        conv_id: str,
+        folded: List[Message],
+    ) -> None:
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        current = await asyncio.to_thread(self.store.get_summary, conv_id)
+        summary = ""
+        if self.summarizer is not None:
+            try:
+                summary = (await self.summarizer(current, folded)).strip()
+            except Exception:
+                summary = ""
+        if not summary:
+            summary = fallback_summary(current, folded)
+        await asyncio.to_thread(self.store.set_summary, conv_id, summary)
+        if conv_id == self.conv_id:
+            self.summary = summary
+
+    async def wait(self) -> None:
+        if self._pending is not None:
+            await asyncio.gather(self._pending, return_exceptions=True)
+
+    def load_history(self, limit: int = 50) -> List[Message]:
+        """Load stored messages, newest first, until the token budget is spent."""
+        budget = self.max_tokens - estimate_tokens(self.summary)
+        stored: List[StoredMessage] = self.store.load_messages(self.conv_id, limit)
+        loaded: List[Message] = []
+        for row in reversed(stored):
+            message = {"role": row.role, "content": row.content}
+            budget -= message_tokens(message)
+            if budget < 0:
+                break
+            loaded.append(message)
+        loaded.reverse()
+        # Never start the window in the middle of a turn.
+        while loaded and loaded[0]["role"] != "user":
+            loaded.pop(0)
+        return loaded
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import unicodedata
+from typing import List, Protocol, Sequence
+
+Vector = List[float]
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder(Protocol):
+    name: str
+
+    def embed(self, texts: Sequence[str]) -> List[Vector]: ...
+
+
+def _normalize(vector: Vector) -> Vector:
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0.0:
+        return vector
+    return [v / norm for v in vector]
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class HashingEmbedder:
+    """
+    Offline stand-in for a real embedding model: words and character
+    trigrams hashed into `dim` signed buckets, L2-normalized. It catches
+    inflections and partial words ("stopping" ~ "stop") but has no notion of
+    synonyms; use an Ollama embedding model for that.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for word in _WORD_RE.findall(_fold(text)):
+            features.append(f"w:{word}")
+            padded = f"#{word}#"
+            features.extend(f"t:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: Sequence[str]) -> List[Vector]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dim
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                weight = 1.0 if feature.startswith("w:") else 0.5
+                vector[value % self.dim] += weight if value >> 63 else -weight
+            vectors.append(_normalize(vector))
+        return vectors
+
+
+class OllamaEmbedder:
+    def __init__(self, model: str, host: str | None = None, batch_size: int = 32):
+        from ollama import Client
+
+        self.model = model
+        self.name = f"ollama:{model}"
+        self.batch_size = batch_size
+        self._client = Client(host=host)
+
+    def embed(self, texts: Sequence[str]) -> List[Vector]:
+        vectors: List[Vector] = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = list(texts[start : start + self.batch_size])
+            response = self._client.embed(model=self.model, input=batch)
+            vectors.extend(_normalize(list(v)) for v in response.embeddings)
+        return vectors
+
+
+def make_embedder(spec: str) -> Embedder:
+    """
+    "hashing" / "hashing:<dim>" -> HashingEmbedder,
+    "ollama:<model>" (e.g. "ollama:nomic-embed-text") -> OllamaEmbedder.
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "hashing":
+        return HashingEmbedder(int(arg) if arg else 512)
+    if kind == "ollama" and arg:
+        return OllamaEmbedder(arg)
+    raise ValueError(f"Unknown embedder: {spec!r}")
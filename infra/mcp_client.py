@@ -1,10 +1,36 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
-from typing import Any, Dict
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+import anyio
 from mcp import ClientSession
-from mcp.types import TextContent
+from mcp.client.streamable_http import streamable_http_client
+from mcp.shared.exceptions import McpError
+from mcp.types import ListToolsResult, TextContent
+
+# Failures that mean the session itself is gone, not that the tool failed.
+CONNECTION_ERRORS = (
+    ConnectionError,
+    OSError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+)
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    # A slow tool hitting call_timeout leaves the session healthy; dropped
+    # connections show up as transport errors or a failed ping. TimeoutError
+    # is an OSError subclass, hence the explicit check.
+    if isinstance(exc, TimeoutError):
+        return False
+    if isinstance(exc, CONNECTION_ERRORS):
+        return True
+    # The server restarted and no longer knows our MCP session id.
+    return isinstance(exc, McpError) and "session terminated" in str(exc).lower()
 
 
 def _parse_json_text(value: str) -> Any:
@@ -17,11 +43,34 @@ def _parse_json_text(value: str) -> Any:
         return {"text": text}
 
 
+def is_columnar(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and isinstance(value.get("columns"), list)
+        and isinstance(value.get("rows"), list)
+    )
+
+
+def columnar_to_records(value: Dict[str, Any]) -> List[Dict[str, Any]]:
+    columns = value["columns"]
+    return [dict(zip(columns, row)) for row in value["rows"]]
+
+
+def dump_tool_result(tool_result: Any) -> str:
+    # Columnar results are meant to be compact: drop the separator padding too.
+    if is_columnar(tool_result):
+        return json.dumps(tool_result, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(tool_result, ensure_ascii=False)
+
+
 async def call_mcp_tool(session: ClientSession, name: str, args: Dict[str, Any]) -> Any:
     result = await session.call_tool(name, arguments=args)
 
     payload = result.structuredContent
     if payload is not None:
+        # FastMCP wraps non-object return values as {"result": ...}.
+        if isinstance(payload, dict) and set(payload) == {"result"}:
+            return payload["result"]
         return payload
 
     texts = [
@@ -40,5 +89,229 @@ def to_tool_payload(tool_name: str, tool_result: Any) -> Dict[str, Any]:
     return {
         "role": "tool",
         "tool_name": tool_name,
-        "content": json.dumps(tool_result, ensure_ascii=False),
+        "content": dump_tool_result(tool_result),
     }
+
+
+class _PooledSession:
+    """One initialized ClientSession, owned by its own long-lived task."""
+
+    def __init__(self, pool: "MCPSessionPool", index: int):
+        self.pool = pool
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.ready = asyncio.Event()
+        self.in_flight = 0
+        self._broken = asyncio.Event()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"mcp-session-{self.index}")
+
+    def mark_broken(self) -> None:
+        self.ready.clear()
+        self._broken.set()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await self._task
+
+    async def _run(self) -> None:
+        # streamable_http_client/ClientSession must be entered and exited in
+        # the same task, so the whole connection lifetime lives here.
+        delay = self.pool.initial_backoff
+        while True:
+            try:
+                async with streamable_http_client(self.pool.url) as (
+                    read_stream,
+                    write_stream,
+                    _,
+                ):
+                    async with ClientSession(read_stream, write_stream) as session:
+                        await asyncio.wait_for(
+                            session.initialize(), self.pool.connect_timeout
+                        )
+                        self.session = session
+                        self._broken.clear()
+                        self.ready.set()
+                        self.pool.connects += 1
+                        delay = self.pool.initial_backoff
+                        await self._keepalive(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.pool.connect_failures += 1
+            finally:
+                self.ready.clear()
+                self.session = None
+
+            self.pool.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.pool.max_backoff)
+
+    async def _keepalive(self, session: ClientSession) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._broken.wait(), self.pool.keepalive_interval
+                )
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.wait_for(session.send_ping(), self.pool.connect_timeout)
+                self.pool.pings += 1
+            except Exception:
+                return
+
+
+class MCPSessionPool:
+    """
+    Pool of warm MCP sessions shared by any number of conversations.
+
+    Each session is opened and initialized once, pinged every
+    `keepalive_interval` seconds and reopened with exponential backoff when
+    the connection drops. A session multiplexes concurrent requests, so
+    calls go to the least busy ready session; at most `max_concurrency` tool
+    calls are in flight across the pool. `list_tools` is cached for
+    `tools_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        size: int = 2,
+        max_concurrency: int = 4,
+        keepalive_interval: float = 30.0,
+        connect_timeout: float = 10.0,
+        call_timeout: float = 60.0,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        tools_ttl: float = 300.0,
+    ):
+        self.url = url
+        self.size = max(1, size)
+        self.max_concurrency = max(1, max_concurrency)
+        self._call_slots = asyncio.Semaphore(self.max_concurrency)
+        self.keepalive_interval = keepalive_interval
+        self.connect_timeout = connect_timeout
+        self.call_timeout = call_timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.tools_ttl = tools_ttl
+        self._slots: List[_PooledSession] = []
+        self._tools: Optional[ListToolsResult] = None
+        self._tools_expires_at = 0.0
+        self.connects = 0
+        self.connect_failures = 0
+        self.reconnects = 0
+        self.pings = 0
+        self.calls = 0
+        self.call_retries = 0
+        self.call_timeouts = 0
+        self.tools_cache_hits = 0
+
+    async def start(self) -> None:
+        self._slots = [_PooledSession(self, i) for i in range(self.size)]
+        for slot in self._slots:
+            slot.start()
+        await self._acquire()
+
+    async def close(self) -> None:
+        await asyncio.gather(*(slot.stop() for slot in self._slots))
+        self._slots = []
+
+    async def __aenter__(self) -> "MCPSessionPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def _acquire(self) -> _PooledSession:
+        ready = [slot for slot in self._slots if slot.ready.is_set()]
+        if not ready:
+            waiters = [asyncio.create_task(slot.ready.wait()) for slot in self._slots]
+            try:
+                done, _ = await asyncio.wait(
+                    waiters,
+                    timeout=self.connect_timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+            if not done:
+                raise ConnectionError(f"MCP server unavailable at {self.url}")
+            ready = [slot for slot in self._slots if slot.ready.is_set()]
+        return min(ready, key=lambda slot: slot.in_flight)
+
+    @contextlib.asynccontextmanager
+    async def session(self) -> AsyncIterator[ClientSession]:
+        slot = await self._acquire()
+        if slot.session is None:
+            raise ConnectionError(f"MCP server unavailable at {self.url}")
+        slot.in_flight += 1
+        try:
+            yield slot.session
+        except Exception as exc:
+            if is_connection_error(exc):
+                slot.mark_broken()
+            raise
+        finally:
+            slot.in_flight -= 1
+
+    async def call_tool(self, name: str, args: Dict[str, Any], retries: int = 1) -> Any:
+        self.calls += 1
+        async with self._call_slots:
+            return await self._call_tool(name, args, retries)
+
+    async def _call_tool(self, name: str, args: Dict[str, Any], retries: int) -> Any:
+        for attempt in range(retries + 1):
+            try:
+                async with self.session() as session:
+                    return await asyncio.wait_for(
+                        call_mcp_tool(session, name, args), self.call_timeout
+                    )
+            except asyncio.TimeoutError:
+                # Not retried: the tool may still be running on the server.
+                self.call_timeouts += 1
+                raise TimeoutError(
+                    f"MCP tool {name} timed out after {self.call_timeout:g}s"
+                ) from None
+            except Exception as exc:
+                if attempt == retries or not is_connection_error(exc):
+                    raise
+                self.call_retries += 1
+        raise AssertionError("unreachable")
+
+    async def list_tools(self) -> ListToolsResult:
+        now = time.monotonic()
+        if self._tools is not None and now < self._tools_expires_at:
+            self.tools_cache_hits += 1
+            return self._tools
+        async with self.session() as session:
+            self._tools = await asyncio.wait_for(
+                session.list_tools(), self.call_timeout
+            )
+        self._tools_expires_at = now + self.tools_ttl
+        return self._tools
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "max_concurrency": self.max_concurrency,
+            "ready": sum(slot.ready.is_set() for slot in self._slots),
+            "in_flight": sum(slot.in_flight for slot in self._slots),
+            "connects": self.connects,
+            "connect_failures": self.connect_failures,
+            "reconnects": self.reconnects,
+            "pings": self.pings,
+            "calls": self.calls,
+            "call_retries": self.call_retries,
+            "call_timeouts": self.call_timeouts,
+            "tools_cache_hits": self.tools_cache_hits,
+        }
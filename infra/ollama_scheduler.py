@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, AsyncIterator, Deque, Dict, List, Tuple, Union
+
+WAIT_SAMPLES = 1000
+
+
+class Priority(IntEnum):
+    """Lower runs first."""
+
+    # Final answers: the operator is waiting and the tools already ran.
+    FINAL = 0
+    FIRST = 1
+    # Forced retries are speculative: the deterministic fallback covers them.
+    RETRY = 2
+    # Background summaries never block a turn.
+    SUMMARY = 3
+
+
+@dataclass
+class Ticket:
+    model: str
+    priority: Priority
+    wait_s: float = 0.0
+
+
+class _ModelQueue:
+    def __init__(self) -> None:
+        self.in_flight = 0
+        # (priority, seq, future); the sequence keeps FIFO order per priority.
+        self.waiting: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+
+
+class OllamaScheduler:
+    """
+    Admission control for Ollama requests. At most `max_in_flight` requests
+    per model run at once (0 = no limit); the rest wait in a priority queue
+    (FINAL > FIRST > RETRY > SUMMARY, FIFO within a priority). Keeping the
+    cap at the server's parallel slots (OLLAMA_NUM_PARALLEL) lets Ollama batch
+    what it can run and keeps the rest from piling onto it. Every request
+    carries the same keep_alive/num_ctx, since a request with a different
+    num_ctx makes Ollama reload the model.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 2,
+        *,
+        keep_alive: Union[str, float, None] = None,
+        num_ctx: int = 0,
+    ):
+        self.max_in_flight = max(0, max_in_flight)
+        self.keep_alive = keep_alive if keep_alive not in ("", None) else None
+        self.num_ctx = num_ctx
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._seq = itertools.count()
+        self._waits: Dict[Priority, Deque[float]] = {
+            priority: deque(maxlen=WAIT_SAMPLES) for priority in Priority
+        }
+        self._requests: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.cancelled = 0
+
+    def request_options(self) -> Dict[str, Any]:
+        """keep_alive/options kwargs for ollama chat()."""
+        kwargs: Dict[str, Any] = {}
+        if self.keep_alive is not None:
+            kwargs["keep_alive"] = self.keep_alive
+        if self.num_ctx > 0:
+            kwargs["options"] = {"num_ctx": self.num_ctx}
+        return kwargs
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            queue = self._queues[model] = _ModelQueue()
+        return queue
+
+    def _has_slot(self, queue: _ModelQueue) -> bool:
+        return not self.max_in_flight or queue.in_flight < self.max_in_flight
+
+    @staticmethod
+    def _queued(queue: _ModelQueue) -> int:
+        # Cancelled waiters stay in the heap until a release pops them.
+        return sum(not future.done() for _, _, future in queue.waiting)
+
+    async def _acquire(self, model: str, priority: Priority) -> None:
+        queue = self._queue(model)
+        if self._has_slot(queue) and not self._queued(queue):
+            queue.in_flight += 1
+            return
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.waiting, (int(priority), next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the cancellation.
+                self._release(model)
+            raise
+
+    def _release(self, model: str) -> None:
+        queue = self._queue(model)
+        queue.in_flight -= 1
+        while queue.waiting and self._has_slot(queue):
+            _, _, future = heapq.heappop(queue.waiting)
+            if future.done():
+                continue
+            queue.in_flight += 1
+            future.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self, model: str, priority: Priority = Priority.FIRST
+    ) -> AsyncIterator[Ticket]:
+        """Wait for a free slot of `model`; the ticket records the queue wait."""
+        started = time.perf_counter()
+        await self._acquire(model, priority)
+        ticket = Ticket(model, priority, time.perf_counter() - started)
+        self._requests[priority] += 1
+        self._waits[priority].append(ticket.wait_s)
+        try:
+            yield ticket
+        finally:
+            self._release(model)
+
+    def stats(self) -> Dict[str, Any]:
+        def _describe(values: Deque[float]) -> Dict[str, Any]:
+            if not values:
+                return {}
+            ordered = sorted(values)
+            return {
+                "wait_avg_s": round(statistics.fmean(ordered), 4),
+                "wait_p50_s": round(ordered[len(ordered) // 2], 4),
+                "wait_p95_s": round(ordered[int(len(ordered) * 0.95)], 4),
+                "wait_max_s": round(ordered[-1], 4),
+            }
+
+        return {
+            "max_in_flight": self.max_in_flight,
+            "keep_alive": self.keep_alive,
+            "num_ctx": self.num_ctx or None,
+            "cancelled": self.cancelled,
+            "models": {
+                model: {"in_flight": queue.in_flight, "queued": self._queued(queue)}
+                for model, queue in self._queues.items()
+            },
+            "priorities": {
+                priority.name.lower(): {
+                    "requests": self._requests[priority],
+                    **_describe(self._waits[priority]),
+                }
+                for priority in Priority
+                if self._requests[priority]
+            },
+        }
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ollama import AsyncClient
+
+from domain.schemas.ollama import OllamaMessage, OllamaResponse, ToolCall
+
+
+@dataclass
+class StreamTiming:
+    ttft_s: Optional[float]
+    total_s: float
+    chunks: int
+
+
+@dataclass
+class StreamedChat:
+    response: OllamaResponse
+    timing: StreamTiming
+
+
+@dataclass
+class StreamMetrics:
+    """Time-to-first-token and total latency of streamed completions."""
+
+    ttft_s: List[float] = field(default_factory=list)
+    total_s: List[float] = field(default_factory=list)
+
+    def record(self, timing: StreamTiming) -> None:
+        self.total_s.append(timing.total_s)
+        if timing.ttft_s is not None:
+            self.ttft_s.append(timing.ttft_s)
+
+    def summary(self) -> Dict[str, Any]:
+        def _describe(values: List[float]) -> Dict[str, Any]:
+            if not values:
+                return {"count": 0}
+            ordered = sorted(values)
+            return {
+                "count": len(ordered),
+                "avg_s": round(statistics.fmean(ordered), 4),
+                "p50_s": round(ordered[len(ordered) // 2], 4),
+                "max_s": round(ordered[-1], 4),
+            }
+
+        return {"ttft": _describe(self.ttft_s), "total": _describe(self.total_s)}
+
+
+async def stream_chat(
+    client: AsyncClient,
+    model: str,
+    messages: Sequence[Dict[str, Any]],
+    tools: Sequence[Dict[str, Any]],
+    on_token: Optional[Callable[[str], None]] = None,
+    on_tool_call: Optional[Callable[[ToolCall], None]] = None,
+    **request_options: Any,
+) -> StreamedChat:
+    """
+    Stream a chat completion. Content tokens are handed to `on_token` as they
+    arrive and each tool call to `on_tool_call` as soon as its chunk is parsed,
+    so callers can start tool execution before the completion finishes.
+    `request_options` (keep_alive, options) are passed through to chat().
+    """
+    started = time.perf_counter()
+    ttft: Optional[float] = None
+    chunks = 0
+    role = "assistant"
+    content: List[str] = []
+    tool_calls: List[ToolCall] = []
+
+    stream = await client.chat(
+        model=model,
+        messages=list(messages),
+        tools=list(tools),
+        stream=True,
+        **request_options,
+    )
+    async for chunk in stream:
+        chunks += 1
+        message = chunk.message
+        role = message.role or role
+        token = message.content or ""
+        new_calls = [ToolCall.model_validate(tc) for tc in message.tool_calls or ()]
+
+        if ttft is None and (token or new_calls):
+            ttft = time.perf_counter() - started
+        if token:
+            content.append(token)
+            if on_token is not None:
+                on_token(token)
+        for tool_call in new_calls:
+            tool_calls.append(tool_call)
+            if on_tool_call is not None:
+                on_tool_call(tool_call)
+
+    response = OllamaResponse(
+        message=OllamaMessage(
+            role=role, content="".join(content), tool_calls=tool_calls
+        )
+    )
+    timing = StreamTiming(
+        ttft_s=ttft, total_s=time.perf_counter() - started, chunks=chunks
+    )
+    return StreamedChat(response=response, timing=timing)
@@ -5,9 +5,29 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     MCP_URL: str = "http://127.0.0.1:8000/mcp"
+    MCP_POOL_SIZE: int = 2
+    MCP_KEEPALIVE_INTERVAL: float = 30.0
     OLLAMA_MODEL: str = "qwen3:0.6b"
+    OLLAMA_STREAM: bool = False
+    OLLAMA_MAX_IN_FLIGHT: int = 2
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_NUM_CTX: int = 0
     MEMORY_DB: str = "memory.db"
+    MEMORY_WRITE_BEHIND: bool = True
+    MEMORY_ENGINE_PROFILE: str = "default"
+    CONTEXT_MAX_TOKENS: int = 6000
+    CONTEXT_KEEP_TURNS: int = 6
+    INTENT_ROUTER_MIN_CONFIDENCE: float = 0.8
+    INTENT_RETRY_MIN_CONFIDENCE: float = 0.5
+    LLM_CACHE: bool = True
+    LLM_CACHE_DB: str = ""
+    LLM_CACHE_TTL: float = 43200.0
+    LLM_CACHE_MAX_ENTRIES: int = 2000
     DB_PATH: str = "factory.db"
+    MCP_TOOL_CONCURRENCY: int = 4
+    CHAT_HOST: str = "127.0.0.1"
+    CHAT_PORT: int = 8100
+    CHAT_MAX_SESSIONS: int = 256
 
 
 settings = Settings()
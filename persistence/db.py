@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+import weakref
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict
 
 from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine, URL
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+ENGINE_PROFILES = ("default", "serving")
+
+# Per-connection settings for the "serving" profile.
+SERVING_MMAP_SIZE = 256 * 1024 * 1024
+SERVING_CACHE_SIZE_KIB = 16 * 1024
+
+_pool_counters: "weakref.WeakKeyDictionary[Engine, Dict[str, int]]" = (
+    weakref.WeakKeyDictionary()
+)
 
 
 def normalize_sqlite_path(db_path: str) -> str:
@@ -31,31 +43,91 @@ def create_sqlite_engine(
     *,
     read_only: bool = False,
     sqlite_wal: bool = False,
+    profile: str = "default",
+    pool_size: int = 4,
+    max_overflow: int = 0,
 ) -> Engine:
-    engine = create_engine(
-        sqlite_url(db_path, read_only=read_only),
-        pool_pre_ping=True,
-    )
+    """
+    profile="default": SQLAlchemy pool defaults with pre-ping.
+    profile="serving": fixed-size pool without pre-ping (a file-backed SQLite
+    connection cannot go stale), with mmap/cache/temp_store tuned per
+    connection and query_only when opened read-only.
+    """
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown engine profile: {profile!r}")
+
+    if profile == "serving":
+        engine = create_engine(
+            sqlite_url(db_path, read_only=read_only),
+            poolclass=QueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_pre_ping=False,
+        )
+    else:
+        engine = create_engine(
+            sqlite_url(db_path, read_only=read_only),
+            pool_pre_ping=True,
+        )
 
     event.listen(
         engine,
         "connect",
-        _sqlite_pragmas(sqlite_wal=sqlite_wal),
+        _sqlite_pragmas(
+            sqlite_wal=sqlite_wal,
+            serving=profile == "serving",
+            read_only=read_only,
+        ),
     )
+    _track_pool(engine)
     return engine
 
 
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    stats.update(_pool_counters.get(engine, {}))
+    return stats
+
+
 def session_factory(engine: Engine) -> sessionmaker:
     return sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 
-def _sqlite_pragmas(sqlite_wal: bool):
+def _track_pool(engine: Engine) -> None:
+    counters = {"connects": 0, "checkouts": 0}
+    _pool_counters[engine] = counters
+
+    def _on_connect(*_: Any) -> None:
+        counters["connects"] += 1
+
+    def _on_checkout(*_: Any) -> None:
+        counters["checkouts"] += 1
+
+    event.listen(engine, "connect", _on_connect)
+    event.listen(engine, "checkout", _on_checkout)
+
+
+def _sqlite_pragmas(sqlite_wal: bool, serving: bool = False, read_only: bool = False):
     def _listener(dbapi_connection: Any, _: Any) -> None:
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON;")
         if sqlite_wal:
             cursor.execute("PRAGMA journal_mode=WAL;")
             cursor.execute("PRAGMA synchronous=NORMAL;")
+        if serving:
+            cursor.execute(f"PRAGMA mmap_size={SERVING_MMAP_SIZE};")
+            cursor.execute(f"PRAGMA cache_size=-{SERVING_CACHE_SIZE_KIB};")
+            cursor.execute("PRAGMA temp_store=MEMORY;")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON;")
         cursor.close()
 
     return _listener
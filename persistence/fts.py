@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from persistence.sop_chunks import DEFAULT_SECTION
+
+SOP_FTS_TABLE = "sop_chunk_fts"
+
+# Chunk-level index: one FTS row per sop_chunks row (rowid = chunk id). The
+# SOP title is copied in so title terms still rank, hence a contentful FTS
+# table kept in sync by triggers on sop_chunks.
+_SOP_FTS_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SOP_FTS_TABLE} USING fts5(
+        title,
+        section,
+        content,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sop_chunk_fts_ai AFTER INSERT ON sop_chunks BEGIN
+        INSERT INTO {SOP_FTS_TABLE}(rowid, title, section, content)
+        VALUES (
+            new.id,
+            (SELECT title FROM sop WHERE id = new.sop_id),
+            new.section,
+            new.content
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sop_chunk_fts_ad AFTER DELETE ON sop_chunks BEGIN
+        DELETE FROM {SOP_FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    # SOP writes reach the index right away as one whole-SOP chunk; the empty
+    # sop_hash makes the next sync_sop_chunks() split it into sections.
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sop_chunk_sync_ai AFTER INSERT ON sop BEGIN
+        INSERT INTO sop_chunks(sop_id, chunk_index, section, content, sop_hash)
+        VALUES (new.id, 0, '{DEFAULT_SECTION}', new.content, '');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sop_chunk_sync_au AFTER UPDATE OF title, content ON sop
+    WHEN old.title IS NOT new.title OR old.content IS NOT new.content BEGIN
+        DELETE FROM sop_chunks WHERE sop_id = old.id;
+        INSERT INTO sop_chunks(sop_id, chunk_index, section, content, sop_hash)
+        VALUES (new.id, 0, '{DEFAULT_SECTION}', new.content, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sop_chunk_sync_ad AFTER DELETE ON sop BEGIN
+        DELETE FROM sop_chunks WHERE sop_id = old.id;
+    END
+    """,
+)
+_SOP_FTS_TRIGGERS = (
+    "sop_chunk_fts_ai",
+    "sop_chunk_fts_ad",
+    "sop_chunk_sync_ai",
+    "sop_chunk_sync_au",
+    "sop_chunk_sync_ad",
+)
+_SOP_FTS_REBUILD = (
+    f"DELETE FROM {SOP_FTS_TABLE}",
+    f"""
+    INSERT INTO {SOP_FTS_TABLE}(rowid, title, section, content)
+    SELECT c.id, s.title, c.section, c.content
+    FROM sop_chunks c
+    JOIN sop s ON s.id = c.sop_id
+    """,
+)
+# Triggers/tables of earlier index layouts, dropped on rebuild.
+_LEGACY_TRIGGERS = ("sop_fts_ai", "sop_fts_ad", "sop_fts_au")
+_LEGACY_TABLES = ("sop_fts",)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def create_sop_fts(engine: Engine, rebuild: bool = True) -> None:
+    """
+    Create the SOP chunk full-text index and the triggers that keep it (and
+    sop_chunks) in sync with sop. With `rebuild`, the index is refilled from
+    sop_chunks; without it, existing rows are left alone.
+    """
+    drop_sop_fts(engine, legacy_only=True)
+    statements = _SOP_FTS_DDL + (_SOP_FTS_REBUILD if rebuild else ())
+    with engine.begin() as conn:
+        for ddl in statements:
+            conn.execute(text(ddl))
+
+
+def drop_sop_fts(engine: Engine, legacy_only: bool = False) -> None:
+    triggers = list(_LEGACY_TRIGGERS)
+    tables = list(_LEGACY_TABLES)
+    if not legacy_only:
+        triggers += _SOP_FTS_TRIGGERS
+        tables.append(SOP_FTS_TABLE)
+    with engine.begin() as conn:
+        for trigger in triggers:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        for table in tables:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+
+def has_sop_fts(conn: Connection) -> bool:
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SOP_FTS_TABLE},
+    ).first()
+    return row is not None
+
+
+def fts_match_expression(user_text: str) -> str:
+    """Turn free text into a safe FTS5 MATCH expression (quoted prefix terms, OR)."""
+    terms: List[str] = []
+    for token in _TOKEN_RE.findall(user_text.lower()):
+        if len(token) < 2 or token in terms:
+            continue
+        terms.append(token)
+    return " OR ".join(f'"{term}"*' for term in terms)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+
+from persistence.db import create_sqlite_engine
+from persistence.models import LLMCacheBase, LLMCacheEntry
+
+Message = Dict[str, Any]
+
+_TRIM_SQL = text(
+    """
+    DELETE FROM llm_cache WHERE key IN (
+        SELECT key FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET :keep
+    )
+    """
+)
+
+
+def default_cache_path(memory_db: str) -> str:
+    return str(Path(memory_db).with_name("llm_cache.db"))
+
+
+def cache_window(messages: Sequence[Message]) -> List[Message]:
+    """
+    Messages a completion is keyed on. When the current turn (from the last
+    user message on) carries tool results, the answer is a summary of those
+    results: the leading system prompt plus the turn are enough, so the same
+    question over the same data hits across conversations. Otherwise the
+    whole prompt is used, since the answer may depend on earlier turns.
+    """
+    last_user = max(
+        (i for i, m in enumerate(messages) if m.get("role") == "user"), default=None
+    )
+    if last_user is None:
+        return list(messages)
+    turn = list(messages[last_user:])
+    if not any(m.get("role") == "tool" for m in turn):
+        return list(messages)
+    head = [messages[0]] if messages[0].get("role") == "system" else []
+    return head + turn
+
+
+def cache_key(
+    model: str, messages: Sequence[Message], tools: Sequence[Dict[str, Any]]
+) -> str:
+    payload = json.dumps(
+        {"model": model, "tools": list(tools), "messages": cache_window(messages)},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    On-disk cache of chat completions keyed by cache_key(). Entries expire
+    `ttl` seconds after being written; past `max_entries` the least recently
+    used are evicted. Tool results are part of the key, so new data is a miss.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "llm_cache.db",
+        *,
+        ttl: float = 43200.0,
+        max_entries: int = 2000,
+    ):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.engine = create_sqlite_engine(db_path, sqlite_wal=True)
+        LLMCacheBase.metadata.create_all(self.engine)
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(LLMCacheEntry.response, LLMCacheEntry.created_at).where(
+                    LLMCacheEntry.key == key
+                )
+            ).first()
+            if row is None:
+                self._count("misses")
+                return None
+            if now - row.created_at > self.ttl:
+                conn.execute(delete(LLMCacheEntry).where(LLMCacheEntry.key == key))
+                self._count("expired")
+                self._count("misses")
+                return None
+            conn.execute(
+                update(LLMCacheEntry)
+                .where(LLMCacheEntry.key == key)
+                .values(last_used_at=now, hits=LLMCacheEntry.hits + 1)
+            )
+        self._count("hits")
+        return row.response
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        stmt = insert(LLMCacheEntry).values(
+            key=key,
+            model=model,
+            response=response,
+            created_at=now,
+            last_used_at=now,
+            hits=0,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LLMCacheEntry.key],
+            set_={
+                "model": stmt.excluded.model,
+                "response": stmt.excluded.response,
+                "created_at": stmt.excluded.created_at,
+                "last_used_at": stmt.excluded.last_used_at,
+            },
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+            evicted = conn.execute(
+                delete(LLMCacheEntry).where(LLMCacheEntry.created_at < now - self.ttl)
+            ).rowcount
+            evicted += conn.execute(_TRIM_SQL, {"keep": self.max_entries}).rowcount
+        self._count("stores")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(LLMCacheEntry))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        with self.engine.connect() as conn:
+            entries, stored_hits = conn.execute(
+                select(
+                    func.count(), func.coalesce(func.sum(LLMCacheEntry.hits), 0)
+                ).select_from(LLMCacheEntry)
+            ).one()
+        return {
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            # Hits of the entries still stored, across all sessions.
+            "stored_hits": stored_hits,
+        }
+
+    def close(self) -> None:
+        self.engine.dispose()
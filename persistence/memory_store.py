@@ -1,12 +1,17 @@
+import atexit
+import logging
+import threading
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy import delete, desc, select
 
 from persistence.db import create_sqlite_engine, session_factory
 from persistence.models import Conversation, MemoryBase, Message
 
+logger = logging.getLogger(__name__)
+
 
 def _now_iso() -> str:
     return datetime.utcnow().isoformat()
@@ -19,17 +24,117 @@ class StoredMessage:
     ts: str
 
 
+# (conversation_id, role, content, ts)
+PendingMessage = Tuple[str, str, str, str]
+
+
 class ChatMemoryStore:
-    def __init__(self, db_path: str = "memory.db"):
+    def __init__(
+        self,
+        db_path: str = "memory.db",
+        *,
+        write_behind: bool = True,
+        flush_interval: float = 0.25,
+        batch_size: int = 64,
+        profile: str = "default",
+    ):
         self.db_path = db_path
-        self.engine = create_sqlite_engine(db_path, sqlite_wal=True)
+        self.engine = create_sqlite_engine(db_path, sqlite_wal=True, profile=profile)
         self.session_factory = session_factory(self.engine)
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: List[PendingMessage] = []
+        self._pending_cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
         self._init()
 
     def _init(self) -> None:
         MemoryBase.metadata.create_all(self.engine)
+        if self.write_behind:
+            self._writer = threading.Thread(
+                target=self._writer_loop, name="memory-store-writer", daemon=True
+            )
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._pending_cond:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._pending_cond.wait(self.flush_interval)
+                closed = self._closed
+            try:
+                self.flush()
+            except Exception:
+                # The batch is queued again; close() retries and raises.
+                logger.exception("memory store: write-behind flush failed")
+                if closed:
+                    return
+                with self._pending_cond:
+                    if not self._closed:
+                        self._pending_cond.wait(self.flush_interval)
+                continue
+            if closed:
+                return
+
+    def flush(self) -> None:
+        """Write all queued messages in a single transaction."""
+        with self._write_lock:
+            with self._pending_cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                self._write_batch(batch)
+            except Exception:
+                with self._pending_cond:
+                    # Ahead of anything appended meanwhile, to keep the order.
+                    self._pending[:0] = batch
+                raise
+
+    def close(self) -> None:
+        # The exit hook holds a reference to the store; drop it once closed.
+        atexit.unregister(self.close)
+        with self._pending_cond:
+            self._closed = True
+            self._pending_cond.notify_all()
+        if self._writer is not None and self._writer is not threading.current_thread():
+            self._writer.join()
+        self.flush()
+
+    def _write_batch(self, batch: List[PendingMessage]) -> None:
+        with self.session_factory() as session:
+            conversations: Dict[str, Conversation] = {}
+            for conv_id, role, content, ts in batch:
+                conversation = conversations.get(conv_id)
+                if conversation is None:
+                    conversation = session.get(Conversation, conv_id)
+                if conversation is None:
+                    conversation = Conversation(
+                        id=conv_id,
+                        title="",
+                        summary="",
+                        created_at=ts,
+                        updated_at=ts,
+                    )
+                    session.add(conversation)
+                conversations[conv_id] = conversation
+                session.add(
+                    Message(
+                        conversation_id=conv_id,
+                        role=role,
+                        content=content,
+                        ts=ts,
+                    )
+                )
+                conversation.updated_at = ts
+            session.commit()
 
     def create_conversation(self, conv_id: str, title: Optional[str] = None) -> None:
+        self.flush()
         now = _now_iso()
         with self.session_factory() as session:
             conversation = session.get(Conversation, conv_id)
@@ -53,6 +158,7 @@ class ChatMemoryStore:
             .order_by(desc(Conversation.updated_at))
             .limit(limit)
         )
+        self.flush()
         with self.session_factory() as session:
             rows = session.scalars(stmt).all()
             return [
@@ -67,28 +173,15 @@ class ChatMemoryStore:
             ]
 
     def append_message(self, conv_id: str, role: str, content: str) -> None:
-        ts = _now_iso()
-        with self.session_factory() as session:
-            conversation = session.get(Conversation, conv_id)
-            if conversation is None:
-                conversation = Conversation(
-                    id=conv_id,
-                    title="",
-                    summary="",
-                    created_at=ts,
-                    updated_at=ts,
-                )
-                session.add(conversation)
-            session.add(
-                Message(
-                    conversation_id=conv_id,
-                    role=role,
-                    content=content,
-                    ts=ts,
-                )
-            )
-            conversation.updated_at = ts
-            session.commit()
+        item = (conv_id, role, content, _now_iso())
+        if self.write_behind:
+            with self._pending_cond:
+                if not self._closed:
+                    self._pending.append(item)
+                    if len(self._pending) >= self.batch_size:
+                        self._pending_cond.notify()
+                    return
+        self._write_batch([item])
 
     def load_messages(self, conv_id: str, limit: int = 50) -> List[StoredMessage]:
         stmt = (
@@ -97,6 +190,7 @@ class ChatMemoryStore:
             .order_by(desc(Message.id))
             .limit(limit)
         )
+        self.flush()
         with self.session_factory() as session:
             rows = list(session.scalars(stmt))
 
@@ -107,6 +201,7 @@ class ChatMemoryStore:
         ]
 
     def get_summary(self, conv_id: str) -> str:
+        self.flush()
         with self.session_factory() as session:
             conversation = session.get(Conversation, conv_id)
             if conversation is None:
@@ -114,6 +209,7 @@ class ChatMemoryStore:
             return conversation.summary or ""
 
     def set_summary(self, conv_id: str, summary: str) -> None:
+        self.flush()
         with self.session_factory() as session:
             conversation = session.get(Conversation, conv_id)
             if conversation is None:
@@ -123,6 +219,7 @@ class ChatMemoryStore:
             session.commit()
 
     def clear_conversation(self, conv_id: str) -> None:
+        self.flush()
         with self.session_factory() as session:
             session.execute(delete(Message).where(Message.conversation_id == conv_id))
             conversation = session.get(Conversation, conv_id)
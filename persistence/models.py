@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import Float, ForeignKey, Index, Integer, LargeBinary, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -12,6 +12,10 @@ class FactoryBase(DeclarativeBase):
     pass
 
 
+class LLMCacheBase(DeclarativeBase):
+    pass
+
+
 class Conversation(MemoryBase):
     __tablename__ = "conversations"
 
@@ -62,6 +66,40 @@ class Sop(FactoryBase):
     content: Mapped[str] = mapped_column(Text, nullable=False)
 
 
+class SopChunk(FactoryBase):
+    __tablename__ = "sop_chunks"
+    __table_args__ = (
+        Index("idx_sop_chunks_sop", "sop_id", "chunk_index"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    sop_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("sop.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    section: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    # Hash of the SOP title/content the chunks were cut from.
+    sop_hash: Mapped[str] = mapped_column(String, nullable=False)
+
+
+class SopEmbedding(FactoryBase):
+    __tablename__ = "sop_embeddings"
+
+    chunk_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("sop_chunks.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String, nullable=False)
+    dim: Mapped[int] = mapped_column(Integer, nullable=False)
+    # float32 little-endian, L2-normalized
+    vector: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
 class CompressorEvent(FactoryBase):
     __tablename__ = "compressor_events"
     __table_args__ = (
@@ -119,3 +157,88 @@ class AlarmHistory(FactoryBase):
     ended_at: Mapped[str | None] = mapped_column(String, nullable=True)
     acknowledged_by: Mapped[str | None] = mapped_column(String, nullable=True)
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+# Per equipment/event type aggregates of compressor_events per hour or day.
+class EquipmentRollup(FactoryBase):
+    __tablename__ = "equipment_rollups"
+
+    equipment_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("equipment.id"),
+        primary_key=True,
+    )
+    # "hour" buckets look like "2026-01-09T16:00:00", "day" buckets "2026-01-09".
+    grain: Mapped[str] = mapped_column(String, primary_key=True)
+    bucket: Mapped[str] = mapped_column(String, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String, primary_key=True)
+    unit: Mapped[str | None] = mapped_column(String, nullable=True)
+    events: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    info: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    warning: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    critical: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Sum and count rather than an average so buckets merge incrementally.
+    value_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    value_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    value_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    value_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+
+# Alarms started per equipment per hour or day, by severity.
+class AlarmRollup(FactoryBase):
+    __tablename__ = "alarm_rollups"
+
+    equipment_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("equipment.id"),
+        primary_key=True,
+    )
+    grain: Mapped[str] = mapped_column(String, primary_key=True)
+    bucket: Mapped[str] = mapped_column(String, primary_key=True)
+    alarms: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    info: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    warning: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    critical: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+# Current open alarms/work orders per equipment, refreshed on each ingest.
+class EquipmentState(FactoryBase):
+    __tablename__ = "equipment_state"
+
+    equipment_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("equipment.id"),
+        primary_key=True,
+    )
+    open_alarms: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    open_warning_alarms: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    open_critical_alarms: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0
+    )
+    open_work_orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_event_ts: Mapped[str | None] = mapped_column(String, nullable=True)
+
+
+# Highest source row id already folded into the rollups, per source table.
+class RollupWatermark(FactoryBase):
+    __tablename__ = "rollup_watermarks"
+
+    source: Mapped[str] = mapped_column(String, primary_key=True)
+    last_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_ts: Mapped[str | None] = mapped_column(String, nullable=True)
+    updated_at: Mapped[str] = mapped_column(String, nullable=False)
+
+
+# Cached chat completions (see persistence/llm_cache.py); times are epoch seconds.
+class LLMCacheEntry(LLMCacheBase):
+    __tablename__ = "llm_cache"
+    __table_args__ = (
+        Index("idx_llm_cache_used", "last_used_at"),
+    )
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[float] = mapped_column(Float, nullable=False)
+    last_used_at: Mapped[float] = mapped_column(Float, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from persistence.models import (
+    AlarmRollup,
+    EquipmentRollup,
+    EquipmentState,
+    FactoryBase,
+    RollupWatermark,
+)
+from persistence.timeseries import max_id
+
+# grain -> SQL expression turning an ISO timestamp column into its bucket.
+GRAINS: Dict[str, str] = {
+    "hour": "substr({col}, 1, 13) || ':00:00'",
+    "day": "substr({col}, 1, 10)",
+}
+ROLLUP_TABLES = (
+    EquipmentRollup.__table__,
+    AlarmRollup.__table__,
+    EquipmentState.__table__,
+    RollupWatermark.__table__,
+)
+
+# New rows are folded into existing buckets, so a late event for an old hour
+# lands in the right place. min()/max() are scalar here: coalesce keeps a NULL
+# side (no numeric values yet) from wiping the other.
+_EVENT_UPSERT = """
+    INSERT INTO equipment_rollups (
+        equipment_id, grain, bucket, event_type, unit, events, info, warning,
+        critical, value_count, value_sum, value_min, value_max
+    )
+    SELECT
+        equipment_id,
+        :grain,
+        {bucket},
+        event_type,
+        max(unit),
+        count(*),
+        sum(severity = 'info'),
+        sum(severity = 'warning'),
+        sum(severity = 'critical'),
+        count(value),
+        coalesce(sum(value), 0.0),
+        min(value),
+        max(value)
+    FROM compressor_events
+    WHERE id > :lo AND id <= :hi
+    GROUP BY equipment_id, {bucket}, event_type
+    ON CONFLICT (equipment_id, grain, bucket, event_type) DO UPDATE SET
+        unit = coalesce(excluded.unit, unit),
+        events = events + excluded.events,
+        info = info + excluded.info,
+        warning = warning + excluded.warning,
+        critical = critical + excluded.critical,
+        value_count = value_count + excluded.value_count,
+        value_sum = value_sum + excluded.value_sum,
+        value_min = min(
+            coalesce(value_min, excluded.value_min),
+            coalesce(excluded.value_min, value_min)
+        ),
+        value_max = max(
+            coalesce(value_max, excluded.value_max),
+            coalesce(excluded.value_max, value_max)
+        )
+"""
+_ALARM_UPSERT = """
+    INSERT INTO alarm_rollups (
+        equipment_id, grain, bucket, alarms, info, warning, critical
+    )
+    SELECT
+        equipment_id,
+        :grain,
+        {bucket},
+        count(*),
+        sum(severity = 'info'),
+        sum(severity = 'warning'),
+        sum(severity = 'critical')
+    FROM alarm_history
+    WHERE id > :lo AND id <= :hi
+    GROUP BY equipment_id, {bucket}
+    ON CONFLICT (equipment_id, grain, bucket) DO UPDATE SET
+        alarms = alarms + excluded.alarms,
+        info = info + excluded.info,
+        warning = warning + excluded.warning,
+        critical = critical + excluded.critical
+"""
+_LAST_EVENT_UPSERT = """
+    INSERT INTO equipment_state (
+        equipment_id, open_alarms, open_warning_alarms, open_critical_alarms,
+        open_work_orders, last_event_ts
+    )
+    SELECT equipment_id, 0, 0, 0, 0, max(event_ts)
+    FROM compressor_events
+    WHERE id > :lo AND id <= :hi
+    GROUP BY equipment_id
+    ON CONFLICT (equipment_id) DO UPDATE SET
+        last_event_ts = max(coalesce(last_event_ts, ''), excluded.last_event_ts)
+"""
+# Alarms get closed and work orders change status in place, so the open
+# counts cannot be derived from new rows only; they are recounted per ingest.
+_OPEN_COUNTS_REFRESH = (
+    """
+    INSERT OR IGNORE INTO equipment_state (
+        equipment_id, open_alarms, open_warning_alarms, open_critical_alarms,
+        open_work_orders
+    )
+    SELECT id, 0, 0, 0, 0 FROM equipment
+    """,
+    """
+    UPDATE equipment_state SET
+        open_alarms = 0,
+        open_warning_alarms = 0,
+        open_critical_alarms = 0,
+        open_work_orders = 0
+    """,
+    """
+    UPDATE equipment_state SET
+        open_alarms = o.total,
+        open_warning_alarms = o.warning,
+        open_critical_alarms = o.critical
+    FROM (
+        SELECT
+            equipment_id,
+            count(*) AS total,
+            sum(severity = 'warning') AS warning,
+            sum(severity = 'critical') AS critical
+        FROM alarm_history
+        WHERE ended_at IS NULL
+        GROUP BY equipment_id
+    ) AS o
+    WHERE equipment_state.equipment_id = o.equipment_id
+    """,
+    """
+    UPDATE equipment_state SET open_work_orders = w.total
+    FROM (
+        SELECT equipment_id, count(*) AS total
+        FROM maintenance_log
+        WHERE status != 'closed'
+        GROUP BY equipment_id
+    ) AS w
+    WHERE equipment_state.equipment_id = w.equipment_id
+    """,
+)
+_SOURCES = {
+    "compressor_events": ("event_ts", _EVENT_UPSERT),
+    "alarm_history": ("started_at", _ALARM_UPSERT),
+}
+
+
+def create_rollup_tables(engine: Engine) -> None:
+    FactoryBase.metadata.create_all(engine, tables=list(ROLLUP_TABLES))
+
+
+def drop_rollup_tables(engine: Engine) -> None:
+    FactoryBase.metadata.drop_all(engine, tables=list(ROLLUP_TABLES))
+
+
+def _watermark(conn: Connection, source: str) -> int:
+    row = conn.execute(
+        text("SELECT last_id FROM rollup_watermarks WHERE source = :source"),
+        {"source": source},
+    ).first()
+    return row[0] if row else 0
+
+
+def ingest_rollups(engine: Engine, rebuild: bool = False) -> Dict[str, int]:
+    """
+    Fold compressor_events/alarm_history rows newer than the stored watermark
+    (highest id seen) into the hourly and daily rollups, then recount open
+    alarms and work orders. Sources are append-only by id; after edits or
+    deletes of existing rows, pass rebuild=True.
+    """
+    if rebuild:
+        drop_rollup_tables(engine)
+    create_rollup_tables(engine)
+
+    stats: Dict[str, int] = {}
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with engine.begin() as conn:
+        for source, (ts_column, upsert) in _SOURCES.items():
+            lo = _watermark(conn, source)
+            hi = max_id(conn, source)
+            stats[f"{source}_rows"] = max(0, hi - lo)
+            if hi <= lo:
+                continue
+
+            bounds = {"lo": lo, "hi": hi}
+            last_ts = conn.execute(
+                text(
+                    f"SELECT max({ts_column}) FROM {source} "
+                    "WHERE id > :lo AND id <= :hi"
+                ),
+                bounds,
+            ).scalar()
+            for grain, bucket in GRAINS.items():
+                sql = upsert.format(bucket=bucket.format(col=ts_column))
+                conn.execute(text(sql), {**bounds, "grain": grain})
+            if source == "compressor_events":
+                conn.execute(text(_LAST_EVENT_UPSERT), bounds)
+
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO rollup_watermarks (source, last_id, last_ts, updated_at)
+                    VALUES (:source, :hi, :last_ts, :now)
+                    ON CONFLICT (source) DO UPDATE SET
+                        last_id = excluded.last_id,
+                        last_ts = max(coalesce(last_ts, ''), excluded.last_ts),
+                        updated_at = excluded.updated_at
+                    """
+                ),
+                {"source": source, "hi": hi, "last_ts": last_ts, "now": now},
+            )
+
+        for sql in _OPEN_COUNTS_REFRESH:
+            conn.execute(text(sql))
+
+    return stats
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Dict, List, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Engine
+
+from persistence.models import Sop, SopChunk
+
+DEFAULT_SECTION = "overview"
+CHUNK_MAX_CHARS = 1000
+
+# "## Procedure" (markdown) or "SAFETY:" / "PROCEDURE" (all-caps line).
+_HEADING_RE = re.compile(
+    r"^\s*(?:#{1,6}\s+(?P<md>[^\n#]+?)\s*#*|(?P<caps>[A-Z][A-Z0-9 /&()-]{2,60}):?)\s*$"
+)
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+
+
+def _pack(pieces: List[str], max_chars: int, sep: str) -> List[str]:
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}{sep}{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_text(text: str, max_chars: int) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    chunks: List[str] = []
+    for paragraph in _pack(_PARAGRAPH_RE.split(text), max_chars, "\n\n"):
+        if len(paragraph) <= max_chars:
+            chunks.append(paragraph)
+            continue
+        for sentence_block in _pack(_SENTENCE_RE.split(paragraph), max_chars, " "):
+            # A single sentence longer than max_chars is cut hard.
+            chunks.extend(
+                sentence_block[i : i + max_chars]
+                for i in range(0, len(sentence_block), max_chars)
+            )
+    return chunks
+
+
+def split_sop(content: str, max_chars: int = CHUNK_MAX_CHARS) -> List[Tuple[str, str]]:
+    """
+    Split an SOP into (section, text) chunks: first by headings, then by
+    paragraph and sentence so no chunk exceeds max_chars. Text before the
+    first heading goes to the "overview" section.
+    """
+    sections: List[Tuple[str, List[str]]] = [(DEFAULT_SECTION, [])]
+    for line in content.splitlines():
+        match = _HEADING_RE.match(line)
+        if match:
+            name = (match.group("md") or match.group("caps")).strip().rstrip(":")
+            sections.append((name, []))
+        else:
+            sections[-1][1].append(line)
+
+    chunks: List[Tuple[str, str]] = []
+    for name, lines in sections:
+        body = "\n".join(lines).strip()
+        if body:
+            chunks.extend((name, text.strip()) for text in _split_text(body, max_chars))
+    return chunks
+
+
+def sop_hash(title: str, content: str) -> str:
+    return hashlib.sha256(f"{title}\0{content}".encode()).hexdigest()
+
+
+def sync_sop_chunks(engine: Engine, max_chars: int = CHUNK_MAX_CHARS) -> Dict[str, int]:
+    """
+    Re-chunk SOPs whose title/content changed since the last run and drop
+    chunks of deleted SOPs. Unchanged SOPs keep their chunk rows (and ids).
+    """
+    with engine.begin() as conn:
+        sops = conn.execute(select(Sop.id, Sop.title, Sop.content)).all()
+        stored = dict(
+            conn.execute(select(SopChunk.sop_id, SopChunk.sop_hash).distinct()).all()
+        )
+
+        changed = [
+            (row.id, row.content, digest)
+            for row in sops
+            if stored.get(row.id) != (digest := sop_hash(row.title, row.content))
+        ]
+        live = {row.id for row in sops}
+        removed = [sop_id for sop_id in stored if sop_id not in live]
+
+        stale = removed + [sop_id for sop_id, _, _ in changed]
+        if stale:
+            conn.execute(delete(SopChunk).where(SopChunk.sop_id.in_(stale)))
+
+        rows = [
+            {
+                "sop_id": sop_id,
+                "chunk_index": index,
+                "section": section,
+                "content": text,
+                "sop_hash": digest,
+            }
+            for sop_id, content, digest in changed
+            for index, (section, text) in enumerate(split_sop(content, max_chars))
+        ]
+        if rows:
+            conn.execute(SopChunk.__table__.insert(), rows)
+
+    return {
+        "chunked": len(changed),
+        "unchanged": len(sops) - len(changed),
+        "deleted": len(removed),
+        "chunks_written": len(rows),
+    }
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Connection, Engine
+
+from infra.embeddings import Embedder
+from persistence.models import Sop, SopChunk, SopEmbedding
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional (pyproject extra "vector")
+    np = None
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    packed = array("f", vector)
+    if packed.itemsize != 4:
+        raise RuntimeError("float32 array type required")
+    return packed.tobytes()
+
+
+def unpack_vector(blob: bytes) -> array:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector
+
+
+def chunk_document(title: str, section: str, content: str) -> str:
+    return f"{title}\n{section}\n{content}"
+
+
+def content_hash(model: str, document: str) -> str:
+    return hashlib.sha256(f"{model}\0{document}".encode()).hexdigest()
+
+
+def sync_sop_embeddings(
+    engine: Engine, embedder: Embedder, batch_size: int = 64
+) -> Dict[str, int]:
+    """
+    Bring sop_embeddings up to date with sop_chunks: embed new or changed
+    chunks (by content hash), drop vectors of deleted chunks. Unchanged rows
+    are not re-embedded.
+    """
+    with engine.begin() as conn:
+        docs = {
+            row.id: chunk_document(row.title, row.section, row.content)
+            for row in conn.execute(
+                select(SopChunk.id, Sop.title, SopChunk.section, SopChunk.content)
+                .join(Sop, Sop.id == SopChunk.sop_id)
+            )
+        }
+        stored = {
+            row.chunk_id: row.content_hash
+            for row in conn.execute(
+                select(SopEmbedding.chunk_id, SopEmbedding.content_hash)
+            )
+        }
+
+        pending = []
+        for chunk_id, document in docs.items():
+            digest = content_hash(embedder.name, document)
+            if stored.get(chunk_id) != digest:
+                pending.append((chunk_id, document, digest))
+
+        removed = [chunk_id for chunk_id in stored if chunk_id not in docs]
+        if removed:
+            conn.execute(
+                delete(SopEmbedding).where(SopEmbedding.chunk_id.in_(removed))
+            )
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            vectors = embedder.embed([document for _, document, _ in batch])
+            conn.execute(
+                delete(SopEmbedding).where(
+                    SopEmbedding.chunk_id.in_([chunk_id for chunk_id, _, _ in batch])
+                )
+            )
+            conn.execute(
+                SopEmbedding.__table__.insert(),
+                [
+                    {
+                        "chunk_id": chunk_id,
+                        "model": embedder.name,
+                        "content_hash": digest,
+                        "dim": len(vector),
+                        "vector": pack_vector(vector),
+                    }
+                    for (chunk_id, _, digest), vector in zip(batch, vectors)
+                ],
+            )
+
+    return {
+        "embedded": len(pending),
+        "unchanged": len(docs) - len(pending),
+        "deleted": len(removed),
+    }
+
+
+class VectorIndex:
+    """
+    In-memory matrix of L2-normalized vectors; cosine similarity is a dot
+    product. Uses NumPy when installed, plain Python otherwise.
+    """
+
+    def __init__(self, ids: List[int], vectors: List[array], model: str):
+        self.ids = ids
+        self.model = model
+        self.dim = len(vectors[0]) if vectors else 0
+        if np is not None and vectors:
+            self._matrix = np.frombuffer(
+                b"".join(v.tobytes() for v in vectors), dtype=np.float32
+            ).reshape(len(vectors), self.dim)
+        else:
+            self._matrix = vectors
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, conn: Connection, model: str) -> "VectorIndex":
+        rows = conn.execute(
+            select(SopEmbedding.chunk_id, SopEmbedding.vector)
+            .where(SopEmbedding.model == model)
+            .order_by(SopEmbedding.chunk_id)
+        ).all()
+        return cls(
+            [row.chunk_id for row in rows],
+            [unpack_vector(row.vector) for row in rows],
+            model,
+        )
+
+    def search(self, query: Sequence[float], top_k: int) -> List[Tuple[int, float]]:
+        if not self.ids or len(query) != self.dim:
+            return []
+        top_k = min(top_k, len(self.ids))
+
+        if np is not None:
+            scores = self._matrix @ np.asarray(query, dtype=np.float32)
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            best = best[np.argsort(-scores[best])]
+            return [(self.ids[i], float(scores[i])) for i in best]
+
+        scored = (
+            (sum(a * b for a, b in zip(row, query)), i)
+            for i, row in enumerate(self._matrix)
+        )
+        return [(self.ids[i], score) for score, i in heapq.nlargest(top_k, scored)]
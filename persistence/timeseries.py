@@ -0,0 +1,496 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from sqlalchemy.engine import Connection, Engine
+
+# Period -> length of the ISO timestamp prefix naming it. "none" keeps a single
+# table: no period pruning, but the view stays a plain SELECT that SQLite can
+# flatten into joins.
+GRANULARITIES = {"month": 7, "year": 4, "none": 0}
+DEFAULT_PARTITION = "pdefault"
+# SQLite caps a compound SELECT at 500 terms (SQLITE_MAX_COMPOUND_SELECT).
+MAX_PARTITIONS = 400
+_ID_TABLE = "timeseries_ids"
+_SETTINGS_TABLE = "timeseries_settings"
+
+
+@dataclass(frozen=True)
+class SeriesSpec:
+    """
+    Compact layout of one time-series table. The union view keeps the
+    original name and columns; timestamps are stored as epoch seconds (UTC)
+    and exposed both as the original ISO text and as the integer columns.
+    """
+
+    source: str
+    # Original columns in table order: (name, SQL type, NOT NULL).
+    columns: Tuple[Tuple[str, str, bool], ...]
+    # ISO timestamp column -> stored epoch column. The first one is the
+    # partition and clustering key.
+    timestamps: Tuple[Tuple[str, str], ...]
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.timestamps[0]
+
+    def stored(self, column: str) -> str:
+        return dict(self.timestamps).get(column, column)
+
+
+SERIES = (
+    SeriesSpec(
+        source="compressor_events",
+        columns=(
+            ("id", "INTEGER", True),
+            ("equipment_id", "INTEGER", True),
+            ("event_ts", "TEXT", True),
+            ("event_type", "TEXT", True),
+            ("severity", "TEXT", True),
+            ("value", "REAL", False),
+            ("unit", "TEXT", False),
+            ("description", "TEXT", True),
+        ),
+        timestamps=(("event_ts", "ts"),),
+    ),
+    SeriesSpec(
+        source="alarm_history",
+        columns=(
+            ("id", "INTEGER", True),
+            ("equipment_id", "INTEGER", True),
+            ("alarm_code", "TEXT", True),
+            ("severity", "TEXT", True),
+            ("started_at", "TEXT", True),
+            ("ended_at", "TEXT", False),
+            ("acknowledged_by", "TEXT", False),
+            ("note", "TEXT", False),
+        ),
+        timestamps=(("started_at", "started_ts"), ("ended_at", "ended_ts")),
+    ),
+)
+SERIES_BY_SOURCE = {spec.source: spec for spec in SERIES}
+
+
+def _to_epoch(expr: str) -> str:
+    return f"CAST(strftime('%s', {expr}) AS INTEGER)"
+
+
+def _to_iso(expr: str) -> str:
+    return f"strftime('%Y-%m-%dT%H:%M:%S', {expr}, 'unixepoch')"
+
+
+def _partition(spec: SeriesSpec, suffix: str) -> str:
+    return f"{spec.source}_{suffix}"
+
+
+def _suffix(period: str) -> str:
+    return "p" + period.replace("-", "")
+
+
+def _exec(conn: Connection, sql: str, params: tuple = ()) -> list:
+    return conn.exec_driver_sql(sql, params).fetchall()
+
+
+def is_compact(conn: Connection, source: str) -> bool:
+    rows = _exec(
+        conn,
+        "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = ?",
+        (source,),
+    )
+    return bool(rows)
+
+
+def partitions(conn: Connection, spec: SeriesSpec) -> List[str]:
+    """Partition suffixes, oldest first, with the default partition last."""
+    prefix = f"{spec.source}_p"
+    names = [
+        row[0][len(spec.source) + 1 :]
+        for row in _exec(
+            conn,
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+            (prefix + "%",),
+        )
+        if row[0].startswith(prefix)
+    ]
+    periods = sorted(n for n in names if n != DEFAULT_PARTITION)
+    return periods + [n for n in names if n == DEFAULT_PARTITION]
+
+
+def _granularity(conn: Connection) -> str:
+    rows = _exec(
+        conn, f"SELECT value FROM {_SETTINGS_TABLE} WHERE key = 'granularity'"
+    )
+    return rows[0][0] if rows else "month"
+
+
+def _period_expr(column: str, granularity: str) -> str:
+    if not GRANULARITIES[granularity]:
+        return "'all'"
+    return f"substr({column}, 1, {GRANULARITIES[granularity]})"
+
+
+def _period_value(suffix: str, granularity: str) -> str:
+    label = suffix[1:]
+    if granularity == "month":
+        return f"{label[:4]}-{label[4:]}"
+    return label
+
+
+def _create_partition(conn: Connection, spec: SeriesSpec, suffix: str) -> str:
+    name = _partition(spec, suffix)
+    key_epoch = spec.key[1]
+    epochs = dict(spec.timestamps)
+    columns = [
+        f"{epochs.get(c, c)} {'INTEGER' if c in epochs else t}"
+        f"{' NOT NULL' if not_null else ''}"
+        for c, t, not_null in spec.columns
+    ]
+    conn.exec_driver_sql(
+        f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            {", ".join(columns)},
+            PRIMARY KEY (equipment_id, {key_epoch}, id)
+        ) WITHOUT ROWID
+        """
+    )
+    _index_partition(conn, spec, name)
+    return name
+
+
+def _index_partition(conn: Connection, spec: SeriesSpec, name: str) -> None:
+    # Incremental readers (rollup ingest) select by id ranges.
+    conn.exec_driver_sql(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_id ON {name} (id)"
+    )
+    # Existing run_sql queries filter and sort on the view's ISO column. The
+    # expressions match _view_select() exactly, so those predicates are
+    # pushed into each partition and seek these indexes instead of scanning.
+    iso = _to_iso(spec.key[1])
+    conn.exec_driver_sql(
+        f"CREATE INDEX IF NOT EXISTS {name}_iso ON {name} (equipment_id, {iso})"
+    )
+    conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name}_iso_all ON {name} ({iso})")
+
+
+def _stored_select(spec: SeriesSpec, alias: str = "") -> str:
+    """Source-table columns converted to the stored layout, in partition order."""
+    prefix = f"{alias}." if alias else ""
+    parts = []
+    for column, _, _ in spec.columns:
+        if column in dict(spec.timestamps):
+            parts.append(_to_epoch(f"{prefix}{column}"))
+        else:
+            parts.append(f"{prefix}{column}")
+    return ", ".join(parts)
+
+
+def _view_select(spec: SeriesSpec, table: str) -> str:
+    parts = []
+    for column, _, _ in spec.columns:
+        if column in dict(spec.timestamps):
+            parts.append(f"{_to_iso(spec.stored(column))} AS {column}")
+        else:
+            parts.append(column)
+    parts.extend(epoch for _, epoch in spec.timestamps)
+    return f"SELECT {', '.join(parts)} FROM {table}"
+
+
+def _drop_view(conn: Connection, spec: SeriesSpec) -> None:
+    for (name,) in _exec(
+        conn,
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+        (spec.source,),
+    ):
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    conn.exec_driver_sql(f"DROP VIEW IF EXISTS {spec.source}")
+
+
+def _create_view(conn: Connection, spec: SeriesSpec, granularity: str) -> None:
+    """
+    (Re)create the union view and its INSTEAD OF triggers: inserts are routed
+    to the partition of their period (the default partition when it has
+    none yet), updates/deletes hit the row by primary key.
+    """
+    _drop_view(conn, spec)
+    suffixes = partitions(conn, spec)
+    conn.exec_driver_sql(
+        f"CREATE VIEW {spec.source} AS\n"
+        + "\nUNION ALL\n".join(
+            _view_select(spec, _partition(spec, s)) for s in suffixes
+        )
+    )
+
+    key_iso, key_epoch = spec.key
+    names = [c for c, _, _ in spec.columns]
+    stored = [spec.stored(c) for c in names]
+    values = []
+    for column in names:
+        if column == "id":
+            values.append(
+                f"coalesce(new.id, (SELECT last_id FROM {_ID_TABLE} "
+                f"WHERE source = '{spec.source}'))"
+            )
+        elif column in dict(spec.timestamps):
+            values.append(_to_epoch(f"new.{column}"))
+        else:
+            values.append(f"new.{column}")
+    # Explicit ids move the counter forward; NULL ids take the next one.
+    bump = (
+        f"UPDATE {_ID_TABLE} SET last_id = max(last_id + (new.id IS NULL), "
+        f"coalesce(new.id, 0)) WHERE source = '{spec.source}';"
+    )
+    insert_body = (
+        f"INSERT INTO {{table}} ({', '.join(stored)}) VALUES ({', '.join(values)});"
+    )
+    period = _period_expr(f"new.{key_iso}", granularity)
+    periods = []
+    for suffix in suffixes:
+        if suffix == DEFAULT_PARTITION:
+            continue
+        value = _period_value(suffix, granularity)
+        periods.append(f"'{value}'")
+        conn.exec_driver_sql(
+            f"""
+            CREATE TRIGGER {spec.source}_insert_{suffix}
+            INSTEAD OF INSERT ON {spec.source}
+            WHEN {period} = '{value}'
+            BEGIN
+                {bump}
+                {insert_body.format(table=_partition(spec, suffix))}
+            END
+            """
+        )
+    if DEFAULT_PARTITION in suffixes:
+        default_when = (
+            f"WHEN {period} NOT IN ({', '.join(periods)})" if periods else ""
+        )
+        conn.exec_driver_sql(
+            f"""
+            CREATE TRIGGER {spec.source}_insert_{DEFAULT_PARTITION}
+            INSTEAD OF INSERT ON {spec.source}
+            {default_when}
+            BEGIN
+                {bump}
+                {insert_body.format(table=_partition(spec, DEFAULT_PARTITION))}
+            END
+            """
+        )
+
+    # Key columns (equipment_id, partition timestamp, id) are immutable.
+    where = (
+        f"equipment_id = old.equipment_id AND {key_epoch} = old.{key_epoch} "
+        "AND id = old.id"
+    )
+    assignments = []
+    for column in names:
+        if column in ("id", "equipment_id", key_iso):
+            continue
+        if column in dict(spec.timestamps):
+            epoch = _to_epoch(f"new.{column}")
+            assignments.append(f"{spec.stored(column)} = {epoch}")
+        else:
+            assignments.append(f"{column} = new.{column}")
+    tables = [_partition(spec, s) for s in suffixes]
+    updates = "\n".join(
+        f"UPDATE {t} SET {', '.join(assignments)} WHERE {where};" for t in tables
+    )
+    deletes = "\n".join(f"DELETE FROM {t} WHERE {where};" for t in tables)
+    conn.exec_driver_sql(
+        f"""
+        CREATE TRIGGER {spec.source}_update INSTEAD OF UPDATE ON {spec.source}
+        BEGIN
+            {updates}
+        END
+        """
+    )
+    conn.exec_driver_sql(
+        f"""
+        CREATE TRIGGER {spec.source}_delete INSTEAD OF DELETE ON {spec.source}
+        BEGIN
+            {deletes}
+        END
+        """
+    )
+
+
+def _ensure_support_tables(conn: Connection, granularity: str) -> None:
+    conn.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {_ID_TABLE} "
+        "(source TEXT PRIMARY KEY, last_id INTEGER NOT NULL)"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {_SETTINGS_TABLE} "
+        "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+    )
+    conn.exec_driver_sql(
+        f"INSERT OR IGNORE INTO {_SETTINGS_TABLE} (key, value) "
+        "VALUES ('granularity', ?)",
+        (granularity,),
+    )
+
+
+def _load_partitions(
+    conn: Connection, spec: SeriesSpec, table: str, granularity: str
+) -> Dict[str, int]:
+    """Copy rows of `table` (original layout) into their period partitions."""
+    key_iso = spec.key[0]
+    period = _period_expr(key_iso, granularity)
+    if GRANULARITIES[granularity]:
+        periods = [
+            row[0] for row in _exec(conn, f"SELECT DISTINCT {period} FROM {table}")
+        ]
+    else:
+        periods = ["all"]
+    existing = len([s for s in partitions(conn, spec) if s != DEFAULT_PARTITION])
+    if existing + len(periods) > MAX_PARTITIONS:
+        raise ValueError(
+            f"{spec.source}: {existing + len(periods)} partitions exceed "
+            f"{MAX_PARTITIONS}; use granularity='year'"
+        )
+
+    copied: Dict[str, int] = {}
+    stored = ", ".join(spec.stored(c) for c, _, _ in spec.columns)
+    for value in periods:
+        if value is None:
+            continue
+        name = _create_partition(conn, spec, _suffix(value))
+        # Loading in primary key order keeps the WITHOUT ROWID b-tree compact.
+        cursor = conn.exec_driver_sql(
+            f"""
+            INSERT INTO {name} ({stored})
+            SELECT {_stored_select(spec)} FROM {table}
+            WHERE {period} = ?
+            ORDER BY equipment_id, {_to_epoch(key_iso)}, id
+            """,
+            (value,),
+        )
+        copied[value] = cursor.rowcount
+    return copied
+
+
+def to_compact(
+    engine: Engine, granularity: str = "none", keep_source: bool = False
+) -> Dict[str, int]:
+    """
+    Move compressor_events/alarm_history into period partitions behind a
+    union view with the original name. Already-compact tables only get the
+    rows that landed in the default partition moved to their periods.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {sorted(GRANULARITIES)}")
+
+    stats: Dict[str, int] = {}
+    with engine.begin() as conn:
+        _ensure_support_tables(conn, granularity)
+        granularity = _granularity(conn)
+        for spec in SERIES:
+            default = _partition(spec, DEFAULT_PARTITION)
+            has_default = DEFAULT_PARTITION in partitions(conn, spec)
+            if is_compact(conn, spec.source) and not has_default:
+                copied = {}
+            elif is_compact(conn, spec.source):
+                # Rows inserted for periods without a partition: the view
+                # reads them back in the original layout for the reload.
+                staging = f"{spec.source}_staging"
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS {staging}")
+                conn.exec_driver_sql(
+                    f"CREATE TEMP TABLE {staging} AS "
+                    + _view_select(spec, default)
+                )
+                conn.exec_driver_sql(f"DELETE FROM {default}")
+                copied = _load_partitions(conn, spec, f"temp.{staging}", granularity)
+                conn.exec_driver_sql(f"DROP TABLE temp.{staging}")
+            else:
+                backup = f"{spec.source}_rowstore"
+                conn.exec_driver_sql(f"ALTER TABLE {spec.source} RENAME TO {backup}")
+                conn.exec_driver_sql(
+                    f"INSERT OR REPLACE INTO {_ID_TABLE} (source, last_id) "
+                    f"SELECT ?, coalesce(max(id), 0) FROM {backup}",
+                    (spec.source,),
+                )
+                copied = _load_partitions(conn, spec, backup, granularity)
+                if GRANULARITIES[granularity]:
+                    _create_partition(conn, spec, DEFAULT_PARTITION)
+                if not keep_source:
+                    conn.exec_driver_sql(f"DROP TABLE {backup}")
+            # Partitions migrated before the ISO indexes existed get them here.
+            for suffix in partitions(conn, spec):
+                _index_partition(conn, spec, _partition(spec, suffix))
+            _create_view(conn, spec, granularity)
+            stats[f"{spec.source}_rows"] = sum(copied.values())
+            stats[f"{spec.source}_partitions"] = len(
+                [s for s in partitions(conn, spec) if s != DEFAULT_PARTITION]
+            )
+    return stats
+
+
+def to_rowstore(engine: Engine) -> Dict[str, int]:
+    """Undo to_compact: rebuild the original tables (and indexes) from the view."""
+    from persistence.models import FactoryBase
+
+    stats: Dict[str, int] = {}
+    with engine.begin() as conn:
+        for spec in SERIES:
+            if not is_compact(conn, spec.source):
+                continue
+            if _exec(
+                conn,
+                "SELECT 1 FROM sqlite_master WHERE name = ?",
+                (f"{spec.source}_rowstore",),
+            ):
+                raise ValueError(
+                    f"{spec.source}_rowstore (kept by to_compact) exists; "
+                    "drop or rename it first"
+                )
+            staging = f"{spec.source}_staging"
+            names = ", ".join(c for c, _, _ in spec.columns)
+            conn.exec_driver_sql(
+                f"CREATE TEMP TABLE {staging} AS SELECT {names} FROM {spec.source}"
+            )
+            _drop_partitions(conn, spec)
+            table = FactoryBase.metadata.tables[spec.source]
+            table.create(conn)
+            cursor = conn.exec_driver_sql(
+                f"INSERT INTO {spec.source} ({names}) "
+                f"SELECT {names} FROM temp.{staging} ORDER BY id"
+            )
+            conn.exec_driver_sql(f"DROP TABLE temp.{staging}")
+            stats[f"{spec.source}_rows"] = cursor.rowcount
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_ID_TABLE}")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_SETTINGS_TABLE}")
+    return stats
+
+
+def _drop_partitions(conn: Connection, spec: SeriesSpec) -> None:
+    _drop_view(conn, spec)
+    for suffix in partitions(conn, spec):
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_partition(spec, suffix)}")
+
+
+def drop_timeseries(engine: Engine) -> None:
+    """Remove the compact layout (views, triggers, partitions) if present."""
+    with engine.begin() as conn:
+        for spec in SERIES:
+            if is_compact(conn, spec.source):
+                _drop_partitions(conn, spec)
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_ID_TABLE}")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_SETTINGS_TABLE}")
+
+
+def max_id(conn: Connection, source: str) -> int:
+    """Highest id of a series table; O(1) for the compact layout too."""
+    if is_compact(conn, source):
+        rows = _exec(
+            conn, f"SELECT last_id FROM {_ID_TABLE} WHERE source = ?", (source,)
+        )
+        return rows[0][0] if rows else 0
+    rows = _exec(conn, f"SELECT max(id) FROM {source}")
+    return rows[0][0] or 0
+
+
+def layout(conn: Connection) -> Dict[str, str]:
+    return {
+        spec.source: ("compact" if is_compact(conn, spec.source) else "rowstore")
+        for spec in SERIES
+    }
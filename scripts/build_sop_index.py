@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from infra.embeddings import Embedder, make_embedder
+from persistence.db import create_sqlite_engine
+from persistence.fts import create_sop_fts, has_sop_fts
+from persistence.models import SopChunk, SopEmbedding
+from persistence.sop_chunks import CHUNK_MAX_CHARS, sync_sop_chunks
+from persistence.sop_vectors import sync_sop_embeddings
+
+DB_PATH = "factory.db"
+
+
+def build_sop_index(
+    engine: Engine,
+    embedder: Embedder,
+    max_chars: int = CHUNK_MAX_CHARS,
+    rebuild: bool = False,
+) -> Dict[str, int]:
+    """
+    SOP ingestion: split SOPs into sop_chunks, keep the chunk FTS index in
+    sync and embed new or changed chunks. Safe to re-run; only what changed
+    since the last run is redone. The FTS index is filled when it is created
+    (triggers keep it current afterwards) or with `rebuild`.
+    """
+    inspector = inspect(engine)
+    if inspector.has_table(SopEmbedding.__tablename__):
+        columns = {c["name"] for c in inspector.get_columns(SopEmbedding.__tablename__)}
+        if "chunk_id" not in columns:
+            # Vectors from the per-SOP layout; rebuilt from chunks below.
+            SopEmbedding.__table__.drop(engine)
+    SopChunk.__table__.create(engine, checkfirst=True)
+    SopEmbedding.__table__.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        missing = not has_sop_fts(conn)
+    create_sop_fts(engine, rebuild=rebuild or missing)
+
+    chunks = sync_sop_chunks(engine, max_chars)
+    vectors = sync_sop_embeddings(engine, embedder)
+    return {
+        **{f"sops_{k}": v for k, v in chunks.items()},
+        **{f"vectors_{k}": v for k, v in vectors.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Chunk SOPs and embed new or changed chunks (incremental)."
+    )
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument(
+        "--embedder",
+        default=os.getenv("SOP_EMBEDDER", "hashing"),
+        help='"hashing[:dim]" (offline) or "ollama:<model>"',
+    )
+    parser.add_argument("--max-chars", type=int, default=CHUNK_MAX_CHARS)
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="refill the FTS index from sop_chunks even if it exists",
+    )
+    args = parser.parse_args()
+
+    engine = create_sqlite_engine(args.db)
+    started = time.perf_counter()
+    stats = build_sop_index(
+        engine, make_embedder(args.embedder), args.max_chars, rebuild=args.rebuild
+    )
+    engine.dispose()
+
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+    print(f"elapsed_s: {time.perf_counter() - started:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from apps.mcp_server.query_plans import explain_plan, full_scans
+from apps.mcp_server.sql_guard import SqlTokenizeError, Token, tokenize_sql
+
+DB_PATH = "factory.db"
+
+# Words that end a table reference or a column reference.
+_KEYWORDS = {
+    "select", "from", "where", "join", "inner", "left", "right", "full",
+    "outer", "cross", "natural", "on", "using", "group", "order", "by",
+    "having", "limit", "offset", "union", "intersect", "except", "as", "and",
+    "or", "not", "in", "is", "null", "like", "glob", "between", "asc", "desc",
+    "case", "when", "then", "else", "end", "distinct", "all", "exists",
+    "collate", "escape", "with", "window", "over", "nulls", "first", "last",
+}
+_EQUALITY_OPS = {"=", "==", "is", "in"}
+_RANGE_OPS = {"<", "<=", ">", ">=", "between"}
+_VALUE_KINDS = {"param", "string", "number"}
+
+# (table, column expression) e.g. ("equipment", "UPPER(tag)")
+ColumnRef = Tuple[str, str]
+
+
+@dataclass
+class QueryShape:
+    tables: Dict[str, str] = field(default_factory=dict)
+    equalities: List[ColumnRef] = field(default_factory=list)
+    ranges: List[ColumnRef] = field(default_factory=list)
+    order_by: List[ColumnRef] = field(default_factory=list)
+
+
+@dataclass
+class Workload:
+    sql: str
+    params: Dict[str, object]
+    count: int = 0
+    total_ms: float = 0.0
+
+
+@dataclass
+class Suggestion:
+    table: str
+    columns: Tuple[str, ...]
+    queries: List[str] = field(default_factory=list)
+    executions: int = 0
+
+    @property
+    def name(self) -> str:
+        parts = [re.sub(r"[^a-z0-9]+", "_", c.lower()).strip("_") for c in self.columns]
+        return f"idx_{self.table}_{'_'.join(parts)}"
+
+    @property
+    def ddl(self) -> str:
+        return (
+            f"CREATE INDEX IF NOT EXISTS {self.name} "
+            f"ON {self.table} ({', '.join(self.columns)})"
+        )
+
+
+def _word(token: Token) -> Optional[str]:
+    kind, text, _ = token
+    if kind == "word":
+        return text.lower()
+    if kind == "ident":
+        return text[1:-1].lower()
+    return None
+
+
+def _parse_ref(
+    tokens: List[Token], i: int
+) -> Tuple[Optional[Tuple[Optional[str], str]], int]:
+    """
+    Column reference at tokens[i]: `col`, `alias.col` or `FUNC(alias.col)`.
+    Returns ((alias or None, expression), next index).
+    """
+
+    def plain(j: int) -> Tuple[Optional[Tuple[Optional[str], str]], int]:
+        name = _word(tokens[j]) if j < len(tokens) else None
+        if name is None or name in _KEYWORDS:
+            return None, j
+        if j + 2 < len(tokens) and tokens[j + 1][1] == ".":
+            column = _word(tokens[j + 2])
+            if column is not None:
+                return (name, column), j + 3
+        return (None, name), j + 1
+
+    name = _word(tokens[i])
+    if (
+        name is not None
+        and name not in _KEYWORDS
+        and i + 1 < len(tokens)
+        and tokens[i + 1][1] == "("
+    ):
+        inner, j = plain(i + 2)
+        if inner is None or j >= len(tokens) or tokens[j][1] != ")":
+            return None, i + 1
+        alias, column = inner
+        return (alias, f"{name.upper()}({column})"), j + 1
+    return plain(i)
+
+
+def parse_shape(sql: str) -> QueryShape:
+    shape = QueryShape()
+    tokens = tokenize_sql(sql)
+    refs: Dict[str, List[Tuple[Optional[str], str]]] = defaultdict(list)
+    clause = ""
+    i = 0
+    while i < len(tokens):
+        word = _word(tokens[i]) if tokens[i][0] == "word" else None
+
+        if word in ("from", "join") or (clause == "from" and tokens[i][1] == ","):
+            clause = "from"
+            j = i + 1
+            table = _word(tokens[j]) if j < len(tokens) else None
+            if table is None or table in _KEYWORDS:
+                i += 1
+                continue
+            j += 1
+            if j < len(tokens) and _word(tokens[j]) == "as":
+                j += 1
+            alias = _word(tokens[j]) if j < len(tokens) else None
+            if alias is not None and alias not in _KEYWORDS:
+                shape.tables[alias] = table
+                j += 1
+            shape.tables[table] = table
+            i = j
+            continue
+
+        if word in ("where", "on", "having"):
+            clause = "where"
+        elif word == "order" and i + 1 < len(tokens) and _word(tokens[i + 1]) == "by":
+            clause = "order"
+            i += 2
+            continue
+        elif word in ("group", "limit", "offset", "select", "union", "except"):
+            clause = ""
+
+        if clause in ("where", "order") and (word is None or word not in _KEYWORDS):
+            ref, j = _parse_ref(tokens, i)
+            if ref is not None:
+                if clause == "order":
+                    refs["order"].append(ref)
+                elif j < len(tokens):
+                    op = tokens[j][1].lower()
+                    rhs = tokens[j + 1] if j + 1 < len(tokens) else ("", "", False)
+                    is_value = rhs[0] in _VALUE_KINDS or rhs[1] == "("
+                    if op in _EQUALITY_OPS and is_value:
+                        refs["eq"].append(ref)
+                    elif op in _RANGE_OPS and is_value:
+                        refs["range"].append(ref)
+                i = j
+                continue
+        i += 1
+
+    tables = set(shape.tables.values())
+    only_table = next(iter(tables)) if len(tables) == 1 else None
+
+    def resolve(items: List[Tuple[Optional[str], str]]) -> List[ColumnRef]:
+        resolved = []
+        for alias, expr in items:
+            table = shape.tables.get(alias) if alias else only_table
+            if table and (table, expr) not in resolved:
+                resolved.append((table, expr))
+        return resolved
+
+    shape.equalities = resolve(refs["eq"])
+    shape.ranges = resolve(refs["range"])
+    shape.order_by = resolve(refs["order"])
+    return shape
+
+
+def candidate_columns(
+    shape: QueryShape, table: str, with_order: bool = True
+) -> Tuple[str, ...]:
+    columns = [expr for t, expr in shape.equalities if t == table]
+    ranges = [expr for t, expr in shape.ranges if t == table]
+    order = [expr for t, expr in shape.order_by if t == table] if with_order else []
+    tail = ranges[:1] or order[:1]
+    for expr in tail:
+        if expr not in columns:
+            columns.append(expr)
+    return tuple(columns)
+
+
+def _normalize_expr(expr: str) -> str:
+    expr = re.sub(r"\s+(asc|desc)\s*$", "", expr.strip(), flags=re.IGNORECASE)
+    expr = re.sub(r"\s+collate\s+\w+", "", expr, flags=re.IGNORECASE)
+    return re.sub(r"[\s\"`\[\]]", "", expr).lower()
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    parts.append(current)
+    return parts
+
+
+def existing_indexes(conn: sqlite3.Connection, table: str) -> List[List[str]]:
+    indexes = []
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+        (table,),
+    ).fetchall()
+    for name, ddl in rows:
+        if ddl:
+            body = ddl[ddl.index("(", ddl.upper().index(" ON ")) + 1 : ddl.rindex(")")]
+            columns = _split_top_level(body)
+        else:
+            # Automatic index for a UNIQUE/PRIMARY KEY constraint.
+            columns = [row[2] for row in conn.execute(f'PRAGMA index_info("{name}")')]
+        indexes.append([_normalize_expr(c) for c in columns])
+    return indexes
+
+
+def is_covered(conn: sqlite3.Connection, table: str, columns: Tuple[str, ...]) -> bool:
+    wanted = [_normalize_expr(c) for c in columns]
+    return any(
+        index[: len(wanted)] == wanted for index in existing_indexes(conn, table)
+    )
+
+
+def load_workload(log_paths: Iterable[str], queries: Iterable[str]) -> List[Workload]:
+    by_sql: Dict[str, Workload] = {}
+    for path in log_paths:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                item = by_sql.setdefault(
+                    record["sql"], Workload(record["sql"], record.get("params") or {})
+                )
+                item.count += 1
+                item.total_ms += float(record.get("elapsed_ms") or 0.0)
+    for sql in queries:
+        by_sql.setdefault(sql, Workload(sql, {})).count += 1
+    return sorted(by_sql.values(), key=lambda w: w.total_ms, reverse=True)
+
+
+def _bind_params(sql: str, params: Dict[str, object]) -> Dict[str, object]:
+    # EXPLAIN only needs every named parameter bound, not realistic values.
+    bound: Dict[str, object] = {}
+    for kind, text, _ in tokenize_sql(sql):
+        if kind == "param" and not text.startswith("?"):
+            bound[text[1:]] = None
+    bound.update(params)
+    return bound
+
+
+def _plan(conn: sqlite3.Connection, item: Workload) -> Optional[List[str]]:
+    try:
+        return explain_plan(conn, item.sql, _bind_params(item.sql, item.params))
+    except (sqlite3.Error, SqlTokenizeError) as exc:
+        print(f"  ! plano indisponivel: {exc}")
+        return None
+
+
+def advise(conn: sqlite3.Connection, workload: List[Workload]) -> List[Suggestion]:
+    suggestions: Dict[Tuple[str, Tuple[str, ...]], Suggestion] = {}
+    # Views (e.g. the compact time-series layout) cannot be indexed directly.
+    views = {
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'view'"
+        )
+    }
+    for item in workload:
+        plan = _plan(conn, item)
+        if plan is None:
+            continue
+        scans = full_scans(plan)
+        print(f"\n[{item.count}x, {item.total_ms:.1f} ms] {item.sql}")
+        for detail in plan:
+            print(f"  {detail}")
+        if not scans:
+            continue
+
+        # A filter the planner cannot use (e.g. UPPER(e.tag) = :tag) also
+        # decides the join order, so every filtered table is a candidate;
+        # ORDER BY alone only matters for the tables being scanned.
+        shape = parse_shape(item.sql)
+        scanned_tables = {shape.tables.get(s.lower(), s.lower()) for s in scans}
+        filtered = {t for t, _ in shape.equalities + shape.ranges}
+        for table in sorted((scanned_tables | filtered) - views):
+            columns = candidate_columns(
+                shape, table, with_order=table in scanned_tables
+            )
+            if not columns or is_covered(conn, table, columns):
+                continue
+            suggestion = suggestions.setdefault(
+                (table, columns), Suggestion(table, columns)
+            )
+            suggestion.queries.append(item.sql)
+            suggestion.executions += item.count
+    return sorted(suggestions.values(), key=lambda s: s.executions, reverse=True)
+
+
+def _connect(db_path: str, writable: bool) -> sqlite3.Connection:
+    if writable:
+        return sqlite3.connect(db_path)
+    return sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Read run_sql plan logs (RUN_SQL_PLAN_LOG) and suggest indexes "
+        "for queries that scan whole tables."
+    )
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--log", action="append", default=[], help="JSONL plan log")
+    parser.add_argument(
+        "--query", action="append", default=[], help="extra SQL to analyze"
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="open the database writable, create the suggested indexes and ANALYZE",
+    )
+    args = parser.parse_args()
+
+    workload = load_workload(args.log, args.query)
+    if not workload:
+        parser.error("nothing to analyze: pass --log and/or --query")
+
+    with _connect(args.db, args.apply) as conn:
+        suggestions = advise(conn, workload)
+
+        print("\nSugestoes de indice:" if suggestions else "\nNenhum indice sugerido.")
+        for suggestion in suggestions:
+            print(
+                f"  {suggestion.ddl};  "
+                f"-- {len(suggestion.queries)} queries, {suggestion.executions} execucoes"
+            )
+
+        if args.apply and suggestions:
+            for suggestion in suggestions:
+                conn.execute(suggestion.ddl)
+            conn.execute("ANALYZE")
+            conn.commit()
+            print("\nIndices criados. Planos apos a mudanca:")
+            for item in workload:
+                plan = _plan(conn, item)
+                if plan is not None:
+                    print(f"\n{item.sql}")
+                    for detail in plan:
+                        print(f"  {detail}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from persistence.db import create_sqlite_engine
+from persistence.rollups import ingest_rollups
+
+DB_PATH = "factory.db"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Fold new compressor_events/alarm_history rows into the hourly and "
+            "daily equipment rollups used by equipment_summary."
+        )
+    )
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="drop and recompute the rollups from scratch",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.0,
+        help="keep running, ingesting every N seconds (0 = run once)",
+    )
+    args = parser.parse_args()
+
+    engine = create_sqlite_engine(args.db)
+    rebuild = args.rebuild
+    try:
+        while True:
+            started = time.perf_counter()
+            stats = ingest_rollups(engine, rebuild=rebuild)
+            rebuild = False
+            elapsed = time.perf_counter() - started
+            summary = ", ".join(f"{key}={value}" for key, value in stats.items())
+            print(f"{summary}, elapsed_s={elapsed:.3f}", flush=True)
+            if args.interval <= 0:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from persistence.db import create_sqlite_engine
+from persistence.timeseries import GRANULARITIES, layout, to_compact, to_rowstore
+
+DB_PATH = "factory.db"
+
+
+def _size(db_path: str) -> int:
+    return sum(
+        os.path.getsize(path)
+        for path in (db_path, f"{db_path}-wal")
+        if os.path.exists(path)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Convert compressor_events/alarm_history between the row-store "
+            "tables and the compact time-series layout (epoch timestamps, "
+            "WITHOUT ROWID partitions behind a union view)."
+        )
+    )
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--to", choices=("compact", "rowstore"), default="compact")
+    parser.add_argument(
+        "--granularity",
+        choices=sorted(GRANULARITIES),
+        default="none",
+        help="partition period (first migration only); none keeps one table",
+    )
+    parser.add_argument(
+        "--keep-source",
+        action="store_true",
+        help="keep the original tables as <name>_rowstore",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="VACUUM afterwards so the file shrinks to the new size",
+    )
+    args = parser.parse_args()
+
+    engine = create_sqlite_engine(args.db)
+    size_before = _size(args.db)
+    started = time.perf_counter()
+    if args.to == "compact":
+        stats = to_compact(engine, args.granularity, keep_source=args.keep_source)
+    else:
+        stats = to_rowstore(engine)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        if args.vacuum:
+            conn.exec_driver_sql("VACUUM")
+        current = layout(conn)
+    engine.dispose()
+
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+    for source, kind in current.items():
+        print(f"{source}: {kind}")
+    print(f"bytes_before: {size_before}")
+    print(f"bytes_after: {_size(args.db)}")
+    print(f"elapsed_s: {time.perf_counter() - started:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import argparse
+import os
+import random
+import sqlite3
 import sys
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
+from infra.embeddings import make_embedder
 from persistence.db import create_sqlite_engine, session_factory
+from persistence.fts import drop_sop_fts
+from persistence.rollups import ingest_rollups
+from persistence.timeseries import drop_timeseries
 from persistence.models import (
     AlarmHistory,
     CompressorEvent,
@@ -16,14 +27,18 @@ from persistence.models import (
     MaintenanceLog,
     Sop,
 )
+from scripts.build_sop_index import build_sop_index
 
 DB_PATH = "factory.db"
+SOP_EMBEDDER = os.getenv("SOP_EMBEDDER", "hashing")
 
 
-def main() -> None:
-    engine = create_sqlite_engine(DB_PATH)
+def seed(db_path: str = DB_PATH) -> None:
+    engine = create_sqlite_engine(db_path)
     SessionLocal = session_factory(engine)
 
+    drop_sop_fts(engine)
+    drop_timeseries(engine)
     FactoryBase.metadata.drop_all(engine)
     FactoryBase.metadata.create_all(engine)
 
@@ -372,7 +387,338 @@ def main() -> None:
 
         session.commit()
 
-    print(f"Database seeded at: {DB_PATH}")
+    build_sop_index(engine, make_embedder(SOP_EMBEDDER))
+    ingest_rollups(engine)
+    engine.dispose()
+
+
+# equipment_type -> (tag prefix, area, [(event_type, unit, typical value, spread)])
+_EQUIPMENT_PROFILES = {
+    "compressor": (
+        "COMP",
+        "Utilities",
+        [
+            ("pressure", "bar", 7.0, 0.6),
+            ("vibration", "mm/s", 3.0, 1.2),
+            ("temperature", "C", 82.0, 8.0),
+            ("runtime", "h", 12.0, 3.0),
+            ("startup", None, None, None),
+            ("shutdown", None, None, None),
+        ],
+    ),
+    "chiller": (
+        "CHILL",
+        "Utilities",
+        [
+            ("flow", "m3/h", 45.0, 5.0),
+            ("temperature", "C", 7.0, 1.5),
+            ("startup", None, None, None),
+        ],
+    ),
+    "pump": (
+        "PUMP",
+        "Utilities",
+        [
+            ("flow", "m3/h", 20.0, 3.0),
+            ("vibration", "mm/s", 2.5, 1.0),
+            ("inspection", None, None, None),
+        ],
+    ),
+    "packaging_machine": (
+        "PACK",
+        "Packaging",
+        [
+            ("speed", "ppm", 120.0, 15.0),
+            ("jam", None, None, None),
+            ("inspection", None, None, None),
+        ],
+    ),
+}
+_SEVERITIES = (("info", 0.8), ("warning", 0.15), ("critical", 0.05))
+_TECHNICIANS = ("M. Silva", "R. Lima", "A. Souza", "C. Rocha", "J. Prado")
+_OPERATORS = ("op.jcarvalho", "op.lmota", "op.fsantos", "op.rbarros")
+_SOP_TOPICS = (
+    ("startup checklist", "Verify oil level, open valves, start in local mode"),
+    ("shutdown procedure", "Unload, isolate power, close valves, apply lockout-tagout"),
+    ("preventive maintenance", "Inspect belts, clean filters, check alignment"),
+    ("calibration", "Verify calibration status and record the certificate"),
+    ("cleaning", "Run empty cycle, clean contact parts, release line clearance"),
+    ("alarm response", "Acknowledge alarm, check trend, escalate if repeated"),
+)
+_TS_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+Row = Tuple[object, ...]
+
+
+def _equipment_rows(count: int, rng: random.Random) -> List[Row]:
+    types = list(_EQUIPMENT_PROFILES)
+    per_prefix: Dict[str, int] = {}
+    rows: List[Row] = []
+    for equipment_id in range(1, count + 1):
+        equipment_type = types[(equipment_id - 1) % len(types)]
+        prefix, area, _ = _EQUIPMENT_PROFILES[equipment_type]
+        per_prefix[prefix] = per_prefix.get(prefix, 0) + 1
+        rows.append(
+            (
+                equipment_id,
+                f"{prefix}-{per_prefix[prefix]:02d}",
+                equipment_type,
+                area,
+                f"Line-{chr(ord('A') + (equipment_id - 1) % 6)}",
+                rng.choices(("running", "maintenance", "stopped"), (90, 7, 3))[0],
+                (datetime(2020, 1, 1) + timedelta(days=rng.randrange(1800))).strftime(
+                    "%Y-%m-%d"
+                ),
+            )
+        )
+    return rows
+
+
+def _generate_history(
+    equipment: List[Row],
+    events_per_day: float,
+    start: datetime,
+    days: int,
+    rng: random.Random,
+    alarms: List[Row],
+    maintenance: List[Row],
+) -> Iterator[Row]:
+    """
+    Yield compressor_events rows in time order per equipment. Alarm and
+    maintenance rows derived from warning/critical events are collected into
+    the given lists, which stay far smaller than the event stream.
+    """
+    # Cumulative thresholds: one rng.random() per event instead of choices().
+    thresholds: List[Tuple[float, str]] = []
+    cumulative = 0.0
+    for name, weight in _SEVERITIES:
+        cumulative += weight
+        thresholds.append((cumulative, name))
+    event_id = 0
+    seconds = days * 86400
+    for equipment_id, _, equipment_type, *_ in equipment:
+        profile = _EQUIPMENT_PROFILES[str(equipment_type)][2]
+        total = max(1, int(events_per_day * days))
+        offsets = sorted(int(rng.random() * seconds) for _ in range(total))
+        for offset in offsets:
+            event_id += 1
+            ts = start + timedelta(seconds=offset)
+            pick = int(rng.random() * len(profile))
+            event_type, unit, typical, spread = profile[pick]
+            draw = rng.random()
+            severity = next((n for t, n in thresholds if draw < t), "info")
+            value = None
+            if typical is not None:
+                drift = {"info": 0.0, "warning": 2.0, "critical": 3.5}[severity]
+                value = round(rng.gauss(typical + drift * spread, spread), 2)
+            yield (
+                event_id,
+                equipment_id,
+                ts.isoformat(timespec="seconds"),
+                event_type,
+                severity,
+                value,
+                unit,
+                f"{event_type.title()} {severity} reading on {equipment_type}.",
+            )
+
+            if severity == "info" or rng.random() > 0.6:
+                continue
+            started = ts - timedelta(seconds=rng.randrange(30, 300))
+            ended = started + timedelta(minutes=rng.randrange(2, 90))
+            still_open = (start + timedelta(seconds=seconds) - ts) < timedelta(hours=6)
+            alarms.append(
+                (
+                    len(alarms) + 1,
+                    equipment_id,
+                    f"ALM-{event_type.upper()[:5]}",
+                    severity,
+                    started.strftime(_TS_FORMAT),
+                    None if still_open else ended.strftime(_TS_FORMAT),
+                    None if still_open else rng.choice(_OPERATORS),
+                    f"{event_type} {severity} alarm",
+                )
+            )
+            if severity == "critical" or rng.random() < 0.2:
+                maintenance.append(
+                    (
+                        len(maintenance) + 1,
+                        equipment_id,
+                        f"WO-{ts:%y%m%d}-{len(maintenance) + 1:05d}",
+                        (ts + timedelta(minutes=rng.randrange(10, 240))).strftime(
+                            _TS_FORMAT
+                        ),
+                        (
+                            "open"
+                            if still_open
+                            else rng.choices(
+                                ("closed", "in_progress", "open"), (90, 6, 4)
+                            )[0]
+                        ),
+                        rng.choice(_TECHNICIANS),
+                        f"Follow-up on {event_type} {severity} event.",
+                    )
+                )
+
+
+def _sop_rows(count: int) -> Iterator[Row]:
+    types = list(_EQUIPMENT_PROFILES)
+    for sop_id in range(1, count + 1):
+        topic, content = _SOP_TOPICS[(sop_id - 1) % len(_SOP_TOPICS)]
+        equipment_type = types[((sop_id - 1) // len(_SOP_TOPICS)) % len(types)]
+        prefix, area, _ = _EQUIPMENT_PROFILES[equipment_type]
+        name = equipment_type.replace("_", " ")
+        yield (
+            sop_id,
+            f"SOP-{prefix}-{sop_id:04d}",
+            f"{name.title()} {topic}",
+            area,
+            f"v{1 + sop_id % 4}.{sop_id % 10}",
+            # Sectioned like real SOPs so the chunk index has sections to cut.
+            (
+                f"Applies to every {name} in the {area} area.\n\n"
+                "## Safety\n"
+                "Wear PPE and confirm the equipment is isolated when required.\n\n"
+                "## Procedure\n"
+                f"{content} for the {name}.\n\n"
+                "## Records\n"
+                "Record findings with timestamp."
+            ),
+        )
+
+
+def generate(
+    db_path: str,
+    *,
+    equipment: int = 20,
+    events_per_day: float = 24.0,
+    years: float = 1.0,
+    seed_value: int = 42,
+    sops: int = 200,
+    end: str = "2026-01-13",
+) -> Dict[str, float]:
+    """
+    Build a synthetic factory database of arbitrary size. Rows are streamed
+    through sqlite3 executemany inside a single transaction, and secondary
+    indexes, the SOP index and the equipment rollups are built after loading.
+    Returns rows written per table and the achieved rows/second.
+    """
+    engine = create_sqlite_engine(db_path)
+    drop_sop_fts(engine)
+    drop_timeseries(engine)
+    FactoryBase.metadata.drop_all(engine)
+    FactoryBase.metadata.create_all(engine)
+    indexes = [i for t in FactoryBase.metadata.sorted_tables for i in t.indexes]
+    for index in indexes:
+        index.drop(engine)
+    engine.dispose()
+
+    rng = random.Random(seed_value)
+    days = max(1, int(years * 365))
+    start = datetime.fromisoformat(end) - timedelta(days=days)
+    equipment_rows = _equipment_rows(equipment, rng)
+    alarms: List[Row] = []
+    maintenance: List[Row] = []
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        # Bulk-load settings: the file is rebuilt from scratch if interrupted.
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO equipment VALUES (?, ?, ?, ?, ?, ?, ?)", equipment_rows
+        )
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT INTO compressor_events (id, equipment_id, event_ts, event_type, "
+            "severity, value, unit, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            _generate_history(
+                equipment_rows, events_per_day, start, days, rng, alarms, maintenance
+            ),
+        )
+        events = conn.total_changes - before
+        conn.executemany(
+            "INSERT INTO alarm_history (id, equipment_id, alarm_code, severity, "
+            "started_at, ended_at, acknowledged_by, note) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            alarms,
+        )
+        conn.executemany(
+            "INSERT INTO maintenance_log (id, equipment_id, work_order, event_ts, "
+            "status, technician, note) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            maintenance,
+        )
+        conn.executemany(
+            "INSERT INTO sop (id, code, title, area, version, content) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            _sop_rows(sops),
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    load_seconds = time.perf_counter() - started
+
+    engine = create_sqlite_engine(db_path)
+    for index in indexes:
+        index.create(engine)
+    build_sop_index(engine, make_embedder(SOP_EMBEDDER))
+    ingest_rollups(engine)
+    with engine.connect() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    total_seconds = time.perf_counter() - started
+
+    rows = len(equipment_rows) + events + len(alarms) + len(maintenance) + sops
+    return {
+        "equipment": len(equipment_rows),
+        "compressor_events": events,
+        "alarm_history": len(alarms),
+        "maintenance_log": len(maintenance),
+        "sop": sops,
+        "load_seconds": round(load_seconds, 3),
+        "total_seconds": round(total_seconds, 3),
+        "rows_per_second": round(rows / load_seconds) if load_seconds else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Seed the demo factory database, or generate a synthetic one."
+    )
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument(
+        "--generate",
+        action="store_true",
+        help="generate synthetic data instead of the small demo dataset",
+    )
+    parser.add_argument("--equipment", type=int, default=20)
+    parser.add_argument("--events-per-day", type=float, default=24.0)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sops", type=int, default=200)
+    parser.add_argument("--end", default="2026-01-13", help="last day of history")
+    args = parser.parse_args()
+
+    if not args.generate:
+        seed(args.db)
+        print(f"Database seeded at: {args.db}")
+        return
+
+    stats = generate(
+        args.db,
+        equipment=args.equipment,
+        events_per_day=args.events_per_day,
+        years=args.years,
+        seed_value=args.seed,
+        sops=args.sops,
+        end=args.end,
+    )
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+    print(f"Database generated at: {args.db}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+from scripts.seed_factory_db import generate
+from tests.helpers import free_port
+
+# The MCP server and the CLI settings read their configuration at import
+# time, so the test databases must exist before any test module imports them.
+_TMP = tempfile.TemporaryDirectory(prefix="mcp-sql-tests-")
+FACTORY_DB = str(Path(_TMP.name) / "factory.db")
+generate(FACTORY_DB, equipment=4, events_per_day=2, years=0.1, sops=8)
+# The ollama client reads OLLAMA_HOST when imported; the chat server tests
+# start the stub Ollama and the MCP server on these ports.
+OLLAMA_PORT = free_port()
+MCP_PORT = free_port()
+
+os.environ.update(
+    {
+        "DB_PATH": FACTORY_DB,
+        "MEMORY_DB": str(Path(_TMP.name) / "memory.db"),
+        "LLM_CACHE": "false",
+        "RUN_SQL_PLAN_LOG": "",
+        "RUN_SQL_CACHE_TTL": "60",
+        "OLLAMA_HOST": f"http://127.0.0.1:{OLLAMA_PORT}",
+        "MCP_URL": f"http://127.0.0.1:{MCP_PORT}/mcp",
+    }
+)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from typing import Any
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class McpHttpServer:
+    """The real FastMCP app served by uvicorn on a background thread."""
+
+    def __init__(self, port: int):
+        import uvicorn
+
+        from apps.mcp_server.server import mcp
+
+        config = uvicorn.Config(
+            mcp.streamable_http_app(), host="127.0.0.1", port=port, log_level="warning"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "McpHttpServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
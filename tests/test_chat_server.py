@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator
+
+import pytest
+from starlette.testclient import TestClient
+
+from apps.bot_cli import engine as chat_engine
+from apps.chat_server.server import create_app
+from benchmarks.stub_ollama import StubOllamaServer
+from infra.settings import settings
+from tests.conftest import MCP_PORT, OLLAMA_PORT
+from tests.helpers import McpHttpServer
+
+PROMPT = "listar eventos do COMP-01"
+
+
+@pytest.fixture(scope="module")
+def ollama() -> Iterator[StubOllamaServer]:
+    with StubOllamaServer(port=OLLAMA_PORT) as stub, McpHttpServer(MCP_PORT):
+        yield stub
+
+
+@pytest.fixture
+def client(ollama: StubOllamaServer) -> Iterator[TestClient]:
+    ollama.configure()
+    with TestClient(create_app()) as client:
+        yield client
+
+
+@pytest.fixture
+def streaming(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "OLLAMA_STREAM", True)
+
+
+def _conversation(client: TestClient) -> str:
+    response = client.post("/conversations", json={"title": "Teste"})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def _fail_ollama(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(*args: Any, **kwargs: Any) -> Any:
+        raise ConnectionError("ollama fora do ar")
+
+    monkeypatch.setattr(chat_engine, "ollama_chat", fail)
+
+
+def test_healthz(client: TestClient) -> None:
+    body = client.get("/healthz").json()
+    assert body["status"] == "ok"
+    assert "ollama_scheduler" in body
+
+
+def test_post_message_runs_a_turn(
+    client: TestClient, ollama: StubOllamaServer
+) -> None:
+    conv_id = _conversation(client)
+
+    response = client.post(f"/conversations/{conv_id}/messages", json={"text": PROMPT})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["error"] is None
+    assert body["routed"] is True
+    assert body["tools"] == ["run_sql"]
+    assert body["text"].startswith("Resumo")
+    assert ollama.stats()["requests"] == body["llm_calls"] == 1
+
+
+def test_messages_and_conversations_are_listed(client: TestClient) -> None:
+    conv_id = _conversation(client)
+    client.post(f"/conversations/{conv_id}/messages", json={"text": PROMPT})
+
+    messages = client.get(f"/conversations/{conv_id}/messages").json()
+    assert [m["role"] for m in messages][:1] == ["user"]
+    assert messages[0]["content"] == PROMPT
+    assert messages[-1]["role"] == "assistant"
+
+    limited = client.get(f"/conversations/{conv_id}/messages?limit=1").json()
+    assert len(limited) == 1
+
+    conversations = client.get("/conversations?limit=1000").json()
+    assert conv_id in [c["id"] for c in conversations]
+
+
+@pytest.mark.parametrize("path", ["/conversations", "/conversations/x/messages"])
+def test_invalid_limit_is_rejected(client: TestClient, path: str) -> None:
+    response = client.get(f"{path}?limit=abc")
+    assert response.status_code == 400
+    assert response.json()["code"] == "invalid_request"
+
+
+@pytest.mark.parametrize("body", [{"text": "   "}, {"texto": "oi"}, ["oi"]])
+def test_post_message_requires_text(client: TestClient, body: Any) -> None:
+    response = client.post("/conversations/x/messages", json=body)
+    assert response.status_code == 400
+    assert response.json()["code"] == "invalid_request"
+
+
+def test_failed_turn_returns_502(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    conv_id = _conversation(client)
+    _fail_ollama(monkeypatch)
+
+    response = client.post(f"/conversations/{conv_id}/messages", json={"text": PROMPT})
+
+    assert response.status_code == 502
+    assert response.json()["error"].startswith("ConnectionError")
+
+
+def test_socket_answers(client: TestClient) -> None:
+    conv_id = _conversation(client)
+    with client.websocket_connect(f"/conversations/{conv_id}/ws") as ws:
+        ws.send_json({"text": PROMPT})
+        frame: Dict[str, Any] = ws.receive_json()
+
+    assert frame["type"] == "answer"
+    assert frame["tools"] == ["run_sql"]
+    assert frame["text"].startswith("Resumo")
+
+
+def test_socket_streams_tokens(streaming: None, client: TestClient) -> None:
+    conv_id = _conversation(client)
+    with client.websocket_connect(f"/conversations/{conv_id}/ws") as ws:
+        ws.send_json({"text": PROMPT})
+        frames = [ws.receive_json()]
+        while frames[-1]["type"] == "token":
+            frames.append(ws.receive_json())
+
+    tokens = "".join(f["text"] for f in frames if f["type"] == "token")
+    assert frames[-1]["type"] == "answer"
+    assert frames[-1]["streamed"] is True
+    assert tokens.strip() == frames[-1]["text"]
+
+
+def test_socket_stays_open_after_errors(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    conv_id = _conversation(client)
+    with client.websocket_connect(f"/conversations/{conv_id}/ws") as ws:
+        ws.send_json({"text": ""})
+        assert ws.receive_json()["code"] == "invalid_request"
+        ws.send_text("isto nao e json")
+        assert ws.receive_json()["code"] == "invalid_request"
+        ws.send_bytes(b"\x00")
+        assert ws.receive_json()["code"] == "invalid_request"
+
+        with monkeypatch.context() as patch:
+            _fail_ollama(patch)
+            ws.send_json({"text": PROMPT})
+            frame = ws.receive_json()
+        assert frame["type"] == "error"
+        assert frame["code"] == "turn_failed"
+
+        ws.send_json({"text": PROMPT})
+        assert ws.receive_json()["type"] == "answer"
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from infra.context_window import ContextWindow, Message, message_tokens, split_turns
+from persistence.memory_store import ChatMemoryStore
+
+SYSTEM: Message = {"role": "system", "content": "Voce e um assistente."}
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[ChatMemoryStore]:
+    store = ChatMemoryStore(str(tmp_path / "memory.db"), write_behind=False)
+    store.create_conversation("c1", title="t")
+    yield store
+    store.close()
+    store.engine.dispose()
+
+
+def _turns(count: int, size: int = 10) -> List[Message]:
+    messages: List[Message] = []
+    for i in range(count):
+        messages.append({"role": "user", "content": f"pergunta {i} " + "x" * size})
+        messages.append({"role": "tool", "content": "y" * size})
+        messages.append({"role": "assistant", "content": f"resposta {i}"})
+    return messages
+
+
+def test_turns_start_at_user_messages() -> None:
+    turns = split_turns(_turns(3))
+    assert [len(turn) for turn in turns] == [3, 3, 3]
+    assert all(turn[0]["role"] == "user" for turn in turns)
+
+
+def test_old_turns_are_folded_into_the_summary(store: ChatMemoryStore) -> None:
+    window = ContextWindow(store, "c1", max_tokens=10_000, keep_turns=2)
+    messages = [SYSTEM] + _turns(4)
+
+    async def run() -> None:
+        window.compact(messages)
+        await window.wait()
+
+    asyncio.run(run())
+
+    assert messages[0] == SYSTEM
+    assert [m["content"] for m in messages if m["role"] == "user"] == [
+        "pergunta 2 " + "x" * 10,
+        "pergunta 3 " + "x" * 10,
+    ]
+    # Without a summarizer the user questions are kept as bullet points.
+    assert "pergunta 0" in window.summary and "pergunta 1" in window.summary
+    assert store.get_summary("c1") == window.summary
+    assert window.build(messages)[1] == window.summary_message()
+
+
+def test_token_budget_drops_turns_but_keeps_the_last(store: ChatMemoryStore) -> None:
+    messages = [SYSTEM] + _turns(3, size=400)
+    budget = message_tokens(SYSTEM) + sum(message_tokens(m) for m in messages[-3:])
+    window = ContextWindow(store, "c1", max_tokens=budget + 10, keep_turns=6)
+
+    async def run() -> None:
+        window.compact(messages)
+        await window.wait()
+
+    asyncio.run(run())
+
+    assert messages[1:] == _turns(3, size=400)[-3:]
+
+
+def test_summarizer_builds_on_the_previous_summary(store: ChatMemoryStore) -> None:
+    seen: List[str] = []
+
+    async def summarizer(previous: str, folded: List[Message]) -> str:
+        seen.append(previous)
+        return f"{previous}+{len(folded)}"
+
+    window = ContextWindow(store, "c1", keep_turns=1, summarizer=summarizer)
+
+    async def run() -> None:
+        # Two updates in a row: the second waits for the first.
+        window.compact([SYSTEM] + _turns(2))
+        window.compact([SYSTEM] + _turns(3)[3:])
+        await window.wait()
+
+    asyncio.run(run())
+
+    assert seen == ["", "+3"]
+    assert window.summary == "+3+3"
+
+
+def test_failed_summarizer_falls_back(store: ChatMemoryStore) -> None:
+    async def summarizer(previous: str, folded: List[Message]) -> str:
+        raise ConnectionError("ollama fora do ar")
+
+    window = ContextWindow(store, "c1", keep_turns=1, summarizer=summarizer)
+
+    async def run() -> None:
+        window.compact([SYSTEM] + _turns(2))
+        await window.wait()
+
+    asyncio.run(run())
+
+    assert window.summary.startswith("- usuario perguntou: pergunta 0")
+
+
+def test_history_is_loaded_within_budget_from_a_turn_start(
+    store: ChatMemoryStore,
+) -> None:
+    for message in _turns(5, size=200):
+        store.append_message("c1", message["role"], message["content"])
+    window = ContextWindow(store, "c1", max_tokens=200)
+
+    loaded = window.load_history()
+
+    assert loaded and loaded[0]["role"] == "user"
+    assert sum(message_tokens(m) for m in loaded) <= 200
+    assert loaded[-1]["content"] == "resposta 4"
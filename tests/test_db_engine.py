@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from persistence.db import create_sqlite_engine, pool_stats
+from tests.conftest import FACTORY_DB
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    path = tmp_path / "factory.db"
+    shutil.copy(FACTORY_DB, path)
+    return str(path)
+
+
+def test_serving_pool_reuses_a_fixed_set_of_connections(db_path: str) -> None:
+    engine = create_sqlite_engine(
+        db_path, read_only=True, profile="serving", pool_size=2
+    )
+    for _ in range(10):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT COUNT(*) FROM equipment")).scalar_one()
+
+    stats = pool_stats(engine)
+    assert stats["pool_class"] == "QueuePool"
+    assert stats["size"] == 2
+    assert (stats["connects"], stats["checkouts"]) == (1, 10)
+    engine.dispose()
+
+
+def test_read_only_serving_connections_refuse_writes(db_path: str) -> None:
+    engine = create_sqlite_engine(db_path, read_only=True, profile="serving")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA query_only")).scalar_one() == 1
+        assert conn.execute(text("PRAGMA temp_store")).scalar_one() == 2
+        with pytest.raises(OperationalError, match="readonly|read-only"):
+            conn.execute(text("DELETE FROM equipment"))
+    engine.dispose()
+
+
+def test_unknown_profile_is_rejected(db_path: str) -> None:
+    with pytest.raises(ValueError, match="profile"):
+        create_sqlite_engine(db_path, profile="fast")
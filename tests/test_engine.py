@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import warnings
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import pytest
+from ollama._types import ResponseError
+
+from apps.bot_cli import engine as chat_engine
+from apps.bot_cli.engine import ChatEngine, TurnResult, should_force_tool_retry
+from apps.bot_cli.intent_router import Intent
+from domain.schemas.ollama import OllamaResponse, ToolCall
+from persistence.memory_store import ChatMemoryStore
+
+# Below every router threshold, so the first LLM call always runs.
+UNROUTED = "Me ajude com o turno de hoje"
+
+
+class FakePool:
+    """MCPSessionPool stand-in: records tool calls, each taking `delay`."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.started: List[str] = []
+        self.finished: List[str] = []
+        self.cancelled: List[str] = []
+        self.peak = 0
+        self.running_after_turn = 0
+
+    async def call_tool(self, name: str, args: Dict[str, Any]) -> Any:
+        self.started.append(name)
+        self.peak = max(self.peak, len(self.started) - len(self.finished))
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        self.finished.append(name)
+        return {"rows": [], "tool": name}
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+def _message(content: str = "", *tools: str) -> OllamaResponse:
+    return OllamaResponse.model_validate(
+        {
+            "message": {
+                "content": content,
+                "tool_calls": [
+                    {"function": {"name": name, "arguments": {"text": name}}}
+                    for name in tools
+                ],
+            }
+        }
+    )
+
+
+Reply = Callable[[Optional[Callable[[ToolCall], None]]], Awaitable[OllamaResponse]]
+
+
+def _fake_stream(monkeypatch: pytest.MonkeyPatch, replies: List[Reply]) -> None:
+    """Streamed completions in order; each reply may start tools early."""
+    replies = list(replies)
+
+    async def stream(
+        client: Any,
+        messages: List[Dict[str, Any]],
+        metrics: Any,
+        *,
+        on_token: Any = None,
+        on_tool_call: Optional[Callable[[ToolCall], None]] = None,
+        **options: Any,
+    ) -> OllamaResponse:
+        return await replies.pop(0)(on_tool_call)
+
+    monkeypatch.setattr(chat_engine, "ollama_chat_stream", stream)
+
+
+def _streams(*tools: str, then: Optional[OllamaResponse] = None) -> Reply:
+    """Emit `tools` through on_tool_call, then return `then` (or raise)."""
+
+    async def reply(
+        on_tool_call: Optional[Callable[[ToolCall], None]],
+    ) -> OllamaResponse:
+        for tool_call in _message("", *tools).message.tool_calls:
+            assert on_tool_call is not None
+            on_tool_call(tool_call)
+        # The rest of the stream arrives after the tools started.
+        await asyncio.sleep(0.01)
+        if then is None:
+            raise ResponseError("modelo caiu")
+        return then
+
+    return reply
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[ChatMemoryStore]:
+    store = ChatMemoryStore(str(tmp_path / "memory.db"))
+    yield store
+    store.close()
+
+
+def _turn(pool: FakePool, store: ChatMemoryStore, stream: bool = True) -> TurnResult:
+    async def run() -> TurnResult:
+        stream_client: Any = object() if stream else None
+        engine = ChatEngine(pool, store, stream_client=stream_client)  # type: ignore
+        conv_id = await engine.create_conversation()
+        result = await engine.turn(conv_id, UNROUTED)
+        # Nothing the turn started may outlive it.
+        pool.running_after_turn = len(pool.started) - len(
+            pool.finished + pool.cancelled
+        )
+        await engine.close()
+        return result
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        result = asyncio.run(run())
+        gc.collect()
+    assert not [w for w in caught if "never retrieved" in str(w.message)]
+    return result
+
+
+def _intent(confidence: float) -> Intent:
+    return Intent("events", "run_sql", {}, confidence)
+
+
+def test_forced_retry_needs_a_likely_tool_or_a_refusal() -> None:
+    answer = "O compressor opera normalmente."
+    assert should_force_tool_retry(_intent(0.6), answer)
+    assert not should_force_tool_retry(_intent(0.3), answer)
+    assert not should_force_tool_retry(None, answer)
+    assert should_force_tool_retry(None, "Nao tenho acesso ao banco.")
+    assert should_force_tool_retry(_intent(0.2), "Essa consulta nao esta disponivel.")
+
+
+def test_tool_calls_run_concurrently_in_order(
+    monkeypatch: pytest.MonkeyPatch, store: ChatMemoryStore
+) -> None:
+    replies = [
+        _message("", "search_sop", "get_sop", "run_sql"),
+        _message("Resposta final"),
+    ]
+    monkeypatch.setattr(
+        chat_engine, "ollama_chat", lambda *args, **kwargs: replies.pop(0)
+    )
+    pool = FakePool(delay=0.01)
+
+    result = _turn(pool, store, stream=False)
+
+    assert result.text == "Resposta final"
+    assert result.tools == ["search_sop", "get_sop", "run_sql"]
+    assert pool.peak == 3
+
+
+def test_streamed_tool_calls_run_once(
+    monkeypatch: pytest.MonkeyPatch, store: ChatMemoryStore
+) -> None:
+    pool = FakePool()
+    _fake_stream(
+        monkeypatch,
+        [
+            _streams("search_sop", then=_message("", "search_sop")),
+            _streams(then=_message("Resposta final")),
+        ],
+    )
+
+    result = _turn(pool, store)
+
+    assert result.text == "Resposta final"
+    assert pool.started == ["search_sop"]
+
+
+def test_early_tasks_are_reused_when_more_calls_arrive(
+    monkeypatch: pytest.MonkeyPatch, store: ChatMemoryStore
+) -> None:
+    pool = FakePool()
+    _fake_stream(
+        monkeypatch,
+        [
+            _streams("search_sop", then=_message("", "search_sop", "get_sop")),
+            _streams(then=_message("Resposta final")),
+        ],
+    )
+
+    result = _turn(pool, store)
+
+    assert result.tools == ["search_sop", "get_sop"]
+    assert sorted(pool.started) == ["get_sop", "search_sop"]
+
+
+def test_failed_stream_cancels_started_tools(
+    monkeypatch: pytest.MonkeyPatch, store: ChatMemoryStore
+) -> None:
+    pool = FakePool(delay=5.0)
+    _fake_stream(monkeypatch, [_streams("search_sop")])
+
+    result = _turn(pool, store)
+
+    assert result.error.startswith("modelo caiu")
+    assert pool.started == ["search_sop"]
+    assert pool.cancelled == ["search_sop"]
+    assert pool.running_after_turn == 0
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from apps.bot_cli.intent_router import extract_entities, route
+from infra.settings import settings
+
+THRESHOLD = settings.INTENT_ROUTER_MIN_CONFIDENCE
+NOW = datetime(2026, 1, 13, 12, 0)
+
+
+@pytest.mark.parametrize(
+    "text, name, tool",
+    [
+        ("Mostre o SOP-COMP-001 secao de seguranca", "get_sop", "get_sop"),
+        ("Liste os alarmes criticos do CMP-101", "alarms", "run_sql"),
+        ("Qual o status do CMP-101?", "equipment_summary", "equipment_summary"),
+        ("Listar eventos do CMP-102 nas ultimas 48 horas", "events", "run_sql"),
+        ("Quais procedimentos de lubrificacao existem?", "search_sop", "search_sop"),
+        ("Quais manutencoes abertas?", "maintenance", "run_sql"),
+    ],
+)
+def test_clear_requests_are_routed(text: str, name: str, tool: str) -> None:
+    intent = route(text)
+    assert intent is not None
+    assert (intent.name, intent.tool) == (name, tool)
+    assert intent.confidence >= THRESHOLD
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # analytical questions need the LLM, not a fixed template
+        "Por que o CMP-101 tem tantos alarmes?",
+        "Quantos alarmes criticos tivemos na semana?",
+        # two intents close together
+        "alarmes e manutencao do CMP-101",
+        # no verb, no entity
+        "liste equipamentos",
+        "Compare o consumo de energia entre os compressores e recomende ajustes "
+        "para reduzir picos no turno da noite considerando o historico das "
+        "ultimas semanas e o custo de cada um",
+    ],
+)
+def test_ambiguous_or_analytical_requests_fall_back(text: str) -> None:
+    intent = route(text)
+    assert intent is not None
+    assert intent.confidence < THRESHOLD
+
+
+def test_unrelated_text_has_no_intent() -> None:
+    assert route("Bom dia, tudo bem?") is None
+
+
+def test_confidence_is_clipped() -> None:
+    intent = route(
+        "Por que o historico mostra a media menor? Compare os ultimos meses, "
+        "explique a tendencia e recomende o que devo fazer em cada turno da "
+        "fabrica considerando custo e risco"
+    )
+    assert intent is not None
+    assert intent.confidence == 0.0
+    assert route("Mostre o SOP-COMP-001 de seguranca").confidence == 1.0
+
+
+def test_sop_code_is_not_read_as_a_tag() -> None:
+    entities = extract_entities("Passo a passo do SOP-COMP-001 no CMP-101")
+    assert entities.sop_code == "SOP-COMP-001"
+    assert entities.tag == "CMP-101"
+
+
+def test_get_sop_requires_a_code() -> None:
+    intent = route("Mostre o SOP de partida")
+    assert intent is not None
+    assert intent.name == "search_sop"
+
+
+def test_arguments_carry_the_extracted_entities() -> None:
+    intent = route("Liste os alarmes criticos do CMP-101")
+    assert intent is not None
+    assert intent.args["params"] == {"tag": "CMP-101", "severity": "critical"}
+
+    intent = route("Qual o status do CMP-101 na ultima semana?")
+    assert intent is not None
+    assert intent.args == {"tag": "CMP-101", "window": "7d"}
+
+
+@pytest.mark.parametrize(
+    "text, column, since",
+    [
+        ("eventos do COMP-01 nos ultimos 3 dias", "ce.event_ts", "2026-01-10T12:00:00"),
+        ("alarmes da PUMP-3 em 12h", "ah.started_at", "2026-01-13T00:00:00"),
+        (
+            "manutencoes do COMP-01 na ultima semana",
+            "ml.event_ts",
+            "2026-01-06T12:00:00",
+        ),
+    ],
+)
+def test_window_bounds_the_query(text: str, column: str, since: str) -> None:
+    intent = route(text, now=NOW)
+    assert intent is not None
+    assert intent.tool == "run_sql"
+    assert f"{column} >= :since" in intent.args["query"]
+    assert intent.args["params"]["since"] == since
+
+
+def test_no_window_reads_the_latest_rows() -> None:
+    intent = route("listar eventos do COMP-01", now=NOW)
+    assert intent is not None
+    assert ":since" not in intent.args["query"]
+    assert "since" not in intent.args["params"]
+    assert route("Qual o status do COMP-01?").args["window"] == "24h"
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from persistence import llm_cache
+from persistence.llm_cache import LLMResponseCache, Message, cache_key
+
+SYSTEM: Message = {"role": "system", "content": "Voce e um assistente."}
+TOOLS = [{"type": "function", "function": {"name": "run_sql"}}]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(llm_cache.time, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def cache(tmp_path: Path, clock: FakeClock) -> Iterator[LLMResponseCache]:
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), ttl=60, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def _turn(question: str, tool_result: str) -> List[Message]:
+    return [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": ""},
+        {"role": "tool", "content": tool_result},
+    ]
+
+
+def test_tool_summaries_are_keyed_on_the_current_turn() -> None:
+    first = [SYSTEM, *_turn("a", "1"), {"role": "assistant", "content": "x"}]
+    other_history = [SYSTEM, {"role": "user", "content": "oi"}]
+
+    key = cache_key("m", first + _turn("eventos", "[1]"), TOOLS)
+
+    assert key == cache_key("m", other_history + _turn("eventos", "[1]"), TOOLS)
+    assert key != cache_key("m", first + _turn("eventos", "[2]"), TOOLS)
+    assert key != cache_key("other", first + _turn("eventos", "[1]"), TOOLS)
+
+
+def test_plain_turns_are_keyed_on_the_whole_prompt() -> None:
+    question = {"role": "user", "content": "e ontem?"}
+
+    assert cache_key(
+        "m", [SYSTEM, {"role": "user", "content": "a"}, question], TOOLS
+    ) != cache_key("m", [SYSTEM, {"role": "user", "content": "b"}, question], TOOLS)
+    assert cache_key("m", [SYSTEM, question], TOOLS) != cache_key(
+        "m", [SYSTEM, question], []
+    )
+
+
+def test_entries_expire_after_ttl(cache: LLMResponseCache, clock: FakeClock) -> None:
+    cache.put("k", "m", "resposta")
+
+    clock.now += 59
+    assert cache.get("k") == "resposta"
+    clock.now += 2
+    assert cache.get("k") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"]) == (1, 1, 1)
+    assert stats["entries"] == 0
+
+
+def test_least_recently_used_is_evicted(
+    cache: LLMResponseCache, clock: FakeClock
+) -> None:
+    cache.put("a", "m", "1")
+    clock.now += 1
+    cache.put("b", "m", "2")
+    clock.now += 1
+    assert cache.get("a") == "1"  # "b" is now the least recently used
+    clock.now += 1
+    cache.put("c", "m", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_survive_a_restart(tmp_path: Path, clock: FakeClock) -> None:
+    path = str(tmp_path / "llm_cache.db")
+    first = LLMResponseCache(path)
+    first.put("k", "m", "resposta")
+    first.close()
+
+    second = LLMResponseCache(path)
+    assert second.get("k") == "resposta"
+    assert second.stats()["stored_hits"] == 1
+    second.close()
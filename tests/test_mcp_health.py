@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from starlette.testclient import TestClient
+
+from apps.mcp_server import server
+from persistence.db import create_sqlite_engine
+
+
+@pytest.fixture
+def client() -> TestClient:
+    # Without `with`, the lifespan (which shuts the shared executor down)
+    # never runs.
+    return TestClient(server.mcp.streamable_http_app())
+
+
+def test_healthz_reports_the_worker(client: TestClient) -> None:
+    response = client.get("/healthz")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ok"
+    assert body["open_cursors"] == server.CURSORS.stats()["open"]
+    assert body["db_pool"]["checkouts"] >= 1
+
+
+def test_healthz_fails_without_the_database(
+    client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    missing = create_sqlite_engine(str(tmp_path / "missing.db"), read_only=True)
+    monkeypatch.setattr(server, "ENGINE", missing)
+
+    response = client.get("/healthz")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "db_unavailable"
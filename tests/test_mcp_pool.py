@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator, Dict, List
+
+import anyio
+import pytest
+
+from infra import mcp_client
+from infra.mcp_client import MCPSessionPool, is_connection_error
+
+
+class FakePool(MCPSessionPool):
+    """Skips the transport: every call gets the same dummy session."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__("http://127.0.0.1:1/mcp", **kwargs)
+        self.broken = 0
+
+    @contextlib.asynccontextmanager
+    async def session(self) -> AsyncIterator[Any]:
+        try:
+            yield object()
+        except Exception as exc:
+            if is_connection_error(exc):
+                self.broken += 1
+            raise
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [ConnectionResetError(), anyio.ClosedResourceError(), OSError("broken pipe")],
+)
+def test_transport_failures_are_connection_errors(exc: BaseException) -> None:
+    assert is_connection_error(exc)
+
+
+@pytest.mark.parametrize("exc", [TimeoutError(), ValueError("bad args")])
+def test_timeouts_and_tool_errors_are_not(exc: BaseException) -> None:
+    assert not is_connection_error(exc)
+
+
+def test_tool_calls_are_capped(monkeypatch: pytest.MonkeyPatch) -> None:
+    running: List[int] = [0]
+    peak: List[int] = [0]
+
+    async def call(session: Any, name: str, args: Dict[str, Any]) -> Any:
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return args["i"]
+
+    monkeypatch.setattr(mcp_client, "call_mcp_tool", call)
+    pool = FakePool(max_concurrency=2)
+
+    async def run() -> List[Any]:
+        return await asyncio.gather(
+            *(pool.call_tool("run_sql", {"i": i}) for i in range(6))
+        )
+
+    assert asyncio.run(run()) == list(range(6))
+    assert peak[0] == 2
+    assert pool.stats()["calls"] == 6
+
+
+def test_dropped_connection_is_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    attempts: List[int] = []
+
+    async def call(session: Any, name: str, args: Dict[str, Any]) -> Any:
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise anyio.ClosedResourceError()
+        return {"ok": True}
+
+    monkeypatch.setattr(mcp_client, "call_mcp_tool", call)
+    pool = FakePool()
+
+    assert asyncio.run(pool.call_tool("run_sql", {})) == {"ok": True}
+    assert pool.broken == 1
+    assert pool.call_retries == 1
+
+
+def test_slow_tool_times_out_without_retry(monkeypatch: pytest.MonkeyPatch) -> None:
+    attempts: List[int] = []
+
+    async def call(session: Any, name: str, args: Dict[str, Any]) -> Any:
+        attempts.append(1)
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(mcp_client, "call_mcp_tool", call)
+    pool = FakePool(call_timeout=0.01)
+
+    with pytest.raises(TimeoutError, match="run_sql timed out"):
+        asyncio.run(pool.call_tool("run_sql", {}))
+    assert len(attempts) == 1
+    assert pool.broken == 0
+    assert pool.call_timeouts == 1
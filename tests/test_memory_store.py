@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import gc
+import threading
+import weakref
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import text
+
+from persistence.memory_store import ChatMemoryStore, PendingMessage
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[ChatMemoryStore]:
+    # A long interval keeps the writer thread out of the way of the test.
+    store = ChatMemoryStore(
+        str(tmp_path / "memory.db"), write_behind=True, flush_interval=60
+    )
+    store.create_conversation("c1", title="t")
+    yield store
+    store.close()
+    store.engine.dispose()
+
+
+def _stored(store: ChatMemoryStore, conv_id: str = "c1") -> List[str]:
+    """Rows actually committed, bypassing the store's flush-before-read."""
+    with store.engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT content FROM messages WHERE conversation_id = :c ORDER BY id"
+            ),
+            {"c": conv_id},
+        )
+        return [row[0] for row in rows]
+
+
+def test_appends_are_queued_until_flush(store: ChatMemoryStore) -> None:
+    store.append_message("c1", "user", "m1")
+    store.append_message("c1", "assistant", "m2")
+    assert _stored(store) == []
+
+    store.flush()
+    assert _stored(store) == ["m1", "m2"]
+
+
+def test_reads_flush_first(store: ChatMemoryStore) -> None:
+    store.append_message("c1", "user", "m1")
+    assert [m.content for m in store.load_messages("c1")] == ["m1"]
+
+
+def test_close_writes_the_queue_and_stops_the_writer(tmp_path: Path) -> None:
+    store = ChatMemoryStore(
+        str(tmp_path / "memory.db"), write_behind=True, flush_interval=60
+    )
+    for i in range(5):
+        store.append_message("c2", "user", f"m{i}")
+    store.close()
+
+    assert store._writer is not None and not store._writer.is_alive()
+    assert _stored(store, "c2") == [f"m{i}" for i in range(5)]
+    # Appends after close are written synchronously, not lost in the queue.
+    store.append_message("c2", "user", "late")
+    assert _stored(store, "c2")[-1] == "late"
+    store.engine.dispose()
+
+
+def test_full_batch_wakes_the_writer(tmp_path: Path) -> None:
+    store = ChatMemoryStore(
+        str(tmp_path / "memory.db"),
+        write_behind=True,
+        flush_interval=60,
+        batch_size=3,
+    )
+    written = threading.Event()
+    write_batch = store._write_batch
+
+    def record(batch: List[PendingMessage]) -> None:
+        write_batch(batch)
+        written.set()
+
+    store._write_batch = record  # type: ignore[method-assign]
+    for i in range(3):
+        store.append_message("c3", "user", f"m{i}")
+    assert written.wait(5)
+    assert _stored(store, "c3") == ["m0", "m1", "m2"]
+    store.close()
+    store.engine.dispose()
+
+
+def test_failed_batch_is_requeued_in_order(store: ChatMemoryStore) -> None:
+    write_batch = store._write_batch
+    failures = [RuntimeError("database is locked")]
+
+    def flaky(batch: List[PendingMessage]) -> None:
+        if failures:
+            raise failures.pop()
+        write_batch(batch)
+
+    store._write_batch = flaky  # type: ignore[method-assign]
+    store.append_message("c1", "user", "m1")
+    with pytest.raises(RuntimeError):
+        store.flush()
+    store.append_message("c1", "user", "m2")
+
+    store.flush()
+    assert _stored(store) == ["m1", "m2"]
+
+
+def test_write_behind_is_the_default_and_close_releases_the_store(
+    tmp_path: Path,
+) -> None:
+    store = ChatMemoryStore(str(tmp_path / "memory.db"), flush_interval=60)
+    assert store.write_behind
+    ref = weakref.ref(store)
+
+    store.close()
+    store.engine.dispose()
+    del store
+    gc.collect()
+
+    # Nothing (the interpreter-exit hook included) keeps a closed store alive.
+    assert ref() is None
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List
+
+import pytest
+
+from infra.ollama_scheduler import OllamaScheduler, Priority
+
+
+def test_waiters_run_by_priority_then_arrival() -> None:
+    scheduler = OllamaScheduler(max_in_flight=1)
+    order: List[str] = []
+    release = asyncio.Event()
+
+    async def request(name: str, priority: Priority) -> None:
+        async with scheduler.slot("m", priority):
+            order.append(name)
+            if name == "busy":
+                await release.wait()
+
+    async def run() -> None:
+        busy = asyncio.create_task(request("busy", Priority.FIRST))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(request(name, priority))
+            for name, priority in (
+                ("summary", Priority.SUMMARY),
+                ("first-1", Priority.FIRST),
+                ("retry", Priority.RETRY),
+                ("final", Priority.FINAL),
+                ("first-2", Priority.FIRST),
+            )
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.stats()["models"]["m"] == {"in_flight": 1, "queued": 5}
+        release.set()
+        await asyncio.gather(busy, *waiters)
+
+    asyncio.run(run())
+
+    assert order == ["busy", "final", "first-1", "first-2", "retry", "summary"]
+
+
+def test_models_have_separate_caps() -> None:
+    scheduler = OllamaScheduler(max_in_flight=1)
+    peak = {"a": 0, "b": 0}
+    running = {"a": 0, "b": 0}
+
+    async def request(model: str) -> None:
+        async with scheduler.slot(model):
+            running[model] += 1
+            peak[model] = max(peak[model], running[model])
+            await asyncio.sleep(0.01)
+            running[model] -= 1
+
+    async def run() -> None:
+        await asyncio.gather(*(request(m) for m in "abab"))
+
+    asyncio.run(run())
+
+    assert peak == {"a": 1, "b": 1}
+    assert scheduler.stats()["priorities"]["first"]["requests"] == 4
+
+
+def test_zero_means_no_limit() -> None:
+    scheduler = OllamaScheduler(max_in_flight=0)
+
+    async def run() -> int:
+        async with scheduler.slot("m"), scheduler.slot("m"), scheduler.slot("m"):
+            return scheduler.stats()["models"]["m"]["in_flight"]
+
+    assert asyncio.run(run()) == 3
+
+
+def test_cancelled_waiter_gives_up_its_turn() -> None:
+    scheduler = OllamaScheduler(max_in_flight=1)
+    order: List[str] = []
+
+    async def request(name: str) -> None:
+        async with scheduler.slot("m"):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run() -> None:
+        first = asyncio.create_task(request("first"))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(request("cancelled"))
+        last = asyncio.create_task(request("last"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(first, last)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+    asyncio.run(run())
+
+    assert order == ["first", "last"]
+    stats = scheduler.stats()
+    assert stats["cancelled"] == 1
+    assert stats["models"]["m"] == {"in_flight": 0, "queued": 0}
+
+
+def test_request_options_carry_keep_alive_and_context() -> None:
+    assert OllamaScheduler().request_options() == {}
+    assert OllamaScheduler(keep_alive="30m", num_ctx=8192).request_options() == {
+        "keep_alive": "30m",
+        "options": {"num_ctx": 8192},
+    }
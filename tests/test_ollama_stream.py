@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List
+
+from ollama._types import ChatResponse, Message
+
+from domain.schemas.ollama import ToolCall
+from infra.ollama_stream import StreamMetrics, StreamTiming, stream_chat
+
+
+class FakeClient:
+    """AsyncClient stand-in that streams the given chunks."""
+
+    def __init__(self, chunks: List[Message]):
+        self.chunks = chunks
+
+    async def chat(self, **kwargs: Any) -> AsyncIterator[ChatResponse]:
+        assert kwargs["stream"] is True
+
+        async def stream() -> AsyncIterator[ChatResponse]:
+            for message in self.chunks:
+                yield ChatResponse(message=message)
+
+        return stream()
+
+
+def _tool(name: str, **args: Any) -> Message.ToolCall:
+    function = Message.ToolCall.Function(name=name, arguments=args)
+    return Message.ToolCall(function=function)
+
+
+def test_tokens_and_tool_calls_are_handed_over_as_they_arrive() -> None:
+    client = FakeClient(
+        [
+            Message(role="assistant", content="Vou "),
+            Message(role="assistant", content="consultar."),
+            Message(role="assistant", content="", tool_calls=[_tool("search_sop")]),
+            Message(role="assistant", content="", tool_calls=[_tool("run_sql")]),
+        ]
+    )
+    events: List[str] = []
+
+    def on_tool_call(tool_call: ToolCall) -> None:
+        events.append(f"tool:{tool_call.function.name}")
+
+    streamed = asyncio.run(
+        stream_chat(
+            client,  # type: ignore[arg-type]
+            "model",
+            [{"role": "user", "content": "oi"}],
+            [],
+            on_token=lambda token: events.append(f"token:{token}"),
+            on_tool_call=on_tool_call,
+        )
+    )
+
+    assert events == [
+        "token:Vou ",
+        "token:consultar.",
+        "tool:search_sop",
+        "tool:run_sql",
+    ]
+    message = streamed.response.message
+    assert message.content == "Vou consultar."
+    assert [tc.function.name for tc in message.tool_calls] == ["search_sop", "run_sql"]
+    assert streamed.timing.chunks == 4
+    assert streamed.timing.ttft_s is not None
+
+
+def test_metrics_skip_missing_ttft() -> None:
+    metrics = StreamMetrics()
+    metrics.record(StreamTiming(ttft_s=0.1, total_s=0.5, chunks=3))
+    metrics.record(StreamTiming(ttft_s=None, total_s=0.2, chunks=1))
+
+    summary: Dict[str, Any] = metrics.summary()
+
+    assert summary["ttft"]["count"] == 1
+    assert summary["total"]["count"] == 2
+    assert summary["total"]["max_s"] == 0.5
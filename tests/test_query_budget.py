@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from apps.mcp_server import server
+from apps.mcp_server.query_budget import QueryBudget, QueryBudgetExceeded
+
+# Every row counts the whole table again, so the step count grows fast.
+HEAVY = (
+    "SELECT a.id, (SELECT COUNT(*) FROM compressor_events b "
+    "WHERE b.value < a.value) AS below FROM compressor_events a"
+)
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (n INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(2000)])
+    return conn
+
+
+def test_step_budget_interrupts_the_statement() -> None:
+    budget = QueryBudget(max_seconds=0, max_steps=20_000)
+    conn = _connect()
+
+    with pytest.raises(QueryBudgetExceeded) as info:
+        with budget.guard(conn):
+            conn.execute("SELECT COUNT(*) FROM t a, t b").fetchone()
+
+    assert info.value.reason == "steps"
+    assert budget.stats()["killed_steps"] == 1
+    # The handler is removed, so the connection is usable again.
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone() == (2000,)
+
+
+def test_time_budget_interrupts_the_statement() -> None:
+    budget = QueryBudget(max_seconds=0.001, max_steps=0)
+    conn = _connect()
+
+    with pytest.raises(QueryBudgetExceeded) as info:
+        with budget.guard(conn):
+            conn.execute("SELECT COUNT(*) FROM t a, t b, t c").fetchone()
+
+    assert info.value.reason == "time"
+    assert budget.stats()["killed_time"] == 1
+
+
+def test_cheap_queries_and_other_errors_pass_through() -> None:
+    budget = QueryBudget(max_seconds=5, max_steps=1_000_000)
+    conn = _connect()
+
+    with budget.guard(conn):
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone() == (2000,)
+    with pytest.raises(sqlite3.OperationalError):
+        with budget.guard(conn):
+            conn.execute("SELECT nope FROM t")
+    assert budget.stats()["killed"] == 0
+
+
+def test_run_sql_reports_the_kill(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        server, "QUERY_BUDGET", QueryBudget(max_seconds=0, max_steps=30_000)
+    )
+
+    result = server._run_sql(HEAVY, limit=200)
+
+    assert result[0]["code"] == "query_budget_exceeded"
+    assert result[0]["reason"] == "steps"
+    assert "30000 passos" in result[0]["error"]
+    # A killed query is not cached as an empty result.
+    assert server.RESULT_CACHE.get(
+        server.make_cache_key(HEAVY, None, 200), server.db_fingerprint(server.DB_PATH)
+    ) is None
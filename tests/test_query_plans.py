@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from apps.mcp_server.query_plans import PlanRecorder, full_scans
+from scripts.index_advisor import (
+    Workload,
+    advise,
+    candidate_columns,
+    is_covered,
+    parse_shape,
+)
+from tests.conftest import FACTORY_DB
+
+SCAN_QUERY = "SELECT id FROM compressor_events WHERE value > :v ORDER BY value"
+JOIN_QUERY = (
+    "SELECT ce.id FROM compressor_events ce "
+    "JOIN equipment e ON e.id = ce.equipment_id "
+    "WHERE UPPER(e.tag) = :tag AND ce.event_ts >= :since "
+    "ORDER BY ce.event_ts DESC"
+)
+
+
+@pytest.fixture
+def conn(tmp_path: Path) -> Iterator[sqlite3.Connection]:
+    path = tmp_path / "factory.db"
+    shutil.copy(FACTORY_DB, path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def _log(path: Path) -> List[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_recorder_logs_plans_and_full_scans(
+    conn: sqlite3.Connection, tmp_path: Path
+) -> None:
+    log = tmp_path / "plans.jsonl"
+    plans = PlanRecorder(str(log))
+
+    plans.record(conn, SCAN_QUERY, {"v": 5}, 0.002)
+    plans.record(conn, SCAN_QUERY, {"v": 6}, 0.001)
+
+    records = _log(log)
+    assert [r["params"] for r in records] == [{"v": 5}, {"v": 6}]
+    assert records[0]["full_scans"] == ["compressor_events"]
+    assert records[0]["elapsed_ms"] == 2.0
+    stats = plans.stats()
+    assert (stats["recorded"], stats["full_scan_queries"]) == (2, 2)
+    assert stats["distinct_queries"] == 1
+    plans.close()
+
+
+def test_recorder_plans_again_after_a_new_index(
+    conn: sqlite3.Connection, tmp_path: Path
+) -> None:
+    log = tmp_path / "plans.jsonl"
+    plans = PlanRecorder(str(log))
+    plans.record(conn, SCAN_QUERY, {"v": 5}, 0.001)
+
+    conn.execute("CREATE INDEX idx_value ON compressor_events (value)")
+    plans.record(conn, SCAN_QUERY, {"v": 5}, 0.001)
+
+    first, second = _log(log)
+    assert first["full_scans"] == ["compressor_events"]
+    assert second["full_scans"] == []
+    assert any("idx_value" in step for step in second["plan"])
+    plans.close()
+
+
+def test_recorder_evicts_least_recently_used_plans(
+    conn: sqlite3.Connection, tmp_path: Path
+) -> None:
+    plans = PlanRecorder(str(tmp_path / "plans.jsonl"), max_plans=2)
+    for query in ("SELECT 1", "SELECT 2", "SELECT 1", "SELECT 3"):
+        plans.record(conn, query, None, 0.0)
+
+    stats = plans.stats()
+    assert stats["distinct_queries"] == 2
+    assert stats["plan_evictions"] == 1
+    plans.close()
+
+
+def test_recorder_is_off_without_a_log(conn: sqlite3.Connection) -> None:
+    plans = PlanRecorder("")
+    plans.record(conn, SCAN_QUERY, {"v": 5}, 0.001)
+    assert plans.stats()["recorded"] == 0
+
+
+def test_full_scans_skip_index_searches_and_virtual_tables() -> None:
+    plan = [
+        "SCAN ce",
+        "SEARCH e USING INTEGER PRIMARY KEY (rowid=?)",
+        "SCAN sop_chunk_fts VIRTUAL TABLE INDEX 0:M2",
+        "SCAN CONSTANT ROW",
+    ]
+    assert full_scans(plan) == ["ce"]
+
+
+def test_parse_shape_resolves_aliases() -> None:
+    shape = parse_shape(JOIN_QUERY)
+
+    assert shape.tables["ce"] == "compressor_events"
+    assert shape.equalities == [("equipment", "UPPER(tag)")]
+    assert shape.ranges == [("compressor_events", "event_ts")]
+    assert shape.order_by == [("compressor_events", "event_ts")]
+    assert candidate_columns(shape, "equipment") == ("UPPER(tag)",)
+
+
+def test_is_covered_matches_index_prefixes(conn: sqlite3.Connection) -> None:
+    assert is_covered(conn, "compressor_events", ("equipment_id",))
+    assert is_covered(conn, "compressor_events", ("equipment_id", "event_ts"))
+    assert not is_covered(conn, "compressor_events", ("event_ts",))
+    assert not is_covered(conn, "equipment", ("UPPER(tag)",))
+
+    conn.execute("CREATE INDEX idx_equipment_tag_upper ON equipment (UPPER(tag))")
+    assert is_covered(conn, "equipment", ("upper( tag )",))
+
+
+def test_advisor_suggests_only_missing_indexes(conn: sqlite3.Connection) -> None:
+    workload = [Workload(SCAN_QUERY, {"v": 5}, count=3)]
+
+    [suggestion] = advise(conn, workload)
+    assert (suggestion.table, suggestion.columns) == ("compressor_events", ("value",))
+    assert suggestion.executions == 3
+
+    conn.execute(suggestion.ddl)
+    assert advise(conn, workload) == []
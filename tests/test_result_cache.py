@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import pytest
+
+from apps.mcp_server import result_cache
+from apps.mcp_server.result_cache import QueryResultCache, make_cache_key
+
+FINGERPRINT = (1, 100, 0, 0)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(result_cache.time, "monotonic", fake)
+    return fake
+
+
+def test_entries_expire_after_ttl(clock: FakeClock) -> None:
+    cache = QueryResultCache(max_entries=4, ttl_seconds=60)
+    cache.put("q", FINGERPRINT, "rows")
+
+    clock.now += 59
+    assert cache.get("q", FINGERPRINT) == "rows"
+    clock.now += 2
+    assert cache.get("q", FINGERPRINT) is None
+    assert cache.stats()["size"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted(clock: FakeClock) -> None:
+    cache = QueryResultCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", FINGERPRINT, 1)
+    cache.put("b", FINGERPRINT, 2)
+    assert cache.get("a", FINGERPRINT) == 1  # "b" is now the oldest
+    cache.put("c", FINGERPRINT, 3)
+
+    assert cache.get("b", FINGERPRINT) is None
+    assert cache.get("a", FINGERPRINT) == 1
+    assert cache.get("c", FINGERPRINT) == 3
+    assert cache.evictions == 1
+
+
+def test_database_change_invalidates_everything(clock: FakeClock) -> None:
+    cache = QueryResultCache(max_entries=4, ttl_seconds=60)
+    cache.put("q", FINGERPRINT, "old")
+    assert cache.get("q", (2, 100, 0, 0)) is None
+    assert cache.invalidations == 1
+    assert cache.get("q", FINGERPRINT) is None
+
+
+def test_zero_entries_disables_the_cache() -> None:
+    cache = QueryResultCache(max_entries=0)
+    cache.put("q", FINGERPRINT, "rows")
+    assert not cache.enabled
+    assert cache.get("q", FINGERPRINT) is None
+
+
+def test_cache_key_ignores_param_order_but_not_limit() -> None:
+    sql = "SELECT * FROM t WHERE a = :a AND b = :b"
+    assert make_cache_key(sql, {"a": 1, "b": 2}, 50) == make_cache_key(
+        sql, {"b": 2, "a": 1}, 50
+    )
+    assert make_cache_key(sql, {"a": 1}, 50) != make_cache_key(sql, {"a": 1}, 20)
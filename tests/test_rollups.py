@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from persistence.db import create_sqlite_engine
+from persistence.rollups import ingest_rollups
+from persistence.timeseries import to_compact
+from tests.conftest import FACTORY_DB
+
+ROLLUP_TABLES = ("equipment_rollups", "alarm_rollups")
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Iterator[Engine]:
+    path = tmp_path / "factory.db"
+    shutil.copy(FACTORY_DB, path)
+    engine = create_sqlite_engine(str(path))
+    yield engine
+    engine.dispose()
+
+
+def _snapshot(engine: Engine) -> Dict[str, List[Tuple]]:
+    with engine.connect() as conn:
+        return {
+            table: [
+                tuple(row)
+                for row in conn.execute(
+                    text(f"SELECT * FROM {table} ORDER BY equipment_id, grain, bucket")
+                )
+            ]
+            for table in ROLLUP_TABLES
+        }
+
+
+def _add_events(engine: Engine, count: int) -> None:
+    with engine.begin() as conn:
+        for i in range(count):
+            conn.execute(
+                text(
+                    "INSERT INTO compressor_events (equipment_id, event_ts, "
+                    "event_type, severity, value, unit, description) VALUES "
+                    "(1, :ts, 'pressure', 'critical', :value, 'bar', 'teste')"
+                ),
+                {"ts": f"2026-01-12T10:{i:02d}:00", "value": 10.0 + i},
+            )
+        conn.execute(
+            text(
+                "INSERT INTO alarm_history (equipment_id, alarm_code, severity, "
+                "started_at) VALUES (2, 'HIGH_TEMP', 'warning', '2026-01-12T11:00:00')"
+            )
+        )
+
+
+def test_rerun_without_new_rows_changes_nothing(engine: Engine) -> None:
+    ingest_rollups(engine)
+    before = _snapshot(engine)
+
+    stats = ingest_rollups(engine)
+
+    assert stats["compressor_events_rows"] == 0
+    assert stats["alarm_history_rows"] == 0
+    assert _snapshot(engine) == before
+
+
+def test_incremental_ingest_matches_a_rebuild(engine: Engine) -> None:
+    ingest_rollups(engine)
+    _add_events(engine, 5)
+
+    stats = ingest_rollups(engine)
+    incremental = _snapshot(engine)
+    assert stats["compressor_events_rows"] == 5
+    assert stats["alarm_history_rows"] == 1
+
+    ingest_rollups(engine, rebuild=True)
+    assert _snapshot(engine) == incremental
+
+
+def test_daily_rollups_count_every_event(engine: Engine) -> None:
+    _add_events(engine, 3)
+    ingest_rollups(engine)
+    with engine.connect() as conn:
+        rolled = conn.execute(
+            text("SELECT sum(events) FROM equipment_rollups WHERE grain = 'day'")
+        ).scalar()
+        raw = conn.execute(text("SELECT count(*) FROM compressor_events")).scalar()
+    assert rolled == raw
+
+
+def test_incremental_ingest_on_the_compact_layout(engine: Engine) -> None:
+    ingest_rollups(engine)
+    to_compact(engine)
+    _add_events(engine, 4)
+
+    assert ingest_rollups(engine)["compressor_events_rows"] == 4
+    incremental = _snapshot(engine)
+    ingest_rollups(engine, rebuild=True)
+    assert _snapshot(engine) == incremental
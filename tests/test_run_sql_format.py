@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+
+from apps.mcp_server import server
+from infra.mcp_client import columnar_to_records, dump_tool_result, is_columnar
+
+QUERY = "SELECT tag, equipment_type, area FROM equipment ORDER BY tag"
+
+
+def test_columnar_holds_the_same_rows() -> None:
+    rows = server._run_sql(QUERY)
+    columnar = server._run_sql(QUERY, format="columnar")
+
+    assert columnar["columns"] == ["tag", "equipment_type", "area"]
+    assert is_columnar(columnar)
+    assert columnar_to_records(columnar) == rows
+
+
+def test_unknown_format_falls_back_to_rows() -> None:
+    assert server._run_sql(QUERY, format="csv") == server._run_sql(QUERY)
+
+
+def test_formats_share_the_cached_result() -> None:
+    server.RESULT_CACHE.clear()
+    server._run_sql(QUERY, format="columnar")
+    hits = server.RESULT_CACHE.hits
+
+    rows = server._run_sql(QUERY)
+
+    assert server.RESULT_CACHE.hits == hits + 1
+    assert rows[0].keys() == {"tag", "equipment_type", "area"}
+
+
+def test_columnar_payload_is_smaller() -> None:
+    rows = server._run_sql(QUERY)
+    columnar = server._run_sql(QUERY, format="columnar")
+
+    assert len(dump_tool_result(columnar)) < len(dump_tool_result(rows))
+    assert json.loads(dump_tool_result(columnar)) == columnar
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from apps.mcp_server import server
+from apps.mcp_server.query_budget import QueryBudget
+
+EVENTS = "SELECT id, event_ts FROM compressor_events ORDER BY id"
+
+
+def _all_ids() -> List[int]:
+    with server.ENGINE.connect() as conn:
+        return [row[0] for row in conn.exec_driver_sql(EVENTS)]
+
+
+def _pages(limit: int, fmt: str = "rows") -> List[Dict[str, Any]]:
+    pages = [server._run_sql(EVENTS, limit=limit, paginate=True, format=fmt)]
+    while pages[-1]["next_cursor"]:
+        cursor = pages[-1]["next_cursor"]
+        pages.append(server._run_sql("", limit=limit, cursor=cursor, format=fmt))
+    return pages
+
+
+def test_pages_cover_the_result_once_in_order() -> None:
+    pages = _pages(limit=50)
+    ids = [row["id"] for page in pages for row in page["rows"]]
+    assert ids == _all_ids()
+    assert all(len(page["rows"]) == 50 for page in pages[:-1])
+    assert 0 < len(pages[-1]["rows"]) <= 50
+    assert server.CURSORS.stats()["open"] == 0
+
+
+def test_exact_multiple_ends_without_an_empty_page() -> None:
+    total = len(_all_ids())
+    limit = max(d for d in range(1, 201) if total % d == 0)
+    pages = _pages(limit=limit)
+    assert len(pages) == total // limit
+    assert len(pages[-1]["rows"]) == limit
+
+
+def test_columnar_pages() -> None:
+    pages = _pages(limit=100, fmt="columnar")
+    assert pages[0]["columns"] == ["id", "event_ts"]
+    ids = [row[0] for page in pages for row in page["rows"]]
+    assert ids == _all_ids()
+
+
+def test_closed_cursor_is_rejected() -> None:
+    first = server._run_sql(EVENTS, limit=10, paginate=True)
+    server.CURSORS.close(first["next_cursor"])
+    result = server._run_sql("", cursor=first["next_cursor"])
+    assert result[0]["code"] == "cursor_not_found"
+
+
+def test_pagination_still_applies_the_sql_guard() -> None:
+    result = server._run_sql("DELETE FROM equipment", paginate=True)
+    assert "Query bloqueada" in result[0]["error"]
+
+
+def test_failed_first_page_releases_the_cursor() -> None:
+    # The first row is fine; the second raises while the page is fetched.
+    query = (
+        "SELECT id, CASE WHEN id > 1 THEN json('x') END AS bad "
+        "FROM compressor_events ORDER BY id"
+    )
+    opened = server.CURSORS.stats()["opened"]
+
+    result = server._run_sql(query, limit=10, paginate=True)
+
+    assert "error" in result[0]
+    assert server.CURSORS.stats()["opened"] == opened + 1
+    assert server.CURSORS.stats()["open"] == 0
+
+
+def test_first_page_over_budget_releases_the_cursor(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Cheap first row, then every row counts the whole table again.
+    query = (
+        "SELECT a.id, (SELECT COUNT(*) FROM compressor_events b "
+        "WHERE b.value < a.value) AS below FROM compressor_events a"
+    )
+    budget = QueryBudget(max_seconds=0, max_steps=30_000)
+    monkeypatch.setattr(server, "QUERY_BUDGET", budget)
+    monkeypatch.setattr(server.CURSORS, "budget", budget)
+    opened = server.CURSORS.stats()["opened"]
+
+    result = server._run_sql(query, limit=200, paginate=True)
+
+    assert result[0]["code"] == "query_budget_exceeded"
+    assert server.CURSORS.stats()["opened"] == opened + 1
+    assert server.CURSORS.stats()["open"] == 0
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from sqlalchemy.engine import Engine
+
+from apps.mcp_server import server
+from persistence.db import create_sqlite_engine, session_factory
+from persistence.fts import create_sop_fts, drop_sop_fts
+from tests.conftest import FACTORY_DB
+
+
+@pytest.fixture
+def engine(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Engine]:
+    """The server's engine and sessions pointed at a private copy of the db."""
+    path = tmp_path / "factory.db"
+    shutil.copy(FACTORY_DB, path)
+    engine = create_sqlite_engine(str(path))
+    monkeypatch.setattr(server, "DB_PATH", str(path))
+    monkeypatch.setattr(server, "ENGINE", engine)
+    monkeypatch.setattr(server, "SessionLocal", session_factory(engine))
+    monkeypatch.setattr(server, "_sop_fts_available", None)
+    yield engine
+    engine.dispose()
+
+
+def test_fts_ranks_title_matches_first(engine: Engine) -> None:
+    hits = server._search_sop("shutdown procedure", 5, "lexical")
+
+    assert {hit["code"] for hit in hits} == {"SOP-COMP-0002", "SOP-CHILL-0008"}
+    assert [hit["score"] for hit in hits] == sorted(hit["score"] for hit in hits)
+
+
+def test_fts_highlights_content_matches(engine: Engine) -> None:
+    hits = server._search_sop("lockout", 5, "lexical")
+
+    assert hits[0]["section"] == "Procedure"
+    assert "[lockout]" in hits[0]["snippet"]
+
+
+def test_like_fallback_until_the_index_is_built(engine: Engine) -> None:
+    drop_sop_fts(engine)
+
+    hits = server._search_sop("shutdown", 5, "lexical")
+    assert hits
+    assert all("shutdown" in hit["title"].lower() for hit in hits)
+    assert "score" not in hits[0]
+
+    # A missing index must not switch FTS off for the life of the process.
+    create_sop_fts(engine)
+    hits = server._search_sop("shutdown", 5, "lexical")
+    assert "score" in hits[0]
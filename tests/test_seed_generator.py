@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from scripts.seed_factory_db import generate
+
+TABLES = ("equipment", "compressor_events", "alarm_history", "maintenance_log", "sop")
+
+
+def _dump(path: Path) -> Dict[str, List[Tuple]]:
+    with sqlite3.connect(path) as conn:
+        return {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in TABLES
+        }
+
+
+def test_counts_match_the_requested_size(tmp_path: Path) -> None:
+    path = tmp_path / "factory.db"
+
+    stats = generate(str(path), equipment=3, events_per_day=4, years=0.05, sops=5)
+
+    rows = _dump(path)
+    assert {table: len(rows[table]) for table in TABLES} == {
+        table: stats[table] for table in TABLES
+    }
+    assert stats["equipment"] == 3 and stats["sop"] == 5
+    # About events_per_day per equipment over the window.
+    assert 0.5 * 3 * 4 * 18 <= stats["compressor_events"] <= 1.5 * 3 * 4 * 18
+    assert max(row[2] for row in rows["compressor_events"]) < "2026-01-14"
+
+
+def test_same_seed_same_database(tmp_path: Path) -> None:
+    first, second, other = (tmp_path / f"{n}.db" for n in ("a", "b", "c"))
+    generate(str(first), equipment=2, events_per_day=2, years=0.05, sops=3)
+    generate(str(second), equipment=2, events_per_day=2, years=0.05, sops=3)
+    generate(
+        str(other), equipment=2, events_per_day=2, years=0.05, sops=3, seed_value=7
+    )
+
+    assert _dump(first) == _dump(second)
+    assert _dump(first)["compressor_events"] != _dump(other)["compressor_events"]
+
+
+def test_indexes_and_derived_tables_are_built(tmp_path: Path) -> None:
+    path = tmp_path / "factory.db"
+    generate(str(path), equipment=2, events_per_day=2, years=0.05, sops=3)
+
+    with sqlite3.connect(path) as conn:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        rollups = conn.execute("SELECT COUNT(*) FROM equipment_rollups").fetchone()[0]
+    assert {"sop_chunks", "sop_chunk_fts", "sqlite_stat1"} <= names
+    assert "idx_compressor_events_equipment_ts" in names
+    assert rollups > 0
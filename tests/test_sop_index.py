@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from infra.embeddings import make_embedder
+from persistence.db import create_sqlite_engine
+from persistence.fts import SOP_FTS_TABLE, drop_sop_fts, fts_match_expression
+from scripts.build_sop_index import build_sop_index
+from tests.conftest import FACTORY_DB
+
+SOP_TEXT = """Procedimento de purga.
+
+## Safety
+Usar luvas contra o fluido zebrafuel.
+
+## Procedure
+Abrir a valvula de dreno e aguardar o fluxo parar.
+"""
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Iterator[Engine]:
+    path = tmp_path / "factory.db"
+    shutil.copy(FACTORY_DB, path)
+    engine = create_sqlite_engine(str(path))
+    yield engine
+    engine.dispose()
+
+
+def _search(engine: Engine, term: str) -> List[Tuple[str, str]]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                f"""
+                SELECT s.code, c.section
+                FROM {SOP_FTS_TABLE}
+                JOIN sop_chunks c ON c.id = {SOP_FTS_TABLE}.rowid
+                JOIN sop s ON s.id = c.sop_id
+                WHERE {SOP_FTS_TABLE} MATCH :match
+                ORDER BY s.code, c.chunk_index
+                """
+            ),
+            {"match": fts_match_expression(term)},
+        )
+        return [(row.code, row.section) for row in rows]
+
+
+def _insert_sop(engine: Engine, code: str, title: str, content: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO sop (code, title, area, version, content) "
+                "VALUES (:code, :title, 'utilities', '1.0', :content)"
+            ),
+            {"code": code, "title": title, "content": content},
+        )
+
+
+def test_new_sop_is_searchable_before_reindex(engine: Engine) -> None:
+    _insert_sop(engine, "SOP-TEST-001", "Purga do tanque", SOP_TEXT)
+    assert _search(engine, "zebrafuel") == [("SOP-TEST-001", "overview")]
+    # Title terms are indexed too.
+    assert ("SOP-TEST-001", "overview") in _search(engine, "purga tanque")
+
+
+def test_reindex_splits_trigger_chunks_into_sections(engine: Engine) -> None:
+    _insert_sop(engine, "SOP-TEST-001", "Purga do tanque", SOP_TEXT)
+    stats = build_sop_index(engine, make_embedder("hashing"))
+
+    assert stats["sops_chunked"] == 1
+    assert _search(engine, "zebrafuel") == [("SOP-TEST-001", "Safety")]
+    assert _search(engine, "valvula dreno") == [("SOP-TEST-001", "Procedure")]
+    assert build_sop_index(engine, make_embedder("hashing"))["sops_chunked"] == 0
+
+
+def test_edited_sop_replaces_its_chunks(engine: Engine) -> None:
+    _insert_sop(engine, "SOP-TEST-001", "Purga do tanque", SOP_TEXT)
+    build_sop_index(engine, make_embedder("hashing"))
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE sop SET content = :c WHERE code = 'SOP-TEST-001'"),
+            {"c": "Inspecionar o filtro quokkaval."},
+        )
+
+    assert _search(engine, "zebrafuel") == []
+    assert _search(engine, "quokkaval") == [("SOP-TEST-001", "overview")]
+
+
+def test_title_only_edit_is_reindexed(engine: Engine) -> None:
+    _insert_sop(engine, "SOP-TEST-001", "Purga do tanque", SOP_TEXT)
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE sop SET title = 'Drenagem wombatica' WHERE code = :c"),
+            {"c": "SOP-TEST-001"},
+        )
+    assert _search(engine, "wombatica") == [("SOP-TEST-001", "overview")]
+
+
+def test_deleted_sop_leaves_the_index(engine: Engine) -> None:
+    _insert_sop(engine, "SOP-TEST-001", "Purga do tanque", SOP_TEXT)
+    build_sop_index(engine, make_embedder("hashing"))
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM sop WHERE code = 'SOP-TEST-001'"))
+        orphans = conn.execute(
+            text(
+                "SELECT COUNT(*) FROM sop_chunks "
+                "WHERE sop_id NOT IN (SELECT id FROM sop)"
+            )
+        ).scalar()
+
+    assert _search(engine, "zebrafuel") == []
+    assert orphans == 0
+
+
+def test_rerun_keeps_the_fts_index(engine: Engine) -> None:
+    # A row only a rebuild would drop: its rowid matches no chunk.
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"INSERT INTO {SOP_FTS_TABLE}(rowid, title, section, content) "
+                "VALUES (999999, 'marcador', 'overview', 'capivarol')"
+            )
+        )
+
+    def marker() -> int:
+        with engine.connect() as conn:
+            return conn.execute(
+                text(f"SELECT COUNT(*) FROM {SOP_FTS_TABLE} WHERE rowid = 999999")
+            ).scalar()
+
+    build_sop_index(engine, make_embedder("hashing"))
+    assert marker() == 1
+    build_sop_index(engine, make_embedder("hashing"), rebuild=True)
+    assert marker() == 0
+
+
+def test_missing_fts_index_is_created_and_filled(engine: Engine) -> None:
+    drop_sop_fts(engine)
+    build_sop_index(engine, make_embedder("hashing"))
+    assert ("SOP-COMP-0002", "Procedure") in _search(engine, "lockout")
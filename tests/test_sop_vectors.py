@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import shutil
+from array import array
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from apps.mcp_server import server
+from infra.embeddings import HashingEmbedder
+from persistence.db import create_sqlite_engine, session_factory
+from persistence.sop_vectors import VectorIndex, sync_sop_embeddings
+from tests.conftest import FACTORY_DB
+
+
+@pytest.fixture
+def engine(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Engine]:
+    path = tmp_path / "factory.db"
+    shutil.copy(FACTORY_DB, path)
+    engine = create_sqlite_engine(str(path))
+    monkeypatch.setattr(server, "DB_PATH", str(path))
+    monkeypatch.setattr(server, "ENGINE", engine)
+    monkeypatch.setattr(server, "SessionLocal", session_factory(engine))
+    monkeypatch.setattr(server, "_vector_state", None)
+    yield engine
+    engine.dispose()
+
+
+def test_vector_search_matches_inflections(engine: Engine) -> None:
+    # No exact term for FTS, but the trigrams of "shutdown" are there.
+    assert server._search_sop("shutdowns", 3, "lexical") == []
+
+    hits = server._search_sop("shutdowns", 3, "vector")
+
+    assert {hit["code"] for hit in hits} <= {"SOP-COMP-0002", "SOP-CHILL-0008"}
+    assert [hit["score"] for hit in hits] == sorted(
+        (hit["score"] for hit in hits), reverse=True
+    )
+
+
+def test_hybrid_fuses_both_rankings(engine: Engine) -> None:
+    lexical = server._search_sop("lockout", 5, "lexical")
+    hits = server._search_sop("lockout", 5, "hybrid")
+
+    ids = [hit["chunk_id"] for hit in hits]
+    assert len(ids) == len(set(ids)) == 5
+    # Chunks found by both sides outrank those found by one.
+    assert {hit["chunk_id"] for hit in lexical} == set(ids[: len(lexical)])
+    assert all("snippet" in hit for hit in hits[: len(lexical)])
+    assert hits[0]["score"] > hits[-1]["score"]
+
+
+def test_without_vectors_search_stays_lexical(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM sop_embeddings"))
+
+    assert server._search_sop("lockout", 5, "hybrid") == server._search_sop(
+        "lockout", 5, "lexical"
+    )
+
+
+def test_sync_embeds_only_changed_chunks(engine: Engine) -> None:
+    embedder = HashingEmbedder()
+    assert sync_sop_embeddings(engine, embedder)["embedded"] == 0
+
+    with engine.begin() as conn:
+        total = conn.execute(text("SELECT COUNT(*) FROM sop_chunks")).scalar_one()
+        conn.execute(
+            text("UPDATE sop_chunks SET content = content || ' extra' WHERE id = 1")
+        )
+    stats = sync_sop_embeddings(engine, embedder)
+
+    assert stats == {"embedded": 1, "unchanged": total - 1, "deleted": 0}
+
+
+def test_index_returns_the_closest_vectors_first() -> None:
+    vectors = [array("f", v) for v in ([1, 0], [0, 1], [0.6, 0.8])]
+    index = VectorIndex([10, 20, 30], vectors, "test")
+
+    hits = index.search([0, 1], 2)
+
+    assert [chunk_id for chunk_id, _ in hits] == [20, 30]
+    assert hits[1][1] == pytest.approx(0.8)
+    assert index.search([1, 0, 0], 2) == []
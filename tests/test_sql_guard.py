@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pytest
+
+from apps.mcp_server.sql_guard import check_select, tokenize_sql
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM equipment",
+        "select tag from equipment;",
+        "WITH recent AS (SELECT * FROM compressor_events) SELECT * FROM recent",
+        "(SELECT 1)",
+        "SELECT 'DROP TABLE equipment' AS note",
+        'SELECT "update" FROM t',
+        "SELECT * FROM equipment -- delete everything\nWHERE id = :id",
+        "SELECT * FROM equipment /* ; insert */ WHERE tag = ?",
+        "SELECT updated_at, created_by FROM t",
+        "SELECT replace(tag, '-', '') FROM equipment",
+        "SELECT COUNT(*) AS média FROM equipment",
+        "SELECT * FROM equipment WHERE tag = :código",
+        "SELECT 1e5, 0x1F, .5 FROM t",
+    ],
+)
+def test_accepts_read_only_select(sql: str) -> None:
+    verdict = check_select(sql)
+    assert verdict.allowed, verdict.reason
+
+
+@pytest.mark.parametrize(
+    ("sql", "reason"),
+    [
+        ("DELETE FROM equipment", "apenas SELECT/WITH"),
+        ("PRAGMA table_info(equipment)", "apenas SELECT/WITH"),
+        ("", "apenas SELECT/WITH"),
+        ("SELECT 1; DROP TABLE equipment", "apenas um comando"),
+        ("SELECT 1;;", "apenas um comando"),
+        ("WITH x AS (SELECT 1) DELETE FROM equipment", "DELETE"),
+        ("WITH x AS (SELECT 1) INSERT INTO t SELECT * FROM x", "INSERT"),
+        ("WITH x AS (SELECT 1) REPLACE INTO t SELECT * FROM x", "REPLACE"),
+        ("SELECT * FROM t WHERE ATTACH", "ATTACH"),
+        ("SELECT load_extension('x')", "load_extension"),
+        ("SELECT 'unterminated", "caractere inesperado"),
+        ("SELECT 1 # comment", "caractere inesperado"),
+    ],
+)
+def test_rejects_writes_and_multiple_statements(sql: str, reason: str) -> None:
+    verdict = check_select(sql)
+    assert not verdict.allowed
+    assert reason in (verdict.reason or "")
+
+
+def test_normalizes_whitespace_and_comments() -> None:
+    verdict = check_select("SELECT  tag\n  FROM equipment -- all\n;")
+    assert verdict.normalized == "SELECT tag FROM equipment"
+
+
+def test_normalized_keeps_adjacent_tokens() -> None:
+    # SQLite names the result column after the expression text.
+    assert check_select("SELECT COUNT(*) FROM t").normalized == "SELECT COUNT(*) FROM t"
+
+
+def test_tokenizer_keeps_literals_whole() -> None:
+    kinds = [kind for kind, _, _ in tokenize_sql("SELECT 'a;b', \"x y\", :p, ?1")]
+    assert kinds == ["word", "string", "op", "ident", "op", "param", "op", "param"]
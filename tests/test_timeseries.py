@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from persistence.db import create_sqlite_engine
+from persistence.timeseries import (
+    SERIES,
+    SERIES_BY_SOURCE,
+    layout,
+    max_id,
+    partitions,
+    to_compact,
+    to_rowstore,
+)
+from tests.conftest import FACTORY_DB
+
+EVENTS = SERIES_BY_SOURCE["compressor_events"]
+NEW_EVENT = (
+    "INSERT INTO compressor_events "
+    "(equipment_id, event_ts, event_type, severity, value, unit, description) "
+    "VALUES (1, :ts, 'temperature', 'info', 1.5, 'C', 'teste')"
+)
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Iterator[Engine]:
+    path = tmp_path / "factory.db"
+    shutil.copy(FACTORY_DB, path)
+    engine = create_sqlite_engine(str(path))
+    yield engine
+    engine.dispose()
+
+
+def _rows(engine: Engine) -> Dict[str, List[Tuple]]:
+    with engine.connect() as conn:
+        return {
+            spec.source: [
+                tuple(row)
+                for row in conn.exec_driver_sql(
+                    f"SELECT {', '.join(c for c, _, _ in spec.columns)} "
+                    f"FROM {spec.source} ORDER BY id"
+                )
+            ]
+            for spec in SERIES
+        }
+
+
+def _months(engine: Engine) -> List[str]:
+    with engine.connect() as conn:
+        return [
+            row[0]
+            for row in conn.execute(
+                text(
+                    "SELECT DISTINCT substr(event_ts, 1, 7) FROM compressor_events "
+                    "ORDER BY 1"
+                )
+            )
+        ]
+
+
+def test_round_trip_keeps_every_row(engine: Engine) -> None:
+    before = _rows(engine)
+    months = _months(engine)
+
+    stats = to_compact(engine, "month")
+
+    assert stats["compressor_events_rows"] == len(before["compressor_events"])
+    assert stats["compressor_events_partitions"] == len(months)
+    with engine.connect() as conn:
+        assert layout(conn) == {s.source: "compact" for s in SERIES}
+        assert partitions(conn, EVENTS)[-1] == "pdefault"
+    assert _rows(engine) == before
+
+    to_rowstore(engine)
+
+    with engine.connect() as conn:
+        assert layout(conn) == {s.source: "rowstore" for s in SERIES}
+    assert _rows(engine) == before
+
+
+def test_view_writes_reach_the_partitions(engine: Engine) -> None:
+    to_compact(engine, "month")
+    month = _months(engine)[-1]
+    with engine.begin() as conn:
+        last = max_id(conn, "compressor_events")
+        conn.execute(text(NEW_EVENT), {"ts": f"{month}-02T10:00:00"})
+        new_id = max_id(conn, "compressor_events")
+        conn.execute(
+            text("UPDATE compressor_events SET value = 9.5 WHERE id = :id"),
+            {"id": last},
+        )
+        conn.execute(text("DELETE FROM compressor_events WHERE id = 1"))
+
+    partition = f"compressor_events_p{month.replace('-', '')}"
+    with engine.connect() as conn:
+        assert new_id == last + 1
+        stored = conn.exec_driver_sql(
+            f"SELECT ts FROM {partition} WHERE id = ?", (new_id,)
+        ).scalar_one()
+        assert stored == conn.execute(
+            text("SELECT CAST(strftime('%s', :ts) AS INTEGER)"),
+            {"ts": f"{month}-02T10:00:00"},
+        ).scalar_one()
+        values = dict(
+            conn.execute(
+                text("SELECT id, value FROM compressor_events WHERE id IN (1, :id)"),
+                {"id": last},
+            ).all()
+        )
+    assert values == {last: 9.5}
+
+
+def test_new_periods_land_in_the_default_partition(engine: Engine) -> None:
+    to_compact(engine, "month")
+    with engine.begin() as conn:
+        conn.execute(text(NEW_EVENT), {"ts": "2030-05-01T00:00:00"})
+
+    with engine.connect() as conn:
+        default = conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM compressor_events_pdefault"
+        ).scalar_one()
+    assert default == 1
+
+    # Re-running the migration moves them into their own period.
+    stats = to_compact(engine)
+
+    assert stats["compressor_events_rows"] == 1
+    with engine.connect() as conn:
+        assert "p203005" in partitions(conn, EVENTS)
+        assert (
+            conn.exec_driver_sql(
+                "SELECT COUNT(*) FROM compressor_events_pdefault"
+            ).scalar_one()
+            == 0
+        )
+
+
+def test_single_table_layout_by_default(engine: Engine) -> None:
+    before = _rows(engine)
+
+    to_compact(engine)
+
+    with engine.connect() as conn:
+        assert partitions(conn, EVENTS) == ["pall"]
+    assert _rows(engine) == before
+
+
+def test_unknown_granularity_is_rejected(engine: Engine) -> None:
+    with pytest.raises(ValueError, match="granularity"):
+        to_compact(engine, "week")
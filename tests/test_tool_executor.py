@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Dict, Iterator, List
+
+import pytest
+
+from apps.mcp_server.executor import ToolExecutor
+
+
+@pytest.fixture
+def executor() -> Iterator[ToolExecutor]:
+    executor = ToolExecutor(max_workers=4, limits={"run_sql": 1})
+    yield executor
+    executor.shutdown()
+
+
+class Probe:
+    """Blocking tool body that records how many copies ran at once."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.running: Dict[str, int] = {}
+        self.peak: Dict[str, int] = {}
+
+    def __call__(self, tool: str, delay: float) -> str:
+        with self._lock:
+            self.running[tool] = self.running.get(tool, 0) + 1
+            self.peak[tool] = max(self.peak.get(tool, 0), self.running[tool])
+        time.sleep(delay)
+        with self._lock:
+            self.running[tool] -= 1
+        return tool
+
+
+def test_each_tool_has_its_own_limit(executor: ToolExecutor) -> None:
+    probe = Probe()
+
+    async def run() -> List[str]:
+        calls = [executor.run("run_sql", probe, "run_sql", 0.02) for _ in range(3)]
+        calls += [
+            executor.run("search_sop", probe, "search_sop", 0.02) for _ in range(3)
+        ]
+        return await asyncio.gather(*calls)
+
+    assert asyncio.run(run()) == ["run_sql"] * 3 + ["search_sop"] * 3
+    assert probe.peak == {"run_sql": 1, "search_sop": 3}
+
+    stats = executor.stats()["tools"]
+    assert stats["run_sql"]["completed"] == 3
+    assert stats["run_sql"]["max_queued"] == 2
+    assert stats["search_sop"]["limit"] == 4
+    assert stats["search_sop"]["max_queued"] == 0
+
+
+def test_blocking_calls_leave_the_loop_free(executor: ToolExecutor) -> None:
+    ticks: List[float] = []
+
+    async def ticker() -> None:
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def run() -> None:
+        await asyncio.gather(executor.run("slow", time.sleep, 0.1), ticker())
+
+    asyncio.run(run())
+
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.09
+
+
+def test_failures_and_cancellations_are_counted(executor: ToolExecutor) -> None:
+    def fail() -> None:
+        raise ValueError("boom")
+
+    async def run() -> None:
+        with pytest.raises(ValueError):
+            await executor.run("run_sql", fail)
+        # Holds the only run_sql slot while a second call waits for it.
+        busy = asyncio.create_task(executor.run("run_sql", time.sleep, 0.05))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(executor.run("run_sql", time.sleep, 0))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.gather(busy, waiting, return_exceptions=True)
+
+    asyncio.run(run())
+
+    stats = executor.stats()["tools"]["run_sql"]
+    assert (stats["completed"], stats["failed"]) == (1, 2)
+    assert (stats["running"], stats["queued"]) == (0, 0)
+
+
+def test_semaphores_work_across_event_loops(executor: ToolExecutor) -> None:
+    for _ in range(2):
+        assert asyncio.run(executor.run("run_sql", str, 1)) == "1"